@@ -1,7 +1,9 @@
 import datetime
+import time
 from collections import Iterable, defaultdict
 
 import attr
+import sqlalchemy
 from manageiq_client.api import APIException
 from widgetastic.widget import View, Text
 from widgetastic_patternfly import Button, Input
@@ -17,17 +19,22 @@ from cfme.utils.appliance import Navigatable
 from cfme.utils.appliance.implementations.ui import navigate_to, navigator
 from cfme.utils.log import logger
 from cfme.utils.net import resolve_hostname
+from cfme.utils.rest import find_resources_by, query_resources
 from cfme.utils.stats import tol_check
 from cfme.utils.update import Updateable
 from cfme.utils.varmeth import variable
 from cfme.utils.version import VersionPicker
-from cfme.utils.wait import wait_for, RefreshTimer
+from cfme.utils.wait import wait_for, Backoff, RefreshTimer
 
 
 _base_types_cache = {}
 _provider_types_cache = defaultdict(dict)
 _all_types_cache = {}
 
+# Delay between the checks of the provider refresh state, grows up to the max delay
+REFRESH_POLL_DELAY = 2
+REFRESH_POLL_MAX_DELAY = 30
+
 
 # TODO: Move to collection when it happens
 def base_types():
@@ -181,6 +188,7 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
         else:
             created = True
             logger.info('Setting up Provider: %s', self.key)
+            started = time.time()
             add_view = navigate_to(self, 'Add')
 
             if not cancel or (cancel and any(self.view_value_mapping.values())):
@@ -238,6 +246,7 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
                 main_view.flash.assert_no_error()
             else:
                 add_view.add.click()
+                self.appliance.inventory.invalidate('providers')
                 if main_view.is_displayed:
                     success_text = '{} Providers "{}" was saved'.format(self.string_name,
                                                                         self.name)
@@ -249,6 +258,8 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
 
         if validate_inventory:
             self.validate()
+        if created:
+            logger.info('Provider %s added in %.1fs', self.key, time.time() - started)
 
         return created
 
@@ -402,6 +413,7 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
             return False
 
         logger.info("Setting up provider via REST: %s", self.key)
+        started = time.time()
 
         # provider attributes
         provider_attributes = {
@@ -425,6 +437,8 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
             self.appliance.rest_api.collections.providers.action.create(**provider_attributes)
         except APIException as err:
             raise AssertionError("Provider wasn't added: {}".format(err))
+        finally:
+            self.appliance.inventory.invalidate('providers')
 
         response = self.appliance.rest_api.response
         if not response:
@@ -433,6 +447,7 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
 
         if validate_inventory:
             self.validate()
+        logger.info('Provider %s added via REST in %.1fs', self.key, time.time() - started)
 
         self.appliance.rest_api.response = response
         return True
@@ -544,6 +559,7 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
         view.toolbar.configuration.item_select(item_title.format(self.string_name),
                                                handle_alert=not cancel)
         if not cancel:
+            self.appliance.inventory.invalidate()
             msg = ('Delete initiated for 1 {} Provider from '
                    'the {} Database'.format(self.string_name, self.appliance.product_name))
             view.flash.assert_success_message(msg)
@@ -556,6 +572,9 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
             provider_rest.action.delete()
         except APIException as err:
             raise AssertionError("Provider wasn't deleted: {}".format(err))
+        finally:
+            # the inventory of the provider goes away with it
+            self.appliance.inventory.invalidate()
 
         response = self.appliance.rest_api.response
         if not response:
@@ -600,15 +619,71 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
         else:
             return True
 
-    def validate(self):
-        refresh_timer = RefreshTimer(time_for_refresh=300)
+    def _refresh_state(self):
+        """Returns the last refresh date and error of the provider and the current time in UTC,
+        all in one DB query, or ``None`` if the provider is not in the DB."""
+        db = self.appliance.db.client
+        ems = db['ext_management_systems']
+        return (db.session
+                .query(ems.last_refresh_date, ems.last_refresh_error,
+                       sqlalchemy.func.timezone('UTC', sqlalchemy.func.now()))
+                .filter(ems.name == self.name)
+                .first())
+
+    def wait_for_refresh(self, since=None, num_sec=1000, refresh_delta=600, refresh_interval=300):
+        """Waits until a refresh of the provider finishes, returns as soon as it does.
+
+        The ``ext_management_systems`` DB table is polled with a short delay backing off.
+        If the DB is not accessible, this falls back to polling :py:meth:`is_refreshed`.
+
+        Args:
+            since: UTC time the refresh must finish after; by default any refresh finished less
+                than ``refresh_delta`` seconds ago is accepted
+            num_sec: Timeout
+            refresh_delta: See ``since``
+            refresh_interval: Seconds after which another refresh is requested when the
+                previous one did not finish
+
+        Returns: The last refresh date
+        """
+        started = time.time()
         try:
+            states = [self._refresh_state()]
+        except Exception as e:
+            logger.warning('Cannot watch the refresh in the DB (%s), polling the REST API', e)
             wait_for(self.is_refreshed,
-                     [refresh_timer],
-                     message="is_refreshed",
-                     num_sec=1000,
-                     delay=60,
-                     handle_exception=True)
+                     [RefreshTimer(time_for_refresh=refresh_interval), refresh_delta],
+                     message="is_refreshed", num_sec=num_sec, delay=60, handle_exception=True)
+            return self.last_refresh_date()
+        requests = {'needed': since is None, 'last': started}
+
+        def _refreshed():
+            state = states.pop() if states else self._refresh_state()
+            if state is None:
+                return False
+            last_refresh, _, now = state
+            oldest_accepted = since or now - datetime.timedelta(seconds=refresh_delta)
+            if last_refresh is not None and last_refresh >= oldest_accepted:
+                return last_refresh
+            # No refresh date means the initial refresh is still running
+            if ((last_refresh is not None and requests['needed']) or
+                    time.time() - requests['last'] > refresh_interval):
+                logger.info('Requesting a refresh of provider %s', self.name)
+                self.refresh_provider_relationships()
+                requests.update(needed=False, last=time.time())
+            return False
+
+        last_refresh = wait_for(
+            _refreshed, num_sec=num_sec, delay=Backoff(REFRESH_POLL_DELAY, REFRESH_POLL_MAX_DELAY),
+            message='refresh of provider {}'.format(self.name)).out
+        logger.info('Refresh of provider %s finished, waited %.1fs',
+                    self.name, time.time() - started)
+        return last_refresh
+
+    def validate(self):
+        started = time.time()
+        try:
+            self.wait_for_refresh()
         except Exception:
             # To see the possible error.
             self.load_details(refresh=True)
@@ -617,6 +692,7 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
             if self.last_refresh_error() is not None:
                 raise AddProviderError("Cannot validate the provider. Error occured: {}".format(
                                        self.last_refresh_error()))
+        logger.info('Provider %s validated in %.1fs', self.name, time.time() - started)
 
     def validate_stats(self, ui=False):
         """ Validates that the detail page matches the Providers information.
@@ -638,15 +714,22 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
         else:
             # Set off a Refresh Relationships
             method = 'ui' if ui else None
+            try:
+                refresh_requested = self._refresh_state()[2]
+            except Exception:
+                refresh_requested = None
             self.refresh_provider_relationships(method=method)
 
             refresh_timer = RefreshTimer(time_for_refresh=300)
+            if refresh_requested is not None:
+                # The stats cannot match before the refresh finishes
+                self.wait_for_refresh(since=refresh_requested)
             wait_for(self._do_stats_match,
                      [self.mgmt, self.STATS_TO_MATCH, refresh_timer],
                      {'ui': ui},
                      message="do_stats_match_db",
                      num_sec=1000,
-                     delay=60)
+                     delay=20 if refresh_requested is not None else 60)
 
         self.mgmt.disconnect()
 
@@ -752,10 +835,11 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
     @property
     def exists(self):
         """ Returns ``True`` if a provider of the same name exists on the appliance
+
+        Answered from the appliance inventory, see
+        :py:class:`cfme.utils.appliance.inventory.ApplianceInventory`.
         """
-        if self.name in self.appliance.managed_provider_names:
-            return True
-        return False
+        return self.appliance.inventory.exists('providers', self.name)
 
     def wait_for_delete(self):
         try:
@@ -996,10 +1080,16 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
         Returns a dictionary mapping template ids to their name, type, and guid
         """
         # TODO: Move to TemplateCollection.all
-        all_details = {}
-        for id in self.get_all_template_ids():
-            all_details[id] = self.get_template_details(id)
-        return all_details
+        logger.debug('Retrieving the details of all templates')
+        try:
+            templates = query_resources(
+                self.appliance.rest_api.collections.templates,
+                attributes=['name', 'type', 'guid'])
+        except APIException:
+            return None
+        return {
+            template['id']: {key: template.get(key) for key in ('name', 'type', 'guid')}
+            for template in templates}
 
     def get_vm_id(self, vm_name):
         """
@@ -1007,26 +1097,20 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
         """
         # TODO: Get Provider object from VMCollection.find, then use VM.id to get the id
         logger.debug('Retrieving the ID for VM: {}'.format(vm_name))
-        for vm_id in self.get_all_vm_ids():
-            details = self.get_vm_details(vm_id)
-            if details['name'] == vm_name:
-                return vm_id
+        return self.get_vm_ids([vm_name]).get(vm_name)
 
     def get_vm_ids(self, vm_names):
         """
         Returns a dictionary mapping each VM name to it's id
         """
         # TODO: Move to VMCollection.find or VMCollection.all
-        name_list = vm_names[:]
-        logger.debug('Retrieving the IDs for {} VM(s)'.format(len(name_list)))
+        logger.debug('Retrieving the IDs for {} VM(s)'.format(len(vm_names)))
         id_map = {}
-        for vm_id in self.get_all_vm_ids():
-            if not name_list:
-                break
-            vm_name = self.get_vm_details(vm_id)['name']
-            if vm_name in name_list:
-                id_map[vm_name] = vm_id
-                name_list.remove(vm_name)
+        vms = find_resources_by(
+            self.appliance.rest_api.collections.vms, 'name', vm_names, attributes=['name'])
+        for vm in vms:
+            # the first one found wins when more VMs have the same name
+            id_map.setdefault(vm['name'], vm['id'])
         return id_map
 
     def get_template_guids(self, template_dict):
@@ -74,6 +74,8 @@ class BaseVM(BaseEntity, Pretty, Updateable, PolicyProfileAssignable, Taggable,
     REMOVE_SELECTED = 'Remove selected items from Inventory'
     REMOVE_SINGLE = 'Remove Virtual Machine from Inventory'
     RETIRE_DATE_FMT = parsetime.saved_report_title_format
+    # REST API collection for the existence checks
+    INVENTORY_COLLECTION = 'vms'
     _param_name = ParamClassName('name')
     DETAILS_VIEW_CLASS = None
 
@@ -162,16 +164,34 @@ class BaseVM(BaseEntity, Pretty, Updateable, PolicyProfileAssignable, Taggable,
             view = navigate_to(self.parent, 'All')
             self.find_quadicon().check()
             view.toolbar.configuration.item_select(self.REMOVE_SELECTED, handle_alert=not cancel)
+        if not cancel:
+            self.appliance.inventory.invalidate(self.INVENTORY_COLLECTION)
 
     @property
     def exists(self):
-        """Checks presence of the quadicon in the CFME."""
+        """Checks presence of the VM in the CFME.
+
+        Answered from the appliance inventory (see
+        :py:class:`cfme.utils.appliance.inventory.ApplianceInventory`), by looking for the quadicon
+        if the REST API cannot tell.
+        """
+        try:
+            return self._exists_in_inventory()
+        except Exception as e:
+            logger.debug('Cannot check %s in the inventory (%s), navigating', self.name, e)
         try:
             navigate_to(self, 'Details')
             return True
         except VmOrInstanceNotFound:
             return False
 
+    def _exists_in_inventory(self):
+        provider_id = self.appliance.inventory.provider_id(self.provider.name)
+        if provider_id is None:
+            return False
+        return self.appliance.inventory.exists(
+            self.INVENTORY_COLLECTION, self.name, ems_id=provider_id)
+
     @property
     def ip_address(self):
         """Fetches IP Address of VM"""
@@ -943,6 +963,8 @@ class VMCollection(BaseVMCollection):
 class Template(BaseVM, _TemplateMixin):
     """A base class for all templates.
     """
+    INVENTORY_COLLECTION = 'templates'
+
     @cached_property
     def mgmt(self):
         """Holds wrapanapi template entity object for this template."""
@@ -14,6 +14,7 @@ import pytest
 
 from cfme.fixtures.pytest_store import store
 from cfme.utils.blockers import Blocker, BZ, GH
+from cfme.utils.log import logger
 
 
 @pytest.fixture(scope="function")
@@ -61,25 +62,45 @@ def pytest_addoption(parser):
                     default=False,
                     dest='list_blockers',
                     help='Specify to list the blockers (takes some time though).')
+    group.addoption('--no-prefetch-blockers',
+                    action='store_false',
+                    default=True,
+                    dest='prefetch_blockers',
+                    help='Do not retrieve all the blockers in bulk during the collection.')
+
+
+def collect_blockers(items):
+    """Return the set of all blockers specified in the metadata of the items."""
+    result = set([])
+    for item in items:
+        if "blockers" not in getattr(item, "_metadata", {}):
+            continue
+        for blocker in item._metadata["blockers"]:
+            try:
+                if isinstance(blocker, int):
+                    blocker_object = Blocker.parse("BZ#{}".format(blocker))
+                else:
+                    blocker_object = Blocker.parse(blocker)
+            except ValueError as e:
+                logger.warning("Could not parse blocker %r of %s: %s", blocker, item.nodeid, e)
+                continue
+            result.add(blocker_object)
+    return result
 
 
 @pytest.mark.trylast
 def pytest_collection_modifyitems(session, config, items):
+    if not (config.getvalue("prefetch_blockers") or config.getvalue("list_blockers")):
+        return
+    all_blockers = collect_blockers(items)
+    if config.getvalue("prefetch_blockers") and all_blockers:
+        # The results land in the shared cache, so the slaves can just load them
+        logger.info("Prefetching %d blockers", len(all_blockers))
+        Blocker.prefetch(all_blockers)
     if not config.getvalue("list_blockers"):
         return
     store.terminalreporter.write("Loading blockers ...\n", bold=True)
-    blocking = set([])
-    for item in items:
-        if "blockers" not in item._metadata:
-            continue
-        for blocker in item._metadata["blockers"]:
-            if isinstance(blocker, int):
-                # TODO: DRY
-                blocker_object = Blocker.parse("BZ#{}".format(blocker))
-            else:
-                blocker_object = Blocker.parse(blocker)
-            if blocker_object.blocks:
-                blocking.add(blocker_object)
+    blocking = set([blocker for blocker in all_blockers if blocker.blocks])
     if blocking:
         store.terminalreporter.write("Known blockers:\n", bold=True)
         for blocker in blocking:
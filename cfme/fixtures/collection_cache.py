@@ -0,0 +1,130 @@
+"""Collection manifest cache
+
+After the collection, the node ids collected from every test module are stored in a manifest in
+``.cache/collection.sqlite``, together with the hash of the module source and the hash of the
+configuration the collection depends on (``cfme_data``, ``env``, appliance version and provider
+selection). ``scripts/list_tests.py`` uses it to print the parametrized node ids of unchanged
+modules without having to run the collection at all.
+
+Only the parallelizer master (or a non-parallel run) writes the manifest.
+
+The manifest does not replace the collection of a test run, pytest items cannot be restored from
+it. The master still collects everything, the slaves collect only the modules with tests to run,
+see :py:meth:`cfme.fixtures.parallelizer.ParallelSession._slave_args`.
+"""
+import hashlib
+import json
+from collections import defaultdict
+
+import pytest
+from py.path import local
+
+from cfme.fixtures.pytest_store import store
+from cfme.utils.disk_cache import DiskCache
+from cfme.utils.log import logger
+from cfme.utils.path import cache_path, project_path
+
+MANIFEST_NAMESPACE = 'collection-manifest'
+
+
+def get_manifest_cache():
+    return DiskCache(cache_path.join('collection.sqlite'), namespace=MANIFEST_NAMESPACE)
+
+
+def file_digest(path):
+    """Returns the hash of the file contents, or ``None`` if the file cannot be read."""
+    try:
+        with open(str(path), 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except (IOError, OSError):
+        return None
+
+
+def config_digest(appliance_version=None, use_provider=None):
+    """Returns the hash of the configuration the parametrization depends on."""
+    from cfme.utils import conf
+    data = {
+        'cfme_data': conf.cfme_data,
+        'env': conf.env,
+        'appliance_version': appliance_version,
+        'use_provider': sorted(use_provider or []),
+    }
+    return hashlib.sha1(
+        json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def module_key(path):
+    """Returns the manifest key of the module, its path relative to the project root."""
+    return local(path).relto(project_path) or str(path)
+
+
+def lookup(paths, config=None, cache=None):
+    """Returns node ids from the manifest for the modules that have not changed since stored
+
+    Args:
+        paths: Paths of the test modules
+        config: Config hash to require; any configuration is accepted if ``None``
+        cache: The cache to use, the default manifest cache if ``None``
+
+    Returns:
+        A dictionary ``{path: [node ids]}`` of the modules found up to date in the manifest.
+    """
+    cache = cache or get_manifest_cache()
+    keys = {module_key(path): path for path in paths}
+    result = {}
+    for key, entry in cache.get_many(keys).items():
+        path = keys[key]
+        if entry['hash'] != file_digest(path):
+            continue
+        if config is not None and entry['config'] != config:
+            continue
+        result[path] = entry['nodeids']
+    return result
+
+
+def update(collected, config, cache=None):
+    """Stores the node ids collected from every module
+
+    Args:
+        collected: A dictionary ``{path: [node ids]}``
+        config: Config hash the collection was done with
+        cache: The cache to use, the default manifest cache if ``None``
+    """
+    cache = cache or get_manifest_cache()
+    cache.set_many({
+        module_key(path): {'hash': file_digest(path), 'config': config, 'nodeids': nodeids}
+        for path, nodeids in collected.items()})
+
+
+class CollectionManifest(object):
+    def __init__(self, config):
+        self.config = config
+        self.collected = defaultdict(list)
+
+    def pytest_itemcollected(self, item):
+        # Recorded before any uncollection or deselection
+        self.collected[str(item.fspath)].append(item.nodeid)
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_finish(self, session):
+        if store.parallelizer_role == 'slave' or not self.collected:
+            return
+        holder = self.config.pluginmanager.getplugin('appliance-holder')
+        try:
+            version = str(holder.held_appliance.version)
+        except Exception as e:
+            logger.warning('Not storing the collection manifest, unknown appliance version: %s',
+                           str(e))
+            return
+        update(self.collected, config_digest(version, self.config.getoption('use_provider')))
+        logger.info('Stored collection manifest of %d modules', len(self.collected))
+
+
+def pytest_addoption(parser):
+    parser.addoption('--no-collection-manifest', action='store_true', default=False,
+        help='Do not store the collected node ids in the collection manifest')
+
+
+def pytest_configure(config):
+    if not config.getoption('no_collection_manifest'):
+        config.pluginmanager.register(CollectionManifest(config), 'collection-manifest')
@@ -34,7 +34,7 @@ import json
 import os
 import signal
 import subprocess
-from collections import defaultdict, deque, namedtuple
+from collections import defaultdict, deque, namedtuple, OrderedDict
 from datetime import datetime
 from itertools import count
 
@@ -379,6 +379,25 @@ class ParallelSession(object):
         self.config.pluginmanager.register(self.trdist, "terminaldistreporter")
         self.session = session
 
+    def _slave_args(self):
+        """Narrows the slave collection down to the modules with tests to run
+
+        Modules whose tests were all uncollected or deselected do not need to be imported and
+        parametrized by the slaves again. Explicitly selected node ids are kept as they are.
+
+        The slaves use the args as the paths to collect, so only the module paths are passed,
+        relative to the invocation dir like the original args, so the node ids stay the same.
+        """
+        args = self.config.args
+        if not self.session.items or any('::' in arg for arg in args):
+            return args
+        invocation_dir = self.config.invocation_dir
+        modules = list(OrderedDict(
+            (item.fspath.relto(invocation_dir) or str(item.fspath), None)
+            for item in self.session.items))
+        self.log.info('slaves will collect %d modules', len(modules))
+        return modules
+
     def pytest_runtestloop(self):
         """pytest runtest loop
 
@@ -392,6 +411,7 @@ class ParallelSession(object):
         """
         # Build master collection for slave diffing and distribution
         self.collection = [item.nodeid for item in self.session.items]
+        self.worker_config['args'] = self._slave_args()
 
         # Fire up the workers after master collection is complete
         # master and the first slave share an appliance, this is a workaround to prevent a slave
@@ -523,6 +543,18 @@ class ParallelSession(object):
                 self.log.info('sent tests with param {} {!r}'.format(id, tests))
                 yield tests
 
+    @property
+    def _provider_setup_cleanses(self):
+        """Whether the provider setup of the slaves takes care of the providers left on appliances
+
+        With provider snapshots and a provider limit, the provider setup removes the extra
+        providers itself, or replaces the whole DB by a snapshot with the providers needed, in
+        which case deleting all the providers first would be wasted.
+        """
+        option = self.config.option
+        return (getattr(option, 'provider_snapshots', False) and
+                getattr(option, 'provider_limit', 0) > 0)
+
     def get(self, slave):
 
         def provs_of_tests(test_group):
@@ -573,14 +605,18 @@ class ParallelSession(object):
                 prov = provs[0]
                 # Already too many slaves with provider
                 app = slave.appliance
-                self.print_message(
-                    'cleansing appliance', slave, purple=True)
-                try:
-                    app.delete_all_providers()
-                except Exception as e:
+                if self._provider_setup_cleanses:
                     self.print_message(
-                        'cloud not cleanse', slave, red=True)
-                    self.print_message('error:', e, red=True)
+                        'leaving the providers to the provider setup', slave, purple=True)
+                else:
+                    self.print_message(
+                        'cleansing appliance', slave, purple=True)
+                    try:
+                        app.delete_all_providers()
+                    except Exception as e:
+                        self.print_message(
+                            'cloud not cleanse', slave, red=True)
+                        self.print_message('error:', e, red=True)
             slave.provider_allocation = [prov]
             self._pool.remove(test_group)
             return test_group
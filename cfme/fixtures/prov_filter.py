@@ -1,3 +1,4 @@
+from cfme.utils import providers
 from cfme.utils.log import logger
 from cfme.utils.providers import global_filters, list_providers, ProviderFilter
 
@@ -7,6 +8,9 @@ def pytest_addoption(parser):
     parser.getgroup('cfme')
     parser.addoption("--use-provider", action="append", default=[],
         help="list of provider keys or provider tags to include in test")
+    parser.addoption("--no-provider-catalog", action="store_true", default=False,
+        help="create provider crud objects and evaluate the provider filters from scratch on "
+             "every list_providers call, eg. to compare the collection time")
 
 
 def pytest_configure(config):
@@ -22,6 +26,18 @@ def pytest_configure(config):
 
     new_filter = ProviderFilter(keys=cmd_filter, required_tags=cmd_filter, conjunctive=False)
     global_filters['use_provider'] = new_filter
+    providers.use_provider_catalog = not config.getoption('no_provider_catalog')
 
     logger.debug('Filtering providers with {}, leaves {}'.format(
         cmd_filter, [prov.key for prov in list_providers()]))
+
+
+def pytest_collection_finish(session):
+    from cfme.fixtures.pytest_store import store
+    stats = providers.list_providers_stats
+    message = "Listing providers: {} calls took {:.2f}s".format(stats['calls'], stats['time'])
+    if providers.use_provider_catalog:
+        message += " ({} answered from the provider catalog)".format(stats['cached'])
+    logger.info(message)
+    if store.terminalreporter is not None:
+        store.terminalreporter.write("{}\n".format(message), bold=True)
@@ -35,9 +35,17 @@ If setting up a provider fails, the issue is logged and an internal counter is i
 as a result. If this counter reaches a predefined number of failures (see ``SETUP_FAIL_LIMIT``),
 the failing provider will be added to the list of problematic providers and no further attempts
 to set it up will be made.
+
+With ``--provider-snapshots``, the appliance DB is dumped on the appliance after a provider is set
+up and refreshed. When the same set of providers is needed again on the same appliance build,
+the dump is restored instead of adding the provider and waiting for the inventory refresh again.
 """
+import hashlib
+import json
 import random
+import re
 import sys
+import time
 from collections import Mapping
 from collections import defaultdict
 
@@ -51,6 +59,7 @@ from cfme.common.provider import BaseProvider, all_types
 from cfme.fixtures.artifactor_plugin import fire_art_test_hook
 from cfme.fixtures.pytest_store import store
 from cfme.fixtures.templateloader import TEMPLATES
+from cfme.utils import conf
 from cfme.utils.appliance import ApplianceException
 from cfme.utils.log import logger
 from cfme.utils.providers import ProviderFilter, list_providers
@@ -76,6 +85,13 @@ def pytest_addoption(parser):
             "Use 1 or 2 when running on a single appliance, depending on HW configuration."
         )
     )
+    parser.addoption('--provider-snapshots', action='store_true', default=False,
+        help=(
+            "Snapshot the appliance DB after setting up providers and restore the snapshot "
+            "instead of setting up the same providers again. Restoring brings back the whole DB "
+            "as it was when the snapshot was taken and restarts EVM."
+        )
+    )
 
 
 def _artifactor_skip_providers(request, providers, skip_msg):
@@ -101,31 +117,100 @@ def enable_provider_regions(provider):
                         .format(provider, ex.message))
 
 
+def provider_snapshot_name(appliance, provider_keys):
+    """Name of the DB snapshot with given providers set up on the appliance
+
+    Depends on the appliance build, the DB schema (the migrations applied) and the yaml data of
+    the providers, so that the snapshot is not used when any of them changes. Returns ``None`` if
+    the DB schema cannot be determined.
+    """
+    schema_key = appliance.db.client.schema_key
+    if schema_key is None:
+        return None
+    providers_data = [
+        (key, conf.cfme_data.management_systems[key]) for key in sorted(provider_keys)]
+    digest = hashlib.sha1(
+        json.dumps(providers_data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    build = re.sub(r'[^\w.-]', '_', '{}-{}-{}'.format(
+        appliance.version, appliance.build, schema_key))
+    return 'providers-{}-{}'.format(build, digest[:16])
+
+
+def _restore_provider_snapshot(appliance, provider, provider_keys):
+    """Restores the DB snapshot with the providers set up, returns whether it succeeded
+
+    Args:
+        appliance: The appliance
+        provider: The provider being set up
+        provider_keys: Keys of all the providers the snapshot has to have
+    """
+    try:
+        name = provider_snapshot_name(appliance, provider_keys)
+        if name is None or not appliance.db.has_snapshot(name):
+            return False
+        started = time.time()
+        store.terminalreporter.write_line(
+            'Restoring DB snapshot with provider {}'.format(provider.key), green=True)
+        appliance.db.restore_snapshot(name)
+    except Exception as e:
+        logger.exception(e)
+        return False
+    if not provider.exists:
+        logger.warning('Provider %s missing after restoring snapshot %s', provider.key, name)
+        return False
+    logger.info('Provider %s set up from DB snapshot %s in %.1fs',
+                provider.key, name, time.time() - started)
+    return True
+
+
+def _create_provider_snapshot(appliance):
+    """Snapshots the DB with the providers set up, unless there already is such snapshot"""
+    try:
+        name = provider_snapshot_name(
+            appliance, {p.key for p in appliance.managed_known_providers})
+        if name is not None and not appliance.db.has_snapshot(name):
+            appliance.db.create_snapshot(name)
+    except Exception as e:
+        logger.warning('Could not create DB snapshot of the providers: %s', e)
+
+
 def _setup_provider_verbose(request, provider, appliance=None):
     if appliance is None:
         appliance = store.current_appliance
     try:
-        if request.config.option.provider_limit > 0:
+        use_snapshots = (request.config.getoption('provider_snapshots') and
+                         appliance.db.is_internal)
+        existing_providers = []
+        if request.config.option.provider_limit > 0 or use_snapshots:
             existing_providers = [
                 p for p in appliance.managed_known_providers if p.key != provider.key]
             random.shuffle(existing_providers)
+        providers_to_remove = []
+        if request.config.option.provider_limit > 0:
             maximum_current_providers = request.config.option.provider_limit - 1
-            if len(existing_providers) > maximum_current_providers:
-                providers_to_remove = existing_providers[maximum_current_providers:]
-                store.terminalreporter.write_line(
-                    'Removing extra providers: {}'.format(', '.join(
-                        [p.key for p in providers_to_remove])))
-                for p in providers_to_remove:
-                    logger.info('removing provider %r', p.key)
-                    p.delete_rest()
-                # Decoupled wait for better performance
-                for p in providers_to_remove:
-                    logger.info('waiting for provider %r to disappear', p.key)
-                    p.wait_for_delete()
+            providers_to_remove = existing_providers[maximum_current_providers:]
+        if use_snapshots and not provider.exists:
+            # The restore replaces the whole DB, the extra providers need not be removed first
+            kept_keys = {p.key for p in existing_providers if p not in providers_to_remove}
+            if _restore_provider_snapshot(appliance, provider, kept_keys | {provider.key}):
+                return True
+        if providers_to_remove:
+            store.terminalreporter.write_line(
+                'Removing extra providers: {}'.format(', '.join(
+                    [p.key for p in providers_to_remove])))
+            for p in providers_to_remove:
+                logger.info('removing provider %r', p.key)
+                p.delete_rest()
+            # Decoupled wait for better performance
+            for p in providers_to_remove:
+                logger.info('waiting for provider %r to disappear', p.key)
+                p.wait_for_delete()
         store.terminalreporter.write_line(
             "Trying to set up provider {}\n".format(provider.key), green=True)
         enable_provider_regions(provider)
         provider.setup()
+        if use_snapshots:
+            _create_provider_snapshot(appliance)
         return True
     except Exception as e:
         logger.exception(e)
@@ -0,0 +1,26 @@
+"""Advanced settings statistics
+
+At the end of the session the number of advanced settings fetches avoided by
+:py:mod:`cfme.utils.appliance.settings_cache` and of the skipped unchanged writes is logged and
+printed in the terminal summary.
+"""
+from cfme.fixtures.pytest_store import store
+from cfme.utils.appliance import settings_cache
+from cfme.utils.log import logger
+
+
+def pytest_sessionfinish(session):
+    if not settings_cache.stats:
+        return
+    logger.info('Advanced settings statistics:\n%s', '\n'.join(settings_cache.stats_report()))
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not settings_cache.stats:
+        return
+    title = 'advanced settings statistics'
+    if store.parallelizer_role == 'master':
+        title += ' (master only, see the slave logs)'
+    terminalreporter.write_sep('-', title)
+    for line in settings_cache.stats_report():
+        terminalreporter.write_line(line)
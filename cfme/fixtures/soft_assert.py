@@ -20,6 +20,7 @@ list by the context manager. Because the store is a :py:func:`list <python:list>
 will be reported in the order that they failed.
 
 """
+import linecache
 from contextlib import contextmanager
 from threading import local
 from functools import partial
@@ -28,7 +29,6 @@ import fauxfactory
 import pytest
 
 from cfme.fixtures.artifactor_plugin import fire_art_test_hook
-from cfme.utils.log import nth_frame_info
 from cfme.utils.path import get_rel_path
 import sys
 import traceback
@@ -190,16 +190,18 @@ def _clear_caught_asserts():
 
 def _annotate_failure(fail_message=''):
     # frames
-    # 0: call to nth_frame_info
-    # 1: _annotate_failure (this function)
-    # 2: _annotate_failure caller (soft assert func or CM)
-    # 3: failed assertion
-    frameinfo = nth_frame_info(3)
+    # 0: _annotate_failure (this function)
+    # 1: _annotate_failure caller (soft assert func or CM)
+    # 2: failed assertion
+    # Only the frame of the failed assertion is looked at, and its source line read only if
+    # there is no message; inspecting the whole stack is expensive
+    frame = sys._getframe(2)
+    filename, lineno = frame.f_code.co_filename, frame.f_lineno
     if not fail_message:
-        fail_message = str(frameinfo.code_context[0]).strip()
+        fail_message = linecache.getline(filename, lineno, frame.f_globals).strip()
+    del frame
 
-    filename = get_rel_path(frameinfo.filename)
-    path = '{}:{!r}'.format(filename, frameinfo.lineno)
+    path = '{}:{!r}'.format(get_rel_path(filename), lineno)
     return '{} ({})'.format(fail_message, path)
 
 
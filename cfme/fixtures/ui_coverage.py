@@ -29,9 +29,9 @@ Note the .resultset.json format is documented in the ruby Coverage libraries doc
 
     http://ruby-doc.org/stdlib-2.1.0/libdoc/coverage/rdoc/Coverage.html
 
-All of the individual process' results are then manually merged (coverage_merger) into one
-big json result, and handed back to simplecov which generates the compiled html
-(for humans) report.
+All of the individual process' results are then merged locally
+(:py:mod:`cfme.utils.coverage_merge`) into one big json result, which can be handed back to
+simplecov (coverage_merger) to generate the compiled html (for humans) report.
 
 Workflow Overview
 -----------------
@@ -57,6 +57,7 @@ Post-testing (e.g. ci environment): *** This is changing ***
 2. Zip up and archive the entire coverage dir for review
 """
 import subprocess
+import tarfile
 
 import pytest
 from py.error import ENOENT
@@ -66,6 +67,7 @@ from cfme.fixtures.pytest_store import store
 from cfme.exceptions import ApplianceVersionException
 from cfme.utils import conf
 from cfme.utils.conf import cfme_data
+from cfme.utils.coverage_merge import find_resultsets, merge_resultsets
 from cfme.utils.log import create_sublogger
 from cfme.utils.path import conf_path, log_path, scripts_data_path
 from cfme.utils.quote import quote
@@ -163,13 +165,11 @@ class CoverageManager(object):
         try:
             self._retrieve_coverage_reports()
             # If the appliance runs out of memory, these can take *days* to complete,
-            # so for now we'll just collect the raw coverage data and figure the merging
-            # out later
-            # Edit, 10-Feb-2016:
-            # Currently, the reports are merged using the {stream}-reports job
-            # which utilizes the 'jjb/scripts/stream_reporter.sh' script instead
+            # so the per process reports are merged locally instead; rendering the
+            # HTML is left to the {stream}-reports job.
             # self._merge_coverage_reports()
             # self._retrieve_merged_reports()
+            self._merge_coverage_reports_locally()
         except Exception as exc:
             self.log.error('Error merging coverage reports')
             self.log.exception(exc)
@@ -275,6 +275,21 @@ gpgcheck={gpgcheck}
             'tar czf /tmp/ui-coverage-raw.tgz coverage/')
         ssh_client.get_file('/tmp/ui-coverage-raw.tgz', coverage_results_archive.strpath)
 
+    def _merge_coverage_reports_locally(self):
+        # Extract the per process result sets and merge them into merged/.resultset.json
+        raw_dir = coverage_output_dir.join('raw')
+        raw_dir.remove(ignore_errors=True)
+        with tarfile.open(coverage_results_archive.strpath) as tar:
+            tar.extractall(raw_dir.strpath, members=[
+                member for member in tar
+                if member.isfile() and member.name.endswith('/.resultset.json') and
+                '..' not in member.name.split('/')])
+        merged = coverage_output_dir.join('merged', '.resultset.json')
+        merged.dirpath().ensure(dir=True)
+        merge_resultsets(find_resultsets(raw_dir.strpath), merged.strpath)
+        raw_dir.remove(ignore_errors=True)
+        self.print_message('merged reports to {}'.format(merged.strpath))
+
     def _upload_coverage_merger(self):
         ssh_client = self.collection_appliance.ssh_client
         ssh_client.put_file(coverage_merger.strpath, rails_root.strpath)
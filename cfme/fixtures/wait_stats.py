@@ -0,0 +1,35 @@
+"""Waiting statistics
+
+At the end of the session the latencies learned per :py:func:`cfme.utils.wait.wait_for` call site
+are stored for the following runs and the report of the time spent waiting is logged.
+``--wait-stats`` also prints it in the terminal summary.
+"""
+from cfme.fixtures.pytest_store import store
+from cfme.utils import wait
+from cfme.utils.log import logger
+
+
+def pytest_addoption(parser):
+    parser.addoption('--wait-stats', action='store_true', default=False,
+        help='Print the per call site statistics of the waiting in the terminal summary')
+
+
+def pytest_sessionfinish(session):
+    if not wait.all_stats():
+        return
+    try:
+        wait.save_learned_latencies()
+    except Exception as e:
+        logger.warning('Could not store the learned wait latencies: %s', str(e))
+    logger.info('Waiting statistics:\n%s', '\n'.join(wait.stats_report()))
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not terminalreporter.config.getoption('wait_stats') or not wait.all_stats():
+        return
+    title = 'waiting statistics'
+    if store.parallelizer_role == 'master':
+        title += ' (master only, see the slave logs)'
+    terminalreporter.write_sep('-', title)
+    for line in wait.stats_report():
+        terminalreporter.write_line(line)
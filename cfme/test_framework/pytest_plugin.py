@@ -60,6 +60,7 @@ pytest_plugins = (
     'cfme.fixtures.blockers',
     'cfme.fixtures.browser',
     'cfme.fixtures.cfme_data',
+    'cfme.fixtures.collection_cache',
     'cfme.fixtures.disable_forgery_protection',
     'cfme.fixtures.datafile',
     'cfme.fixtures.fixtureconf',
@@ -97,6 +98,8 @@ pytest_plugins = (
     'cfme.fixtures.smtp',
     'cfme.fixtures.tag',
     'cfme.fixtures.vm',
+    'cfme.fixtures.wait_stats',
+    'cfme.fixtures.settings_stats',
     'cfme.fixtures.vm_console',
     'cfme.fixtures.vporizer',
     'cfme.fixtures.model_collections',
@@ -10,7 +10,7 @@ from cfme.utils.appliance import current_appliance, IPAppliance
 from cfme.utils.conf import credentials, env
 # TODO: use custom wait_for logger fitting sprout
 from cfme.utils.log import logger
-from cfme.utils.wait import wait_for
+from cfme.utils.wait import Backoff, wait_for
 
 
 class SproutException(Exception):
@@ -37,13 +37,15 @@ class SproutClient(object):
     _port = attr.ib(default=8000)
     _entry = attr.ib(default="appliances/api")
     _auth = attr.ib(default=None)
+    # Keep-alive connections are reused across the calls
+    _session = attr.ib(default=attr.Factory(requests.Session), init=False, repr=False, cmp=False)
 
     @property
     def api_entry(self):
         return "{}://{}:{}/{}".format(self._proto, self._host, self._port, self._entry)
 
     def _post(self, **data):
-        return requests.post(self.api_entry, data=json.dumps(data))
+        return self._session.post(self.api_entry, data=json.dumps(data))
 
     def _call_post(self, **data):
         """Protect from the Sprout being updated (error 502,503)"""
@@ -55,16 +57,8 @@ class SproutClient(object):
         )
         return result.out.json()
 
-    def call_method(self, name, *args, **kwargs):
-        req_data = {
-            "method": name,
-            "args": args,
-            "kwargs": kwargs,
-        }
-        logger.info("SPROUT: Called {} with {} {}".format(name, args, kwargs))
-        if self._auth is not None:
-            req_data["auth"] = self._auth
-        result = self._call_post(**req_data)
+    @staticmethod
+    def _process_result(result):
         try:
             if result["status"] == "exception":
                 raise SproutException(
@@ -78,6 +72,46 @@ class SproutClient(object):
         except KeyError:
             raise Exception("Malformed response from Sprout!")
 
+    def call_method(self, name, *args, **kwargs):
+        req_data = {
+            "method": name,
+            "args": args,
+            "kwargs": kwargs,
+        }
+        logger.info("SPROUT: Called {} with {} {}".format(name, args, kwargs))
+        if self._auth is not None:
+            req_data["auth"] = self._auth
+        return self._process_result(self._call_post(**req_data))
+
+    def batch(self, calls):
+        """Call multiple methods in a single request.
+
+        Args:
+            calls: Iterable of ``(method_name, args, kwargs)`` tuples.
+
+        Returns:
+            List of the results in the order of the calls. Raises the exception of the first
+            failed call.
+        """
+        calls = [
+            {"method": name, "args": list(args), "kwargs": dict(kwargs)}
+            for name, args, kwargs in calls]
+        if not calls:
+            return []
+        logger.info(
+            "SPROUT: Called batch of %s", ", ".join(call["method"] for call in calls))
+        req_data = {"batch": calls}
+        if self._auth is not None:
+            req_data["auth"] = self._auth
+        result = self._call_post(**req_data)
+        if result.get("status") == "exception" and result["result"]["class"] == "KeyError":
+            # Sprout does not support batches yet, it is looking for the method
+            logger.info("SPROUT: Batches not supported, calling the methods one by one")
+            return [
+                self.call_method(call["method"], *call["args"], **call["kwargs"])
+                for call in calls]
+        return [self._process_result(call_result) for call_result in self._process_result(result)]
+
     def __getattr__(self, attr):
         return APIMethodCall(self, attr)
 
@@ -128,6 +162,7 @@ class SproutClient(object):
         wait_for(
             lambda: self.call_method('request_check', str(request_id))['finished'],
             num_sec=wait_time,
+            delay=Backoff(2, 30),
             message='provision {} appliance(s) from sprout'.format(count))
         data = self.call_method('request_check', str(request_id))
         logger.debug(data)
@@ -12,7 +12,7 @@ from cfme.utils import at_exit, conf
 from cfme.utils.log import logger as log
 from cfme.utils.path import project_path
 from .client import SproutClient, SproutException, AuthException
-from cfme.utils.wait import wait_for
+from cfme.utils.wait import Backoff, wait_for
 
 
 _appliance_help = '''specify appliance URLs to use for distributed testing.
@@ -181,7 +181,7 @@ class SproutManager(object):
             result = wait_for(
                 self.check_fullfilled,
                 num_sec=provision_request.provision_timeout * 60,
-                delay=5,
+                delay=Backoff(5, 30),
                 message="requesting appliances was fulfilled"
             )
         except Exception:
@@ -255,17 +255,21 @@ class SproutManager(object):
             log.info(
                 "Check if pool already exists for this %r Jenkins job", jenkins_job[0])
             jenkins_job_pools = self.client.find_pools_by_description(jenkins_job[0], partial=True)
-            for pool in jenkins_job_pools:
+            descriptions = self.client.batch(
+                ('get_pool_description', (pool,), {}) for pool in jenkins_job_pools)
+            pools_to_destroy = []
+            for pool, description in zip(jenkins_job_pools, descriptions):
                 # Some jobs have overlapping descriptions, sprout API doesn't support regex
                 # job-name-12345 vs job-name-master-12345
                 # the partial match alone will catch both of these, use regex to confirm pool
                 # description is an accurate match
-                if self.client.get_pool_description(pool) == '{}{}'.format(jenkins_job[0], pool):
+                if description == '{}{}'.format(jenkins_job[0], pool):
                     log.info("Destroying the old pool %s for %r job.", pool, jenkins_job[0])
-                    self.client.destroy_pool(pool)
+                    pools_to_destroy.append(pool)
                 else:
                     log.info('Skipped pool destroy due to potential pool description overlap: %r',
                              jenkins_job[0])
+            self.client.batch(('destroy_pool', (pool,), {}) for pool in pools_to_destroy)
         except Exception:
             log.exception(
                 "Exception occurred during old pool deletion, this can be ignored"
@@ -325,11 +329,12 @@ class ShutdownPlugin(object):
             log.debug("Trying to end appliance {}".format(ip_address))
             if config.getoption('--use-sprout'):
                 try:
-                    call_method = config._sprout_mgr.client.call_method
-                    log.debug("appliance data %r", call_method('appliance_data', ip_address))
-                    log.debug(
-                        "destroy appliance result: %r",
-                        call_method('destroy_appliance', ip_address))
+                    appliance_data, destroy_result = config._sprout_mgr.client.batch([
+                        ('appliance_data', (ip_address,), {}),
+                        ('destroy_appliance', (ip_address,), {}),
+                    ])
+                    log.debug("appliance data %r", appliance_data)
+                    log.debug("destroy appliance result: %r", destroy_result)
                 except Exception as e:
                     log.debug('Error trying to end sprout appliance %s', ip_address)
                     log.debug(e)
@@ -21,6 +21,7 @@ from cached_property import cached_property
 from debtcollector import removals
 from manageiq_client.api import APIException, ManageIQClient as VanillaMiqApi
 from six.moves.urllib.parse import urlparse
+from sqlalchemy import and_
 from werkzeug.local import LocalStack, LocalProxy
 from wrapanapi import VmState
 from wrapanapi.exceptions import VMInstanceNotFound
@@ -36,12 +37,16 @@ from cfme.utils.net import net_check
 from cfme.utils.path import data_path, patches_path, scripts_path, conf_path
 from cfme.utils.ssh import SSHTail
 from cfme.utils.version import Version, get_stream, VersionPicker
-from cfme.utils.wait import wait_for, TimedOutError
+from cfme.utils.wait import Backoff, wait_for, TimedOutError
 from .db import ApplianceDB
 from .implementations.rest import ViaREST
 from .implementations.ssui import ViaSSUI
 from .implementations.ui import ViaUI
+from .inventory import ApplianceInventory
 from .services import SystemdService
+from .roles import RoleWatcher
+from .settings_cache import SettingsCache, settings_diff, stats as settings_stats
+from .steps import Step, StepGraph
 
 RUNNING_UNDER_SPROUT = os.environ.get("RUNNING_UNDER_SPROUT", "false") != "false"
 # EMS types recognized by IP or credentials
@@ -491,7 +496,9 @@ ExecStartPre=/usr/bin/bash -c "ipcs -s|grep apache|cut -d\  -f2|while read line;
     def configure(self, log_callback=None, **kwargs):
         """Configures appliance - database setup, rename, ntp sync
 
-        Utility method to make things easier.
+        Utility method to make things easier. The steps not depending on each other run
+        concurrently, evmserverd is restarted once at the end if any step needs it, see
+        :py:mod:`cfme.utils.appliance.steps`.
 
         Note:
             db_address, name_to_set are not used currently.
@@ -520,52 +527,70 @@ ExecStartPre=/usr/bin/bash -c "ipcs -s|grep apache|cut -d\  -f2|while read line;
         with self as ipapp:
             ipapp.wait_for_ssh()
 
-            # Debugging - ifcfg-eth0 overwritten by unknown process
-            # Rules are permanent and will be reloade after machine reboot
-            self.ssh_client.run_command(
-                "cp -pr /etc/sysconfig/network-scripts/ifcfg-eth0 /var/tmp", ensure_host=True)
-            self.ssh_client.run_command(
-                "echo '-w /etc/sysconfig/network-scripts/ifcfg-eth0 -p wa' >> "
-                "/etc/audit/rules.d/audit.rules", ensure_host=True)
-            self.ssh_client.run_command("systemctl daemon-reload", ensure_host=True)
-            self.ssh_client.run_command("service auditd restart", ensure_host=True)
-
-            ipapp.wait_for_ssh()
-
-            self.fix_httpd_issue(log_callback=log_callback)
-
-            self.deploy_merkyl(start=True, log_callback=log_callback)
-            if fix_ntp_clock and not self.is_pod:
-                self.fix_ntp_clock(log_callback=log_callback)
+            def watch_ifcfg():
+                # Debugging - ifcfg-eth0 overwritten by unknown process
+                # Rules are permanent and will be reloade after machine reboot
+                self.ssh_client.run_command(
+                    "cp -pr /etc/sysconfig/network-scripts/ifcfg-eth0 /var/tmp", ensure_host=True)
+                self.ssh_client.run_command(
+                    "echo '-w /etc/sysconfig/network-scripts/ifcfg-eth0 -p wa' >> "
+                    "/etc/audit/rules.d/audit.rules", ensure_host=True)
+                self.ssh_client.run_command("systemctl daemon-reload", ensure_host=True)
+                self.ssh_client.run_command("service auditd restart", ensure_host=True)
+                ipapp.wait_for_ssh()
+
+            def setup_db():
+                self.db.setup(region=region, key_address=key_address,
+                              db_address=db_address, is_pod=self.is_pod)
+
+            # The steps run as soon as the steps they require are done. The ones needing
+            # evmserverd restarted only flag it, it is restarted once after all of them.
+            graph = StepGraph([
+                Step('watch_ifcfg', watch_ifcfg),
+                Step('fix_httpd_issue', lambda: self.fix_httpd_issue(log_callback=log_callback)),
+                Step('deploy_merkyl',
+                     lambda: self.deploy_merkyl(start=True, log_callback=log_callback)),
+                Step('fix_ntp_clock', lambda: self.fix_ntp_clock(log_callback=log_callback),
+                     enabled=fix_ntp_clock and not self.is_pod),
                 # TODO: Handle external DB setup
-            # This is workaround for appliances to use only one disk for the VMDB
-            # If they have been provisioned with a second disk in the infra,
-            # 'self.unpartitioned_disks' should exist and therefore this won't run.
-            if self.is_downstream and not self.unpartitioned_disks:
-                self.db.create_db_lvm()
-            if on_openstack:
-                self.set_resolvable_hostname(log_callback=log_callback)
-
-            self.db.setup(region=region, key_address=key_address,
-                          db_address=db_address, is_pod=self.is_pod)
-
-            if on_gce:
+                # This is workaround for appliances to use only one disk for the VMDB
+                # If they have been provisioned with a second disk in the infra,
+                # 'self.unpartitioned_disks' should exist and therefore this won't run.
+                Step('create_db_lvm', self.db.create_db_lvm,
+                     enabled=self.is_downstream and not self.unpartitioned_disks),
+                Step('set_resolvable_hostname',
+                     lambda: self.set_resolvable_hostname(log_callback=log_callback),
+                     enabled=on_openstack),
+                Step('configure_vm_console_cert',
+                     lambda: self.configure_vm_console_cert(log_callback=log_callback),
+                     requires=['set_resolvable_hostname'], restart_evm=True,
+                     enabled=self.version >= '5.8'),
+                Step('setup_db', setup_db,
+                     requires=['fix_ntp_clock', 'create_db_lvm', 'set_resolvable_hostname']),
                 # evm serverd does not auto start on GCE instance..
-                self.start_evm_service(log_callback=log_callback)
-            self.wait_for_evm_service(timeout=1200, log_callback=log_callback)
-
-            # Some conditionally ran items require the evm service be
-            # restarted:
-            restart_evm = False
-            if loosen_pgssl:
-                self.db.loosen_pgssl()
-                restart_evm = True
-            if self.version >= '5.8':
-                self.configure_vm_console_cert(log_callback=log_callback)
-                restart_evm = True
-            if restart_evm:
+                Step('start_evm_service',
+                     lambda: self.start_evm_service(log_callback=log_callback),
+                     requires=['setup_db'], enabled=on_gce),
+                Step('wait_for_evm_service',
+                     lambda: self.wait_for_evm_service(timeout=1200, log_callback=log_callback),
+                     requires=['setup_db', 'start_evm_service']),
+                Step('loosen_pgssl', self.db.loosen_pgssl,
+                     requires=['wait_for_evm_service'], restart_evm=True, enabled=loosen_pgssl),
+            ], wrapper=lambda: self)
+            # The steps share the connection, it has to be there before they start
+            self.ssh_client.connect()
+            started = time()
+            graph.run()
+            if graph.restart_requested:
+                restart_start = time()
                 self.restart_evm_service(log_callback=log_callback)
+                graph.timings['restart_evm_service'] = (
+                    restart_start - started, time() - started)
+            ui_start = time()
             self.wait_for_web_ui(timeout=1800, log_callback=log_callback)
+            graph.timings['wait_for_web_ui'] = (ui_start - started, time() - started)
+            log_callback('Configured in {:.1f}s:\n{}'.format(
+                time() - started, '\n'.join(graph.format_timings())))
 
     def configure_gce(self, log_callback=None):
         # Force use of IPAppliance's configure method
@@ -632,7 +657,8 @@ ExecStartPre=/usr/bin/bash -c "ipcs -s|grep apache|cut -d\  -f2|while read line;
             not recognized, but are present.
         """
         known_ems_list = []
-        for ems in self.rest_api.collections.providers:
+        # Always fresh, but refreshes the inventory for the existence checks
+        for ems in self.inventory.resources('providers', max_age=0):
             if not any(
                     p_type in ems['type'] for p_type in RECOGNIZED_BY_IP + RECOGNIZED_BY_CREDS):
                 continue
@@ -721,6 +747,12 @@ ExecStartPre=/usr/bin/bash -c "ipcs -s|grep apache|cut -d\  -f2|while read line;
     def rest_api(self):
         return self.new_rest_api_instance()
 
+    @cached_property
+    def inventory(self):
+        """Short-lived cache of the collections for the existence checks, see
+        :py:class:`cfme.utils.appliance.inventory.ApplianceInventory`"""
+        return ApplianceInventory(self)
+
     @cached_property
     def miqqe_version(self):
         """Returns version of applied JS patch or None if not present"""
@@ -1938,22 +1970,21 @@ ExecStartPre=/usr/bin/bash -c "ipcs -s|grep apache|cut -d\  -f2|while read line;
         """Return a dictionary of server roles from database"""
         asr = self.db.client['assigned_server_roles']
         sr = self.db.client['server_roles']
-        all_role_names = {row[0] for row in self.db.client.session.query(sr.name)}
-        # Query all active server roles assigned to this server
+        # All the roles with their active assignments to this server, in one query
         query = self.db.client.session\
-            .query(sr.name)\
-            .join(asr, asr.server_role_id == sr.id)\
-            .filter(asr.miq_server_id == self.evm_id)\
-            .filter(asr.active == True)  # noqa
-        active_roles = {row[0] for row in query}
-        roles = {role_name: role_name in active_roles for role_name in all_role_names}
+            .query(sr.name, asr.id)\
+            .outerjoin(asr, and_(
+                asr.server_role_id == sr.id,
+                asr.miq_server_id == self.evm_id,
+                asr.active == True))  # noqa
+        roles = {}
+        for role_name, assignment_id in query:
+            roles[role_name] = roles.get(role_name, False) or assignment_id is not None
         dead_keys = ['database_owner', 'vdi_inventory']
-        for key in roles:
-            if not self.is_storage_enabled:
-                if key.startswith('storage'):
-                    dead_keys.append(key)
-                if key == 'vmdb_storage_bridge':
-                    dead_keys.append(key)
+        storage_keys = [
+            key for key in roles if key.startswith('storage') or key == 'vmdb_storage_bridge']
+        if storage_keys and not self.is_storage_enabled:
+            dead_keys.extend(storage_keys)
         for key in dead_keys:
             try:
                 del roles[key]
@@ -1963,19 +1994,29 @@ ExecStartPre=/usr/bin/bash -c "ipcs -s|grep apache|cut -d\  -f2|while read line;
 
     @server_roles.setter
     def server_roles(self, roles):
-        """Sets the server roles. Requires a dictionary full of the role keys with bool values."""
-        if self.server_roles == roles:
+        """Sets the server roles. Requires a dictionary full of the role keys with bool values.
+
+        Waits for the server to activate them, see
+        :py:class:`cfme.utils.appliance.roles.RoleWatcher`.
+        """
+        current_roles = self.server_roles
+        if current_roles == roles:
             self.log.debug(' Roles already match, returning...')
             return
-        ansible_old = self.server_roles.get('embedded_ansible', False)
+        ansible_old = current_roles.get('embedded_ansible', False)
         ansible_new = roles.get('embedded_ansible', False)
         enabling_ansible = ansible_old is False and ansible_new is True
 
-        server_data = self.advanced_settings.get('server', {})
+        if self.version < '5.9':
+            # The whole server section is written there
+            server_data = self.advanced_settings.get('server', {})
+        else:
+            server_data = {}
         server_data['role'] = ','.join([role for role, boolean in roles.items() if boolean])
-        self.update_advanced_settings({'server': server_data})
         timeout = 600 if enabling_ansible else 300
-        wait_for(lambda: self.server_roles == roles, num_sec=timeout, delay=15)
+        with RoleWatcher(self) as watcher:
+            self.update_advanced_settings({'server': server_data})
+            watcher.wait(lambda current: current == roles, timeout)
         if enabling_ansible:
             self.wait_for_embedded_ansible()
 
@@ -1989,7 +2030,8 @@ ExecStartPre=/usr/bin/bash -c "ipcs -s|grep apache|cut -d\  -f2|while read line;
         try:
             self.server_roles = roles
         except TimedOutError:
-            wait_for(lambda: self.server_roles == roles, num_sec=600, delay=15)
+            with RoleWatcher(self) as watcher:
+                watcher.wait(lambda current: current == roles, 600)
         self.wait_for_embedded_ansible()
 
     def disable_embedded_ansible_role(self):
@@ -2008,16 +2050,18 @@ ExecStartPre=/usr/bin/bash -c "ipcs -s|grep apache|cut -d\  -f2|while read line;
     def wait_for_server_roles(self, server_roles, **kwargs):
         """Waits for the server roles to be set
 
-        Warning: This may take awhile if it is a long list.
-
          Args:
             server_roles: list of server roles to be checked
+            num_sec: Seconds to wait, 120 by default, ``timeout`` works too
          Returns:
             :py:class:`bool`
          """
-
+        timeout = kwargs.get('num_sec', kwargs.get('timeout', 120))
         try:
-            wait_for(lambda: all([self.server_roles[role] for role in server_roles]), **kwargs)
+            with RoleWatcher(self) as watcher:
+                watcher.wait(
+                    lambda current: all(current[role] for role in server_roles), timeout,
+                    message='server roles {}'.format(', '.join(server_roles)))
         except TimedOutError:
             return False
         else:
@@ -2053,9 +2097,20 @@ ExecStartPre=/usr/bin/bash -c "ipcs -s|grep apache|cut -d\  -f2|while read line;
     def is_storage_enabled(self):
         return 'storage' in self.advanced_settings.get('product', {})
 
+    @cached_property
+    def _settings_cache(self):
+        return SettingsCache(self)
+
     @property
     def advanced_settings(self):
-        """Get settings from the base api/settings endpoint for appliance"""
+        """Get settings from the base api/settings endpoint for appliance
+
+        The settings are cached until they change on the appliance, see
+        :py:mod:`cfme.utils.appliance.settings_cache`.
+        """
+        return self._settings_cache.get(self._fetch_advanced_settings)
+
+    def _fetch_advanced_settings(self):
         if self.version > '5.9':
             return self.rest_api.get(self.rest_api.collections.settings._href)
         else:
@@ -2083,7 +2138,8 @@ ExecStartPre=/usr/bin/bash -c "ipcs -s|grep apache|cut -d\  -f2|while read line;
 
         Uses REST API for CFME 5.9+, uses rails console on lower versions
 
-        Will automatically update existing settings dictionary with settings_dict
+        Will automatically update existing settings dictionary with settings_dict. Nothing is
+        written when the settings already match, on 5.9+ only the differing settings are sent.
 
         Args:
             data_dict: dictionary of the changes to be made to the yaml configuration
@@ -2091,9 +2147,14 @@ ExecStartPre=/usr/bin/bash -c "ipcs -s|grep apache|cut -d\  -f2|while read line;
         Raises:
             ApplianceException when server_id isn't set
         """
-        # Can only modify through server ID, raise if that's not set yet
+        data_dict_base = self.advanced_settings
+        diff = settings_diff(data_dict_base, settings_dict)
+        if not diff:
+            settings_stats['unchanged'] += 1
+            logger.debug('Advanced settings already match, not writing them')
+            return
+        settings_stats['written'] += 1
         if self.version < '5.9':
-            data_dict_base = self.advanced_settings
             data_dict_base.update(settings_dict)
 
             temp_yaml = NamedTemporaryFile()
@@ -2112,12 +2173,18 @@ ExecStartPre=/usr/bin/bash -c "ipcs -s|grep apache|cut -d\  -f2|while read line;
 
             # Run it
             result = self.ssh_client.run_rails_command(dest_ruby)
+            self._settings_cache.invalidate()
             if not result:
                 raise Exception('Unable to set config: {!r}:{!r}'.format(result.rc, result.output))
         else:
+            # Can only modify through server ID, raise if that's not set yet
             if self.server_id() is None:
                 raise ApplianceException('No server id is set, cannot modify yaml config via REST')
-            self.server.update_advanced_settings(settings_dict)
+            try:
+                # the REST API merges the changes into the settings, only the differences are sent
+                self.server.update_advanced_settings(diff)
+            finally:
+                self._settings_cache.invalidate()
 
     def set_proxy(self, host, port, user=None, password=None, prov_type=None):
         vmdb_config = self.advanced_settings
@@ -2242,22 +2309,22 @@ ExecStartPre=/usr/bin/bash -c "ipcs -s|grep apache|cut -d\  -f2|while read line;
             evm_tail = SSHTail('/var/www/miq/vmdb/log/evm.log')
             evm_tail.set_initial_file_end()
 
-        attempts = 0
-        detected = False
-        max_attempts = 60
-        while (not detected and attempts < max_attempts):
-            logger.debug('Attempting to detect MIQ Server workers started: {}'.format(attempts))
+        def _workers_started():
+            logger.debug('Attempting to detect MIQ Server workers started')
             for line in evm_tail:
-                if 'MiqServer#wait_for_started_workers' in line:
-                    if ('All workers have been started' in line):
-                        logger.info('Detected MIQ Server is ready.')
-                        detected = True
-                        break
-            sleep(poll_interval)  # Allow more log lines to accumulate
-            attempts += 1
-        if not (attempts < max_attempts):
+                if ('MiqServer#wait_for_started_workers' in line and
+                        'All workers have been started' in line):
+                    logger.info('Detected MIQ Server is ready.')
+                    return True
+            return False
+
+        # The log lines accumulate between the checks
+        result = wait_for(_workers_started, num_sec=poll_interval * 60,
+                          delay=Backoff(1, poll_interval, jitter=False),
+                          message='MIQ Server workers started', silent_failure=True)
+        if result is None:
             logger.error('Could not detect MIQ Server workers started in {}s.'.format(
-                poll_interval * max_attempts))
+                poll_interval * 60))
         evm_tail.close()
 
     @logger_wrap("Setting dev branch: {}")
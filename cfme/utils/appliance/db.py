@@ -24,6 +24,10 @@ class ApplianceDB(AppliancePlugin):
     # Until this needs a version pick, make it an attr
     postgres_version = 'rh-postgresql95'
     service_name = '{}-postgresql'.format(postgres_version)
+    # Where the snapshots from create_snapshot are kept on the appliance
+    snapshot_dir = '/var/tmp/vmdb_snapshots'
+    # Parallel jobs of pg_restore when restoring a snapshot
+    snapshot_restore_jobs = 4
 
     @cached_property
     def client(self):
@@ -81,7 +85,8 @@ class ApplianceDB(AppliancePlugin):
 
             Note: EVM service has to be stopped for this to work.
         """
-
+        # The Rails session holds a connection to the database
+        self.appliance.ssh_client.close_rails_session()
         self.appliance.db.restart_db_service()
         self.appliance.ssh_client.run_command('dropdb vmdb_production', timeout=15)
 
@@ -180,6 +185,7 @@ class ApplianceDB(AppliancePlugin):
         """
         from . import ApplianceException
         self.logger.info('Restoring database')
+        self.appliance.ssh_client.close_rails_session()
         result = self.appliance.ssh_client.run_rake_command(
             'evm:db:restore:local --trace -- --local-file "{}"'.format(database_path))
         if result.failed:
@@ -194,6 +200,58 @@ class ApplianceDB(AppliancePlugin):
                 self.logger.error("Failed to change invalid db password: {}"
                                   .format(result.output))
 
+    def snapshot_path(self, name):
+        """Path of the snapshot file on the appliance, see :py:meth:`create_snapshot`"""
+        return '{}/{}.backup'.format(self.snapshot_dir, name)
+
+    def has_snapshot(self, name):
+        """Whether a snapshot of given name was taken on the appliance"""
+        return self.appliance.ssh_client.run_command(
+            'test -s {}'.format(self.snapshot_path(name))).success
+
+    def create_snapshot(self, name):
+        """Stores the current VMDB as a named snapshot on the appliance
+
+        The dump is consistent even when taken with the EVM service running.
+        """
+        from . import ApplianceException
+        path = self.snapshot_path(name)
+        result = self.appliance.ssh_client.run_command('mkdir -p {}'.format(self.snapshot_dir))
+        if result.failed:
+            raise ApplianceException('Failed to create {}'.format(self.snapshot_dir))
+        # Dump next to the final file first, so that an interrupted dump is never restored
+        self.backup('{}.tmp'.format(path))
+        self.appliance.ssh_client.run_command('mv -f {0}.tmp {0}'.format(path))
+        self.logger.info('Stored database snapshot %s', name)
+
+    def restore_snapshot(self, name):
+        """Replaces the VMDB with a snapshot taken by :py:meth:`create_snapshot`
+
+        The whole database goes back to the state it had when the snapshot was taken. The dump is
+        restored by parallel ``pg_restore`` jobs, without booting rails for the rake task of
+        :py:meth:`restore`; the snapshot comes from this appliance, so the database password
+        needs no fixing. Most of the time goes to restarting the EVM service, which is stopped
+        for the restore and whose web UI is waited for after starting it again.
+        """
+        from . import ApplianceException
+        self.logger.info('Restoring database snapshot %s', name)
+        self.appliance.evmserverd.stop()
+        self.drop()
+        self.create()
+        result = self.appliance.ssh_client.run_command(
+            'pg_restore --jobs {} --dbname vmdb_production {}'.format(
+                self.snapshot_restore_jobs, self.snapshot_path(name)),
+            timeout=600)
+        if result.failed:
+            msg = 'Failed to restore database snapshot {}: {}'.format(name, result.output)
+            self.logger.error(msg)
+            raise ApplianceException(msg)
+        clear_property_cache(self, 'client')
+        self.appliance.inventory.invalidate()
+        self.appliance._settings_cache.invalidate()
+        self.appliance.evmserverd.start()
+        self.appliance.wait_for_web_ui()
+
     def setup(self, **kwargs):
         """Configure database
 
@@ -11,7 +11,7 @@ from widgetastic.browser import Browser, DefaultPlugin
 from cfme import exceptions
 from cfme.utils.browser import manager
 from cfme.utils.log import logger, create_sublogger
-from cfme.utils.wait import wait_for
+from cfme.utils.wait import Backoff, wait_for
 from cfme.fixtures.pytest_store import store
 from . import Implementation
 
@@ -78,7 +78,8 @@ class MiqSSUIBrowserPlugin(DefaultPlugin):
             # TODO: Logging
             return bool(result)
 
-        wait_for(_check, timeout=timeout, delay=2, silent_failure=True, very_quiet=True)
+        wait_for(_check, timeout=timeout, delay=Backoff(0.2, 2), silent_failure=True,
+                 very_quiet=True)
 
     def after_keyboard_input(self, element, keyboard_input):
         self.browser.plugin.ensure_page_safe()
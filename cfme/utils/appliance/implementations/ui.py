@@ -23,7 +23,7 @@ from cfme.fixtures.pytest_store import store
 from cfme.utils.browser import manager
 from cfme.utils.log import logger, create_sublogger
 from cfme.utils.version import Version
-from cfme.utils.wait import wait_for
+from cfme.utils.wait import Backoff, wait_for
 from . import Implementation
 
 VersionPick.VERSION_CLASS = Version
@@ -174,7 +174,8 @@ class MiqBrowserPlugin(DefaultPlugin):
             result = self.browser.execute_script(self.ENSURE_PAGE_SAFE, silent=True)
             # TODO: Logging
             return bool(result)
-        wait_for(_check, timeout=timeout, delay=0.2, silent_failure=True, very_quiet=True)
+        wait_for(_check, timeout=timeout, delay=Backoff(0.1, 1), silent_failure=True,
+                 very_quiet=True)
 
     def after_keyboard_input(self, element, keyboard_input):
         observed_field_attr = None
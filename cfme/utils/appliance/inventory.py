@@ -0,0 +1,118 @@
+"""Short-lived cache of the appliance inventory for the existence checks
+
+Every collection is fetched with one bulk REST query (see
+:py:func:`cfme.utils.rest.query_resources`) and kept for :py:data:`INVENTORY_TTL` seconds, so
+repeated ``exists`` checks do not navigate the UI or load the whole collection every time. The
+create and delete methods of the framework and the :py:class:`cfme.utils.events.RestEventListener`
+invalidate the affected collections.
+"""
+import threading
+import time
+
+from cfme.utils.log import logger
+
+#: Seconds the inventory of a collection is kept
+INVENTORY_TTL = 10
+
+#: Attributes fetched for the resources of a collection, ``name`` for the rest
+INVENTORY_ATTRIBUTES = {
+    'providers': ['name', 'type'],
+    'vms': ['name', 'ems_id'],
+    'templates': ['name', 'ems_id'],
+    'instances': ['name', 'ems_id'],
+}
+
+#: Collections affected by the events of a target type
+TARGET_COLLECTIONS = {
+    'VmOrTemplate': ('vms', 'templates', 'instances'),
+    'Vm': ('vms', 'instances'),
+    'MiqTemplate': ('templates',),
+    'Host': ('hosts',),
+    'ExtManagementSystem': ('providers',),
+    'EmsCluster': ('clusters',),
+    'Service': ('services',),
+}
+
+
+class ApplianceInventory(object):
+    """Inventory of the appliance collections, one bulk REST query per collection and TTL
+
+    Args:
+        appliance: The appliance
+        ttl: Seconds a collection is kept
+    """
+    def __init__(self, appliance, ttl=None):
+        self.appliance = appliance
+        self.ttl = INVENTORY_TTL if ttl is None else ttl
+        self._collections = {}
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, data fetched before it are not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def resources(self, collection_name, max_age=None):
+        """Returns the resources of the collection, as dictionaries with the inventory attributes
+
+        Args:
+            collection_name: Name of the REST API collection, e.g. ``providers``
+            max_age: Oldest data accepted in seconds, the inventory TTL by default
+        """
+        from cfme.utils.rest import query_resources
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            cached = self._collections.get(collection_name)
+            if cached is not None and time.time() - cached[0] <= max_age:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+            generation = self._generation
+        fetched = time.time()
+        collection = getattr(self.appliance.rest_api.collections, collection_name)
+        resources = query_resources(
+            collection, attributes=INVENTORY_ATTRIBUTES.get(collection_name, ['name']))
+        with self._lock:
+            if generation == self._generation:
+                self._collections[collection_name] = (fetched, resources)
+        return resources
+
+    def names(self, collection_name, max_age=None):
+        """Returns the set of the resource names in the collection"""
+        return {resource['name'] for resource in self.resources(collection_name, max_age)}
+
+    def exists(self, collection_name, name, **attributes):
+        """Checks whether a resource of the name and the attribute values is in the collection"""
+        return any(
+            resource['name'] == name and all(
+                str(resource.get(key)) == str(value) for key, value in attributes.items())
+            for resource in self.resources(collection_name))
+
+    def provider_id(self, name):
+        """Returns the id of the provider of the name, ``None`` if there is no such provider"""
+        for resource in self.resources('providers'):
+            if resource['name'] == name:
+                return resource['id']
+        return None
+
+    def invalidate(self, *collection_names):
+        """Drops the collections from the inventory, all of them if no name is given"""
+        with self._lock:
+            self._generation += 1
+            if not collection_names:
+                self._collections.clear()
+            for collection_name in collection_names:
+                self._collections.pop(collection_name, None)
+
+    def invalidate_target_types(self, target_types):
+        """Drops the collections affected by the events of the target types"""
+        collection_names = set()
+        for target_type in target_types:
+            if not target_type:
+                continue
+            if target_type not in TARGET_COLLECTIONS:
+                logger.debug('Event of target type %s, dropping the whole inventory', target_type)
+                self.invalidate()
+                return
+            collection_names.update(TARGET_COLLECTIONS[target_type])
+        if collection_names:
+            self.invalidate(*collection_names)
@@ -0,0 +1,116 @@
+"""Waiting for the server roles of an appliance to change
+
+evmserverd activates the roles some seconds after the settings change, by changing the
+``assigned_server_roles`` rows of the server. :py:class:`RoleWatcher` reads the roles every
+second; reading them is a single query. With ``role_watcher.push`` set in ``env.yaml`` it installs
+a trigger doing ``pg_notify`` on every change of the table instead and blocks on the ``LISTEN``
+connection, so the roles are read again as soon as they change. The trigger stays installed on the
+appliance.
+"""
+import select
+import time
+
+import psycopg2
+
+from cfme.utils import conf
+from cfme.utils.db import notify_connection
+from cfme.utils.log import logger
+from cfme.utils.wait import TimedOutError
+
+#: Channel the changes of ``assigned_server_roles`` are notified on
+NOTIFY_CHANNEL = 'cfme_assigned_server_roles'
+#: Seconds between reads of the roles without a notification, in case one got lost
+NOTIFY_WAIT = 5
+#: Seconds between reads of the roles without the notifications
+POLL_DELAY = 1
+
+NOTIFY_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION {channel}_notify() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{channel}', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+DROP TRIGGER IF EXISTS {channel}_notify ON assigned_server_roles;
+CREATE TRIGGER {channel}_notify AFTER INSERT OR UPDATE OR DELETE ON assigned_server_roles
+    FOR EACH STATEMENT EXECUTE PROCEDURE {channel}_notify();
+""".format(channel=NOTIFY_CHANNEL)
+
+
+class RoleWatcher(object):
+    """Context manager listening to the role changes of the appliance
+
+    Enter it before changing the roles, so no change is missed.
+
+    Args:
+        appliance: The appliance
+        push: Get the changes notified by the database instead of polling, ``role_watcher.push``
+              in ``env.yaml`` by default (false if not set)
+
+    Usage:
+
+        with RoleWatcher(appliance) as watcher:
+            appliance.update_advanced_settings({'server': {'role': 'automate,ems_inventory'}})
+            watcher.wait(lambda roles: roles['automate'], timeout=300)
+    """
+    def __init__(self, appliance, push=None):
+        self.appliance = appliance
+        if push is None:
+            push = conf.env.get('role_watcher', {}).get('push', False)
+        self.push = push
+        self.connection = None
+
+    def __enter__(self):
+        if self.push:
+            self.connection = self._notify_connection()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def _notify_connection(self):
+        connection = notify_connection(
+            self.appliance.db.client.db_url, NOTIFY_CHANNEL, NOTIFY_TRIGGER_SQL)
+        if connection is None:
+            logger.warning('Polling the server roles instead of getting their changes notified')
+        return connection
+
+    def _wait_for_change(self, timeout):
+        if self.connection is None:
+            time.sleep(min(POLL_DELAY, timeout))
+            return
+        try:
+            if select.select([self.connection], [], [], min(NOTIFY_WAIT, timeout))[0]:
+                self.connection.poll()
+                del self.connection.notifies[:]
+        except (psycopg2.Error, select.error) as e:
+            logger.warning('Role change notifications failed, polling the roles: %s', e)
+            self.close()
+
+    def wait(self, condition, timeout, message='server roles to change'):
+        """Waits until the roles of the server meet the condition
+
+        Args:
+            condition: Callable taking the :py:attr:`IPAppliance.server_roles` dict
+            timeout: Seconds to wait
+            message: What is waited for, for the timeout error
+        Returns:
+            The roles meeting the condition
+        Raises:
+            :py:class:`cfme.utils.wait.TimedOutError`: If they do not in time
+        """
+        started = time.time()
+        while True:
+            roles = self.appliance.server_roles
+            if condition(roles):
+                logger.info('Waited %.1fs for %s', time.time() - started, message)
+                return roles
+            remaining = started + timeout - time.time()
+            if remaining <= 0:
+                raise TimedOutError('Could not do {} in {}s'.format(message, timeout))
+            self._wait_for_change(remaining)
@@ -0,0 +1,99 @@
+"""Local cache of the advanced settings of an appliance
+
+Reading the advanced settings is a REST call returning the whole settings tree, or a rails runner
+on the older versions. The appliance stores the changes of the settings in the ``settings_changes``
+table, so :py:class:`SettingsCache` keeps the settings read last together with a version of that
+table, its row count, highest id and latest update, which is a single cheap query. The settings are
+fetched again only when the version changed.
+
+The changes written by :py:meth:`cfme.utils.appliance.IPAppliance.update_advanced_settings` are
+compared with the cached settings first, only the differing part is sent and nothing is written
+when there is no difference.
+"""
+import copy
+from collections import Counter
+
+from sqlalchemy import func
+
+from cfme.utils.log import logger
+
+#: Counts of the settings reads and writes of all the appliances in this process
+stats = Counter()
+
+
+def settings_diff(current, new):
+    """Returns the part of ``new`` that differs from ``current``
+
+    The dictionaries are compared recursively, the result can be merged into ``current`` to get
+    the same settings as merging ``new``.
+
+    Args:
+        current: The current settings
+        new: The settings to be set, may be a part of the settings tree
+    """
+    diff = {}
+    for key, value in new.items():
+        current_value = current.get(key)
+        if isinstance(value, dict) and isinstance(current_value, dict):
+            value_diff = settings_diff(current_value, value)
+            if value_diff:
+                diff[key] = value_diff
+        elif key not in current or current_value != value:
+            diff[key] = value
+    return diff
+
+
+def stats_report():
+    """Returns the read and write counts as lines of text"""
+    return [
+        'Advanced settings read {} times, fetched {} times, {} fetches avoided'.format(
+            stats['fetched'] + stats['cached'], stats['fetched'], stats['cached']),
+        'Advanced settings written {} times, {} unchanged writes skipped'.format(
+            stats['written'], stats['unchanged']),
+    ]
+
+
+class SettingsCache(object):
+    """Advanced settings of the appliance, valid as long as ``settings_changes`` is unchanged
+
+    Args:
+        appliance: The :py:class:`cfme.utils.appliance.IPAppliance` the settings belong to
+    """
+    def __init__(self, appliance):
+        self.appliance = appliance
+        self._version = None
+        self._settings = None
+
+    def version(self):
+        """Returns the current version of the stored settings changes
+
+        Returns ``None`` if the database cannot tell, the settings are not cached then.
+        """
+        try:
+            client = self.appliance.db.client
+            changes = client['settings_changes']
+            return tuple(client.session.query(
+                func.count(changes.id), func.max(changes.id), func.max(changes.updated_at)).one())
+        except Exception as e:
+            logger.debug('Cannot read the version of the advanced settings: %s', e)
+            try:
+                self.appliance.db.client.session.rollback()
+            except Exception:
+                pass
+            return None
+
+    def get(self, fetch):
+        """Returns a copy of the settings, calling ``fetch`` to read them if the cache is stale"""
+        version = self.version()
+        if version is not None and version == self._version:
+            stats['cached'] += 1
+            return copy.deepcopy(self._settings)
+        settings = fetch()
+        stats['fetched'] += 1
+        if version is not None:
+            self._version, self._settings = version, copy.deepcopy(settings)
+        return settings
+
+    def invalidate(self):
+        self._version = None
+        self._settings = None
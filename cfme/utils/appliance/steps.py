@@ -0,0 +1,141 @@
+"""Concurrent execution of dependent configuration steps
+
+The steps of :py:meth:`cfme.utils.appliance.IPAppliance.configure` form a dependency graph, a step
+starts as soon as the steps it requires are done, so independent steps run concurrently. They use
+the SSH client of the appliance, every command runs on its own channel of the one connection.
+
+Steps needing an evmserverd restart only flag it, :py:attr:`StepGraph.restart_requested` is set
+when any of them ran and the caller restarts evmserverd once after all the steps.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import six
+from six.moves.queue import Queue
+
+from cfme.utils.log import logger
+
+#: Number of steps running at once
+MAX_WORKERS = 4
+
+
+class Step(object):
+    """A configuration step
+
+    Args:
+        name: Name of the step, used by the dependent steps and in the timings
+        func: Callable doing the step, called without arguments
+        requires: Names of the steps that have to finish before this one
+        restart_evm: The step needs evmserverd to be restarted afterwards
+        enabled: A disabled step does nothing, the steps requiring it do not wait for it
+    """
+    def __init__(self, name, func, requires=(), restart_evm=False, enabled=True):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+        self.restart_evm = restart_evm
+        self.enabled = enabled
+
+    def __repr__(self):
+        return '{}({!r}, requires={!r})'.format(type(self).__name__, self.name, self.requires)
+
+
+class StepGraph(object):
+    """Runs the steps in the order of their dependencies, the independent ones concurrently
+
+    Args:
+        steps: The :py:class:`Step` instances
+        workers: Number of steps running at once
+        wrapper: Context manager factory every step runs in, like the appliance context that is
+            local to the thread
+    Raises:
+        ValueError: If a step requires an unknown step or the dependencies form a cycle
+    """
+    def __init__(self, steps, workers=MAX_WORKERS, wrapper=None):
+        self.steps = OrderedDict((step.name, step) for step in steps)
+        self.workers = max(workers, 1)
+        self.wrapper = wrapper
+        #: Start and end of every step that ran, in seconds from the start of the run
+        self.timings = OrderedDict()
+        self.restart_requested = False
+        for step in self.steps.values():
+            for name in step.requires:
+                if name not in self.steps:
+                    raise ValueError('Step {} requires an unknown step {}'.format(step.name, name))
+        self._check_cycles()
+
+    def _check_cycles(self):
+        done = set()
+        pending = list(self.steps.values())
+        while pending:
+            ready = [step for step in pending if done.issuperset(step.requires)]
+            if not ready:
+                raise ValueError('Cyclic dependencies of the steps {}'.format(
+                    ', '.join(step.name for step in pending)))
+            for step in ready:
+                done.add(step.name)
+                pending.remove(step)
+
+    def _run_step(self, step, started, results):
+        step_start = time.time() - started
+        try:
+            if self.wrapper is None:
+                step.func()
+            else:
+                with self.wrapper():
+                    step.func()
+        except Exception:
+            results.put((step, step_start, sys.exc_info()))
+        else:
+            results.put((step, step_start, None))
+
+    def run(self):
+        """Runs all the enabled steps
+
+        When a step fails, no more steps are started and the exception is raised once the running
+        steps are done.
+
+        Returns:
+            :py:attr:`timings`
+        """
+        started = time.time()
+        done = set(name for name, step in self.steps.items() if not step.enabled)
+        pending = [step for step in self.steps.values() if step.enabled]
+        results = Queue()
+        running = 0
+        failure = None
+        while pending or running:
+            if failure is None:
+                for step in [step for step in pending if done.issuperset(step.requires)]:
+                    if running >= self.workers:
+                        break
+                    pending.remove(step)
+                    running += 1
+                    thread = threading.Thread(
+                        target=self._run_step, args=(step, started, results),
+                        name='step-{}'.format(step.name))
+                    thread.daemon = True
+                    thread.start()
+            elif not running:
+                break
+            step, step_start, exc_info = results.get()
+            running -= 1
+            self.timings[step.name] = (step_start, time.time() - started)
+            if exc_info is not None:
+                logger.error('Step %s failed after %.1fs', step.name,
+                             self.timings[step.name][1] - step_start)
+                failure = failure or exc_info
+                continue
+            done.add(step.name)
+            self.restart_requested = self.restart_requested or step.restart_evm
+        if failure is not None:
+            six.reraise(*failure)
+        return self.timings
+
+    def format_timings(self):
+        """Returns the timing breakdown of the steps as lines of text"""
+        return [
+            '{:<24} {:>7.1f}s  ({:.1f}s - {:.1f}s)'.format(name, end - start, start, end)
+            for name, (start, end) in self.timings.items()]
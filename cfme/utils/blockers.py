@@ -1,14 +1,20 @@
 # -*- coding: utf-8 -*-
 import re
+from collections import defaultdict
+from multiprocessing.pool import ThreadPool
+
 import six
 import six.moves.xmlrpc_client
 from github import Github
+from github.Issue import Issue
 from six.moves.urllib.parse import urlparse
 
 from cfme.fixtures.pytest_store import store
 from cfme.utils import classproperty, conf, version
-from cfme.utils.bz import Bugzilla
+from cfme.utils.bz import Bugzilla, DEFAULT_CACHE_TTL
+from cfme.utils.disk_cache import DiskCache
 from cfme.utils.log import logger
+from cfme.utils.path import cache_path
 
 
 class Blocker(object):
@@ -67,6 +73,29 @@ class Blocker(object):
         else:
             raise ValueError("Wrong specification of the blockers!")
 
+    @classmethod
+    def prefetch(cls, blockers):
+        """Retrieve the data of all the blockers in bulk, so their later checks hit the cache.
+
+        Args:
+            blockers: Iterable of :py:class:`Blocker` instances of any engine.
+        """
+        by_engine = defaultdict(list)
+        for blocker in blockers:
+            by_engine[type(blocker)].append(blocker)
+        for engine_class, engine_blockers in by_engine.items():
+            try:
+                engine_class.prefetch_engine(engine_blockers)
+            except Exception as e:
+                logger.warning(
+                    "Could not prefetch %s blockers: %s: %s",
+                    engine_class.__name__, type(e).__name__, str(e))
+
+    @classmethod
+    def prefetch_engine(cls, blockers):
+        """Override in the engines that can retrieve multiple blockers at once."""
+        pass
+
 
 class GH(Blocker):
     DEFAULT_REPOSITORY = conf.env.get("github", {}).get("default_repo")
@@ -113,12 +142,57 @@ class GH(Blocker):
         else:
             raise ValueError("GH issue specified wrong")
 
+    @classproperty
+    def disk_cache(cls):
+        if not hasattr(cls, "_disk_cache"):
+            cache_ttl = conf.env.get("github", {}).get("cache_ttl", DEFAULT_CACHE_TTL)
+            if cache_ttl:
+                cls._disk_cache = DiskCache(
+                    cache_path.join('blockers.sqlite'), namespace='gh', ttl=cache_ttl)
+            else:
+                cls._disk_cache = None
+        return cls._disk_cache
+
+    @classmethod
+    def get_issues(cls, identifiers, threads=8):
+        """Retrieve the issues specified as ``owner/repo:number`` identifiers.
+
+        Issues not present in the process cache nor in the shared on-disk cache are fetched
+        concurrently.
+        """
+        missing = set(identifiers) - set(cls._issue_cache)
+        if missing and cls.disk_cache is not None:
+            for identifier, raw_data in cls.disk_cache.get_many(missing).items():
+                cls._issue_cache[identifier] = cls.github.create_from_raw_data(Issue, raw_data)
+            missing -= set(cls._issue_cache)
+        if missing:
+            def fetch(identifier):
+                repo, issue = identifier.rsplit(":", 1)
+                return identifier, cls.github.get_repo(repo).get_issue(int(issue))
+
+            logger.info("Fetching %d issues from GitHub", len(missing))
+            pool = ThreadPool(min(threads, len(missing)))
+            try:
+                fetched = dict(pool.map(fetch, sorted(missing)))
+            finally:
+                pool.close()
+            cls._issue_cache.update(fetched)
+            if cls.disk_cache is not None:
+                cls.disk_cache.set_many(
+                    {identifier: issue.raw_data for identifier, issue in fetched.items()})
+        return [cls._issue_cache[identifier] for identifier in identifiers]
+
+    @classmethod
+    def prefetch_engine(cls, blockers):
+        cls.get_issues({blocker.identifier for blocker in blockers})
+
+    @property
+    def identifier(self):
+        return "{}:{}".format(self.repo, self.issue)
+
     @property
     def data(self):
-        identifier = "{}:{}".format(self.repo, self.issue)
-        if identifier not in self._issue_cache:
-            self._issue_cache[identifier] = self.github.get_repo(self.repo).get_issue(self.issue)
-        return self._issue_cache[identifier]
+        return self.get_issues([self.identifier])[0]
 
     @property
     def blocks(self):
@@ -168,6 +242,12 @@ class BZ(Blocker):
         super(BZ, self).__init__(**kwargs)
         self.bug_id = int(bug_id)
 
+    @classmethod
+    def prefetch_engine(cls, blockers):
+        if cls.bugzilla is None:
+            return
+        cls.bugzilla.prefetch_bugs(blocker.bug_id for blocker in blockers)
+
     @property
     def data(self):
         return self.bugzilla.resolve_blocker(
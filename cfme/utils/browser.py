@@ -3,7 +3,7 @@ import atexit
 import json
 import threading
 import time
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from shutil import rmtree
 from string import Template
 from tempfile import mkdtemp
@@ -32,6 +32,8 @@ from cfme.utils.path import data_path
 
 FIVE_MINUTES = 5 * 60
 THIRTY_SECONDS = 30
+#: Seconds a pooled browser may stay unused before it is quit
+POOL_IDLE_TIMEOUT = 15 * 60
 
 BROWSER_ERRORS = URLError, WebDriverException
 WHARF_OUTER_RETRIES = 2
@@ -153,11 +155,9 @@ class BrowserFactory(object):
             return dict(self.browser_kwargs, keep_alive=False)
         return self.browser_kwargs
 
-    def create(self, url_key):
+    def _launch(self, browser_args):
         try:
-            browser = tries(
-                2, WebDriverException,
-                self.webdriver_class, **self.processed_browser_args())
+            browser = tries(2, WebDriverException, self.webdriver_class, **browser_args)
         except URLError as e:
             if e.reason.errno == 111:
                 # Known issue
@@ -168,10 +168,27 @@ class BrowserFactory(object):
 
         browser.file_detector = UselessFileDetector()
         browser.maximize_window()
+        browser.url_key = None
+        return browser
+
+    def launch(self):
+        """Starts a browser without opening any page"""
+        return self._launch(self.processed_browser_args())
+
+    def navigate(self, browser, url_key):
+        """Opens the url_key in the launched browser"""
         browser.get(url_key)
         browser.url_key = url_key
         return browser
 
+    def create(self, url_key):
+        browser = self.launch()
+        try:
+            return self.navigate(browser, url_key)
+        except Exception:
+            self.close(browser)
+            raise
+
     def close(self, browser):
         if browser:
             browser.quit()
@@ -182,6 +199,8 @@ class WharfFactory(BrowserFactory):
     def __init__(self, webdriver_class, browser_kwargs, wharf):
         super(WharfFactory, self).__init__(webdriver_class, browser_kwargs)
         self.wharf = wharf
+        self._wharf_taken = False
+        self._wharf_lock = threading.Lock()
 
         if browser_kwargs.get('desired_capabilities', {}).get('browserName') == 'chrome':
             # chrome uses containers to sandbox the browser, and we use containers to
@@ -194,10 +213,11 @@ class WharfFactory(BrowserFactory):
                 co['args'].append(arg)
             browser_kwargs['desired_capabilities']['chromeOptions'] = co
 
-    def processed_browser_args(self):
-        command_executor = self.wharf.config['webdriver_url']
+    def processed_browser_args(self, wharf=None):
+        wharf = wharf or self.wharf
+        command_executor = wharf.config['webdriver_url']
         view_msg = 'tests can be viewed via vnc on display {}'.format(
-            self.wharf.config['vnc_display'])
+            wharf.config['vnc_display'])
         log.info('webdriver command executor set to %s', command_executor)
         log.info(view_msg)
         write_line(view_msg, cyan=True)
@@ -206,37 +226,82 @@ class WharfFactory(BrowserFactory):
             command_executor=command_executor,
         )
 
-    def create(self, url_key):
+    def _new_wharf(self):
+        # Every browser gets its own container, the pooled browsers must not share one
+        if self.wharf.docker_id is None and not self._wharf_taken:
+            self._wharf_taken = True
+            return self.wharf
+        wharf = Wharf(self.wharf.wharf_url)
+        atexit.register(wharf.checkin)
+        return wharf
+
+    def launch(self):
 
         def inner():
+            with self._wharf_lock:
+                wharf = self._new_wharf()
             try:
-                self.wharf.checkout()
-                return super(WharfFactory, self).create(url_key)
+                wharf.checkout()
+                browser = self._launch(self.processed_browser_args(wharf))
             except URLError as ex:
                 # connection to selenum was refused for unknown reasons
                 log.error('URLError connecting to selenium; recycling container. URLError:')
                 write_line('URLError caused container recycle, see log for details', red=True)
                 log.exception(ex)
-                self.wharf.checkin()
+                self._checkin(wharf)
                 raise
             except Exception:
                 log.exception("failure on webdriver usage, returning container")
-                self.wharf.checkin()
+                self._checkin(wharf)
                 raise
+            browser.wharf = wharf
+            return browser
 
         return tries(WHARF_OUTER_RETRIES, BROWSER_ERRORS, inner)
 
+    def _checkin(self, wharf):
+        wharf.checkin()
+        if wharf is self.wharf:
+            with self._wharf_lock:
+                self._wharf_taken = False
+
     def close(self, browser):
         try:
             super(WharfFactory, self).close(browser)
         finally:
-            self.wharf.checkin()
+            # only the container of this browser, the others serve the pooled browsers
+            wharf = getattr(browser, 'wharf', None)
+            if wharf is not None:
+                self._checkin(wharf)
 
 
 class BrowserManager(object):
-    def __init__(self, browser_factory):
+    """Starts, keeps and quits the browsers
+
+    There is a browser per ``url_key`` (appliance URL), up to ``pool_size`` of them. Opening
+    another url_key switches to its browser, the current one is kept in the pool for when it is
+    opened again. The least recently used browser is quit when the pool is full, and the browsers
+    not used for ``idle_timeout`` seconds are quit as well.
+
+    With ``warm_spare``, a browser is launched in the background ahead of time, so a browser for a
+    new url_key or a replacement of a dead one is there without waiting for the browser start.
+
+    The defaults keep a single browser and no spare, as a selenium server may not take more
+    sessions. Set ``pool_size``, ``warm_spare`` and ``pool_idle_timeout`` in the ``browser``
+    section of env.yaml to change that; with webdriver_wharf, every browser has its own container.
+    """
+    def __init__(self, browser_factory, pool_size=1, warm_spare=False,
+                 idle_timeout=POOL_IDLE_TIMEOUT):
         self.factory = browser_factory
         self.browser = None
+        self.pool_size = max(pool_size, 1)
+        self.warm_spare = warm_spare
+        self.idle_timeout = idle_timeout
+        # url_key -> browser, the least recently used first; the current browser is there too
+        self.sessions = OrderedDict()
+        self._spare = None
+        self._spare_thread = None
+        self._spare_lock = threading.Lock()
         self._browser_renew_thread = None
 
     def coerce_url_key(self, key):
@@ -248,6 +313,10 @@ class BrowserManager(object):
         webdriver_class = getattr(webdriver, webdriver_name)
 
         browser_kwargs = browser_conf.get('webdriver_options', {})
+        pool_kwargs = dict(
+            pool_size=browser_conf.get('pool_size', 1),
+            warm_spare=browser_conf.get('warm_spare', False),
+            idle_timeout=browser_conf.get('pool_idle_timeout', POOL_IDLE_TIMEOUT))
 
         if 'webdriver_wharf' in browser_conf:
             wharf = Wharf(browser_conf['webdriver_wharf'])
@@ -256,7 +325,7 @@ class BrowserManager(object):
                 'webdriver_options'][
                     'desired_capabilities']['browserName'].lower() == 'firefox':
                 browser_kwargs['desired_capabilities']['marionette'] = False
-            return cls(WharfFactory(webdriver_class, browser_kwargs, wharf))
+            return cls(WharfFactory(webdriver_class, browser_kwargs, wharf), **pool_kwargs)
         else:
             if webdriver_name == "Remote":
                 if browser_conf[
@@ -271,12 +340,12 @@ class BrowserManager(object):
                             'desired_capabilities']['browserName'].lower() == 'firefox':
                     browser_kwargs['desired_capabilities']['marionette'] = False
 
-            return cls(BrowserFactory(webdriver_class, browser_kwargs))
+            return cls(BrowserFactory(webdriver_class, browser_kwargs), **pool_kwargs)
 
-    def _is_alive(self):
+    def _is_alive(self, browser=None):
         log.debug("alive check")
         try:
-            self.browser.current_url
+            (browser or self.browser).current_url
         except UnexpectedAlertPresentException:
             # We shouldn't think that an Unexpected alert means the browser is dead
             return True
@@ -288,9 +357,14 @@ class BrowserManager(object):
     def ensure_open(self, url_key=None):
         url_key = self.coerce_url_key(url_key)
         if getattr(self.browser, 'url_key', None) != url_key:
-            return self.start(url_key=url_key)
+            # The current browser stays in the pool
+            self.browser = self.sessions.get(url_key)
+            if self.browser is None:
+                return self.open_fresh(url_key=url_key)
+            log.info('switching to the browser of %r', url_key)
 
         if self._is_alive():
+            self._touch()
             return self.browser
         else:
             return self.start(url_key=url_key)
@@ -303,31 +377,107 @@ class BrowserManager(object):
             cl = self.browser.__cleanup = []
         cl.append(callback)
 
-    def _consume_cleanups(self):
+    def _consume_cleanups(self, browser):
         try:
-            cl = self.browser.__cleanup
+            cl = browser.__cleanup
         except AttributeError:
             pass
         else:
             while cl:
                 cl.pop()()
 
-    def quit(self):
-        # TODO: figure if we want to log the url key here
-        self._consume_cleanups()
+    def _close(self, browser):
+        """Quits the browser and drops it from the pool"""
+        for url_key, session in list(self.sessions.items()):
+            if session is browser:
+                del self.sessions[url_key]
+        self._consume_cleanups(browser)
         try:
-            self.factory.close(self.browser)
+            self.factory.close(browser)
         except Exception as e:
             log.error('An exception happened during browser shutdown:')
             log.exception(e)
+
+    def _touch(self):
+        """Marks the current browser as the most recently used one, quits the idle ones"""
+        url_key = self.browser.url_key
+        self.sessions.pop(url_key, None)
+        self.sessions[url_key] = self.browser
+        self.browser.last_used = time.time()
+        for session in list(self.sessions.values()):
+            if time.time() - session.last_used > self.idle_timeout:
+                log.info('quitting the browser of %r, idle for %.0fs',
+                         session.url_key, time.time() - session.last_used)
+                self._close(session)
+
+    def _make_room(self):
+        while len(self.sessions) >= self.pool_size:
+            session = next(iter(self.sessions.values()))
+            log.info('quitting the least recently used browser of %r', session.url_key)
+            self._close(session)
+
+    def _launch_spare(self):
+        try:
+            spare = self.factory.launch()
+        except Exception:
+            log.exception('could not launch a spare browser')
+            spare = None
+        with self._spare_lock:
+            self._spare = spare
+            self._spare_thread = None
+
+    def _spawn_spare(self):
+        """Launches a spare browser in the background if there is none"""
+        if not self.warm_spare:
+            return
+        with self._spare_lock:
+            if self._spare is not None or self._spare_thread is not None:
+                return
+            self._spare_thread = threading.Thread(target=self._launch_spare)
+            self._spare_thread.daemon = True
+            self._spare_thread.start()
+
+    def _take_spare(self):
+        """Returns the spare browser, waiting for it if it is being launched"""
+        with self._spare_lock:
+            thread = self._spare_thread
+        if thread is not None:
+            thread.join()
+        with self._spare_lock:
+            spare, self._spare = self._spare, None
+        if spare is not None and not self._is_alive(spare):
+            self._close(spare)
+            spare = None
+        return spare
+
+    def quit(self):
+        # TODO: figure if we want to log the url key here
+        try:
+            self._close(self.browser)
         finally:
             self.browser = None
 
+    def quit_all(self):
+        """Quits the current, the pooled and the spare browsers"""
+        self.quit()
+        for session in list(self.sessions.values()):
+            self._close(session)
+        with self._spare_lock:
+            thread = self._spare_thread
+        if thread is not None:
+            thread.join(THIRTY_SECONDS)
+        with self._spare_lock:
+            spare, self._spare = self._spare, None
+        if spare is not None:
+            self._close(spare)
+
     def start(self, url_key=None):
         log.info('starting browser')
         url_key = self.coerce_url_key(url_key)
         if self.browser is not None:
             self.quit()
+        if url_key in self.sessions:
+            self._close(self.sessions[url_key])
         return self.open_fresh(url_key=url_key)
 
     def open_fresh(self, url_key=None):
@@ -335,7 +485,20 @@ class BrowserManager(object):
         log.info('starting browser for %r', url_key)
         assert self.browser is None
 
-        self.browser = self.factory.create(url_key=url_key)
+        self._make_room()
+        browser = self._take_spare() if self.warm_spare else None
+        if browser is not None:
+            try:
+                browser = self.factory.navigate(browser, url_key)
+            except BROWSER_ERRORS:
+                log.exception('spare browser failed to open %r', url_key)
+                self._close(browser)
+                browser = None
+        if browser is None:
+            browser = self.factory.create(url_key=url_key)
+        self.browser = browser
+        self._touch()
+        self._spawn_spare()
         return self.browser
 
 
@@ -451,4 +614,4 @@ def take_screenshot():
     return ScreenShot(screenshot, screenshot_error)
 
 
-atexit.register(manager.quit)
+atexit.register(manager.quit_all)
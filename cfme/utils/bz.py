@@ -4,14 +4,30 @@ from collections import Sequence
 
 import six
 from bugzilla import Bugzilla as _Bugzilla
+from bugzilla.bug import Bug as _Bug
 from miq_version import Version, LATEST
 
 from cached_property import cached_property
 from cfme.utils.conf import credentials, env
+from cfme.utils.disk_cache import DiskCache
 from cfme.utils.log import logger
+from cfme.utils.path import cache_path
 from cfme.utils.version import current_version, appliance_build_datetime, appliance_is_downstream
 
 NONE_FIELDS = {"---", "undefined", "unspecified"}
+# How long are the bugs kept in the shared on-disk cache by default (seconds)
+DEFAULT_CACHE_TTL = 3600
+
+
+def _raw_bug_data(bug):
+    """Return the picklable field data the bug can be recreated from."""
+    try:
+        return bug.get_raw_data()
+    except AttributeError:
+        # Older python-bugzilla
+        return {
+            key: value for key, value in vars(bug).items()
+            if not key.startswith('_') and key not in {'bugzilla', 'autorefresh'}}
 
 
 class Product(object):
@@ -52,6 +68,7 @@ class Bugzilla(object):
         # __kwargs passed to _Bugzilla instantiation, pop our args out
         self.__product = kwargs.pop("product", None)
         self.__config_options = kwargs.pop('config_options', {})
+        self.__disk_cache = kwargs.pop('disk_cache', None)
         self.__kwargs = kwargs
         self.__bug_cache = {}
         self.__product_cache = {}
@@ -87,13 +104,20 @@ class Bugzilla(object):
             url = 'https://bugzilla.redhat.com/xmlrpc.cgi'
             logger.warning("No Bugzilla URL specified in conf, using default: %s", url)
         cred_key = bz_conf.get("bugzilla", {}).get("credentials")
+        cache_ttl = bz_conf.get("cache_ttl", DEFAULT_CACHE_TTL)
+        if cache_ttl:
+            disk_cache = DiskCache(
+                cache_path.join('blockers.sqlite'), namespace='bz:{}'.format(url), ttl=cache_ttl)
+        else:
+            disk_cache = None
         return cls(url=url,
                    user=credentials.get(cred_key, {}).get("username"),
                    password=credentials.get(cred_key, {}).get("password"),
                    cookiefile=None,
                    tokenfile=None,
                    product=bz_conf.get("bugzilla", {}).get("product"),
-                   config_options=bz_conf)
+                   config_options=bz_conf,
+                   disk_cache=disk_cache)
 
     @cached_property
     def bugzilla(self):
@@ -117,9 +141,69 @@ class Bugzilla(object):
     def get_bug(self, id):
         id = int(id)
         if id not in self.__bug_cache:
+            self.get_bugs([id])
+        if id not in self.__bug_cache:
+            # Not found in the bulk query, let the single query raise the proper fault
             self.__bug_cache[id] = BugWrapper(self, self.bugzilla.getbug(id))
         return self.__bug_cache[id]
 
+    def get_bugs(self, ids):
+        """Retrieve multiple bugs, using one query for all the bugs that are not cached.
+
+        The bugs are looked up in the process cache first, then in the shared on-disk cache and
+        whatever remains is fetched from Bugzilla in bulk. Bugs that do not exist are skipped.
+        """
+        ids = set(map(int, ids))
+        missing = ids - set(self.__bug_cache)
+        if missing and self.__disk_cache is not None:
+            for bug_id, data in self.__disk_cache.get_many(missing).items():
+                self.__bug_cache[bug_id] = BugWrapper(self, _Bug(self.bugzilla, dict=data))
+            missing -= set(self.__bug_cache)
+        if missing:
+            logger.info("Fetching %d bugs from Bugzilla", len(missing))
+            fetched = {}
+            for bug in self.bugzilla.getbugs(sorted(missing), permissive=True):
+                if bug is None:
+                    continue
+                self.__bug_cache[bug.id] = BugWrapper(self, bug)
+                fetched[bug.id] = _raw_bug_data(bug)
+            if self.__disk_cache is not None:
+                self.__disk_cache.set_many(fetched)
+        return [self.__bug_cache[bug_id] for bug_id in sorted(ids) if bug_id in self.__bug_cache]
+
+    def prefetch_bugs(self, ids):
+        """Fetch the bugs and all the bugs that :py:meth:`get_bug_variants` needs in bulk.
+
+        Each round fetches the duplicates, originals and blocked bugs of the bugs from the
+        previous round in a single query, so the following variant resolution is served from the
+        cache.
+        """
+        candidates = set(map(int, ids))
+        expanded = set()
+        while candidates:
+            expanded.update(candidates)
+            bugs = self.get_bugs(candidates)
+            related = set()
+            for bug in bugs:
+                if bug.status == "CLOSED" and bug.resolution == "DUPLICATE" and bug.dupe_of:
+                    related.add(int(bug.dupe_of))
+                if bug.copy_of:
+                    related.add(bug.copy_of)
+                related.update(map(int, bug.blocks or []))
+            self.get_bugs(related)
+            next_candidates = set()
+            for bug in bugs:
+                if bug.status == "CLOSED" and bug.resolution == "DUPLICATE" and bug.dupe_of:
+                    next_candidates.add(int(bug.dupe_of))
+                if bug.copy_of:
+                    next_candidates.add(bug.copy_of)
+                for blocked_id in map(int, bug.blocks or []):
+                    if blocked_id not in self.__bug_cache:
+                        continue
+                    if self.__bug_cache[blocked_id].copy_of == bug.id:
+                        next_candidates.add(blocked_id)
+            candidates = next_candidates - expanded
+
     def get_bug_variants(self, id):
         if isinstance(id, BugWrapper):
             bug = id
@@ -214,11 +298,11 @@ def check_fixed_in(fixed_in, version_series):
 
 
 class BugWrapper(object):
-    _copy_matchers = map(re.compile, [
+    _copy_matchers = list(map(re.compile, [
         r'^[+]{3}\s*This bug is a CFME zstream clone. The original bug is:\s*[+]{3}\n[+]{3}\s*'
         'https://bugzilla.redhat.com/show_bug.cgi\?id=(\d+)\.\s*[+]{3}',
         r"^\+\+\+ This bug was initially created as a clone of Bug #([0-9]+) \+\+\+"
-    ])
+    ]))
 
     def __init__(self, bugzilla, bug):
         self._bug = bug
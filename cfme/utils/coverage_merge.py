@@ -0,0 +1,263 @@
+"""Merging of the simplecov ``.resultset.json`` files
+
+The ruby ``coverage_merger.rb`` loads all the result sets into one ruby process on the appliance,
+which takes hours for the data of many test runs. This merges them locally instead:
+
+* Every result set is read by an incremental parser, one source file at a time, so only the merged
+  data is ever held in memory.
+* The line hits are summed with NumPy when it is installed, in pure Python otherwise.
+* The result sets are split among the processes of a pool, and the partial results are merged
+  pairwise, as a tree, until one is left.
+
+The output is a simplecov result set with a single ``merged_data`` command, so the ruby merger only
+has to add the files not covered at all and render the HTML.
+
+The format of a result set::
+
+    {"<command>": {"coverage": {"<source file>": [null, 1, 0, ...], ...}, "timestamp": 1518751298}}
+
+Newer simplecov versions store ``{"lines": [...]}`` instead of the plain list, both are read.
+"""
+import codecs
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+import six
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from cfme.utils.log import logger
+
+MERGED_TITLE = 'merged_data'
+#: Size of the chunks read from the result sets
+READ_SIZE = 64 * 1024
+
+
+class CoverageMergeError(Exception):
+    """Raised when the result sets cannot be parsed or do not match"""
+    pass
+
+
+class _JSONStream(object):
+    """Incremental reader of a JSON document, decoding one value at a time"""
+    decoder = json.JSONDecoder()
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        # a character may span the chunks
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+
+    def _fill(self):
+        data = self.f.read(READ_SIZE)
+        if not data:
+            self.eof = True
+        if isinstance(data, six.binary_type):
+            chunk = self._decoder.decode(data, final=self.eof)
+        else:
+            chunk = data
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+
+    def peek(self):
+        """Returns the next non-whitespace character, without consuming it"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                raise CoverageMergeError('Unexpected end of the result set')
+            self._fill()
+
+    def expect(self, chars):
+        char = self.peek()
+        if char not in chars:
+            raise CoverageMergeError('Expected {!r} in the result set, got {!r}'.format(
+                chars, char))
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decodes the next value; it has to fit in the memory"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                if self.eof:
+                    raise CoverageMergeError('Cannot decode the result set')
+                self._fill()
+                continue
+            # a number at the end of the buffer might continue in the next chunk
+            if end == len(self.buffer) and not self.eof and not isinstance(
+                    value, (dict, list, six.string_types)):
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+    def items(self):
+        """Iterates over the keys of an object, the caller has to consume the values"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+
+def iter_resultset(f):
+    """Yields ``(source file, line hits)`` of all the commands of the result set file object,
+    and a ``(None, timestamp)`` for every command"""
+    stream = _JSONStream(f)
+    for _ in stream.items():
+        for key in stream.items():
+            if key == 'coverage':
+                for source_file in stream.items():
+                    lines = stream.value()
+                    if isinstance(lines, dict):
+                        lines = lines.get('lines', [])
+                    yield source_file, lines
+            elif key == 'timestamp':
+                yield None, stream.value()
+            else:
+                stream.value()
+
+
+def _add_python(hits, lines):
+    if len(hits) != len(lines):
+        raise CoverageMergeError('Line counts differ')
+    result = []
+    for a, b in zip(hits, lines):
+        if a is None and b is None:
+            result.append(None)
+        elif a is None or b is None:
+            raise CoverageMergeError('Coverage data should be either null or a number')
+        else:
+            result.append(a + b)
+    return result
+
+
+def _to_array(lines):
+    return numpy.array([-1 if hit is None else hit for hit in lines], dtype=numpy.int64)
+
+
+def _add_numpy(hits, lines):
+    lines = _to_array(lines)
+    if hits.shape != lines.shape:
+        raise CoverageMergeError('Line counts differ')
+    if ((hits < 0) != (lines < 0)).any():
+        raise CoverageMergeError('Coverage data should be either null or a number')
+    return numpy.where(hits < 0, -1, hits + lines)
+
+
+class Merger(object):
+    """Accumulates line hits of result sets"""
+    def __init__(self):
+        self.coverage = {}
+        self.timestamp = 0
+
+    def add(self, source_file, lines):
+        hits = self.coverage.get(source_file)
+        try:
+            if hits is None:
+                self.coverage[source_file] = _to_array(lines) if numpy else list(lines)
+            else:
+                self.coverage[source_file] = (
+                    _add_numpy if numpy else _add_python)(hits, lines)
+        except CoverageMergeError as e:
+            raise CoverageMergeError('{}: {}'.format(source_file, e))
+
+    def add_file(self, path):
+        with open(path, 'rb') as f:
+            for source_file, data in iter_resultset(f):
+                if source_file is None:
+                    self.timestamp = max(self.timestamp, data or 0)
+                else:
+                    self.add(source_file, data)
+
+    def lines(self, source_file):
+        hits = self.coverage[source_file]
+        if numpy is not None:
+            return [None if hit < 0 else int(hit) for hit in hits]
+        return hits
+
+    def write(self, path, title=MERGED_TITLE):
+        """Writes the merged data as a simplecov result set, one source file at a time"""
+        with open(path, 'w') as f:
+            f.write('{{{}: {{"coverage": {{'.format(json.dumps(title)))
+            for i, source_file in enumerate(sorted(self.coverage)):
+                f.write('{}\n{}: {}'.format(
+                    ',' if i else '', json.dumps(source_file),
+                    json.dumps(self.lines(source_file))))
+            f.write('\n}}, "timestamp": {}}}}}\n'.format(int(self.timestamp)))
+
+
+def _merge_group(args):
+    paths, output = args
+    merger = Merger()
+    for path in paths:
+        merger.add_file(path)
+    merger.write(output)
+    return output
+
+
+def find_resultsets(directory):
+    """Returns paths of all the ``.resultset.json`` files under the directory"""
+    return sorted(
+        os.path.join(root, name)
+        for root, _, files in os.walk(str(directory))
+        for name in files if name == '.resultset.json')
+
+
+def merge_resultsets(paths, output, processes=None):
+    """Merges the result sets into one
+
+    Args:
+        paths: Paths of the ``.resultset.json`` files
+        output: Path of the merged result set
+        processes: Size of the process pool, the number of CPUs by default; merges in this
+            process if 1
+    """
+    paths = [str(path) for path in paths]
+    if not paths:
+        raise CoverageMergeError('No result sets to merge')
+    processes = min(processes or multiprocessing.cpu_count(), len(paths))
+    tmpdir = tempfile.mkdtemp(prefix='coverage-merge-')
+    outputs = iter(os.path.join(tmpdir, '{}.json'.format(i)) for i in range(len(paths) * 2))
+    try:
+        if processes == 1:
+            level = [_merge_group((paths, next(outputs)))]
+        else:
+            pool = multiprocessing.Pool(processes)
+            try:
+                # every process merges its share of the result sets, then the partial results
+                # are merged pairwise
+                level = pool.map(
+                    _merge_group,
+                    [(paths[i::processes], next(outputs)) for i in range(processes)])
+                while len(level) > 1:
+                    level = pool.map(
+                        _merge_group,
+                        [(level[i:i + 2], next(outputs)) for i in range(0, len(level), 2)])
+            finally:
+                pool.terminate()
+                pool.join()
+        shutil.move(level[0], str(output))
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    logger.info('Merged %d coverage result sets into %s', len(paths), output)
+    return str(output)
@@ -1,6 +1,8 @@
+import threading
 from collections import Mapping
 from contextlib import contextmanager
 
+import psycopg2
 from cached_property import cached_property
 from sqlalchemy import MetaData, create_engine, event, inspect
 from sqlalchemy.exc import ArgumentError, DisconnectionError, InvalidRequestError
@@ -10,7 +12,28 @@ from sqlalchemy.pool import Pool
 
 from cfme.fixtures.pytest_store import store
 from cfme.utils import conf
+from cfme.utils.disk_cache import DiskCache
 from cfme.utils.log import logger
+from cfme.utils.path import cache_path
+
+try:
+    import six.moves.cPickle as pickle
+except ImportError:
+    import pickle   # NOQA
+
+# Connection pool of the engines; the schema reflection runs in its own thread besides the tests
+POOL_SIZE = 5
+POOL_MAX_OVERFLOW = 10
+POOL_RECYCLE = 3600
+
+# Pickled reflected schemas by schema key, shared by all Db objects in the process
+_schema_cache = {}
+_schema_cache_lock = threading.Lock()
+_schemas_reflecting = set()
+
+
+def get_schema_disk_cache():
+    return DiskCache(cache_path.join('db_schema.sqlite'), namespace='db-schema')
 
 
 @event.listens_for(Pool, "checkout")
@@ -67,6 +90,11 @@ class Db(Mapping):
         a latent connection, this can be extremely slow, which will affect methods that return
         tables, like the mapping interface or :py:meth:`values`.
 
+        To avoid that, the whole schema is reflected once in a background thread and stored
+        in ``.cache/db_schema.sqlite``, keyed by the applied rails migrations. Other Db objects
+        in the process, parallelizer slaves and later runs against the same appliance build then
+        do not need to touch the DB for reflection at all.
+
     """
     def __init__(self, hostname=None, credentials=None, port=None):
         self._table_cache = {}
@@ -153,7 +181,9 @@ class Db(Mapping):
         connected before executing commands.
 
         """
-        return create_engine(self.db_url, echo_pool=True)
+        return create_engine(
+            self.db_url, echo_pool=True, pool_size=POOL_SIZE, max_overflow=POOL_MAX_OVERFLOW,
+            pool_recycle=POOL_RECYCLE)
 
     @cached_property
     def sessionmaker(self):
@@ -182,10 +212,70 @@ class Db(Mapping):
         Note:
 
             Tables that haven't been reflected won't show up in metadata. To reflect a table,
-            use :py:meth:`reflect_table`.
+            use :py:meth:`reflect_table`. If the schema was reflected before, all the tables are
+            already present.
 
         """
-        return MetaData(bind=self.engine)
+        metadata = self._cached_metadata()
+        if metadata is None:
+            metadata = MetaData()
+            self._reflect_schema_in_background()
+        metadata.bind = self.engine
+        return metadata
+
+    @cached_property
+    def schema_key(self):
+        """Identifies the schema by the rails migrations applied, ``None`` if unknown"""
+        try:
+            count, latest = self.engine.execute(
+                'SELECT count(*), max(version) FROM schema_migrations').first()
+        except Exception as e:
+            logger.warning('[DB] Could not determine the schema version: %s', str(e))
+            return None
+        return 'vmdb-{}-{}'.format(latest, count)
+
+    def _cached_metadata(self):
+        """Returns a copy of the reflected schema from the process or disk cache, if present"""
+        key = self.schema_key
+        if key is None:
+            return None
+        with _schema_cache_lock:
+            schema = _schema_cache.get(key)
+        if schema is None:
+            schema = get_schema_disk_cache().get(key)
+            if schema is None:
+                return None
+            with _schema_cache_lock:
+                _schema_cache[key] = schema
+            logger.info('[DB] Loaded schema %s from the cache', key)
+        # every Db needs its own copy, the metadata is bound to its engine
+        return pickle.loads(schema)
+
+    def _reflect_schema_in_background(self):
+        key = self.schema_key
+        with _schema_cache_lock:
+            if key is None or key in _schemas_reflecting:
+                return
+            _schemas_reflecting.add(key)
+        thread = threading.Thread(target=self._reflect_schema, args=(key,))
+        thread.daemon = True
+        thread.start()
+
+    def _reflect_schema(self, key):
+        """Reflects all the tables at once and stores them in the caches"""
+        try:
+            metadata = MetaData()
+            metadata.reflect(bind=self.engine)
+            schema = pickle.dumps(metadata, pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning('[DB] Reflecting schema %s failed: %s', key, str(e))
+            with _schema_cache_lock:
+                _schemas_reflecting.discard(key)
+            return
+        with _schema_cache_lock:
+            _schema_cache[key] = schema
+        get_schema_disk_cache().set(key, schema)
+        logger.info('[DB] Reflected schema %s, %d tables', key, len(metadata.tables))
 
     @cached_property
     def db_url(self):
@@ -276,3 +366,40 @@ class Db(Mapping):
 def database_on_server(hostname, **kwargs):
     db_obj = Db(hostname=hostname, **kwargs)
     yield db_obj
+
+
+def notify_connection(db_url, channel, trigger_sql):
+    """Returns a connection listening to the notifications of the channel
+
+    The trigger doing the ``pg_notify`` is named ``<channel>_notify``, it is installed by
+    ``trigger_sql`` unless it exists already. The trigger stays installed in the database.
+
+    Args:
+        db_url: URL of the database
+        channel: Name of the notification channel
+        trigger_sql: SQL installing the trigger
+    Returns:
+        The ``psycopg2`` connection in autocommit mode, ``None`` if the database cannot be
+        connected to or the trigger cannot be installed.
+    """
+    try:
+        connection = psycopg2.connect(db_url)
+    except psycopg2.Error as e:
+        logger.warning('[DB] Cannot connect to listen to %s: %s', channel, str(e))
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_trigger WHERE tgname = %s",
+                           ('{}_notify'.format(channel),))
+            if cursor.fetchone() is None:
+                logger.info('[DB] Installing the %s notification trigger', channel)
+                cursor.execute(trigger_sql)
+        connection.commit()
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute('LISTEN {}'.format(channel))
+    except psycopg2.Error as e:
+        logger.warning('[DB] Cannot install the %s notification trigger: %s', channel, str(e))
+        connection.close()
+        return None
+    return connection
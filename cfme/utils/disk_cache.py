@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""SQLite backed key-value cache with expiration.
+
+The cache lives in a single file, so it can be shared by the parallelizer master and all its
+slaves, and also between subsequent runs. Every operation opens its own connection, so the
+object is safe to use after forking and from multiple threads.
+
+.. code-block:: python
+
+    cache = DiskCache(cache_path.join('bugzilla.sqlite'), namespace='bz', ttl=3600)
+    cache.set(123456, {'status': 'NEW'})
+    cache.get(123456)  # {'status': 'NEW'}
+    cache.get_many([123456, 654321])  # {123456: {'status': 'NEW'}}
+"""
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import six
+
+try:
+    import six.moves.cPickle as pickle
+except ImportError:
+    import pickle   # NOQA
+
+from cfme.utils.log import logger
+
+# How many parameters can be safely put in one sqlite query
+_CHUNK_SIZE = 500
+
+
+def _chunks(items, size=_CHUNK_SIZE):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class DiskCache(object):
+    """Key-value cache stored in SQLite.
+
+    Args:
+        path: Path to the database file. Directories are created if needed.
+        namespace: Keys are stored separately for each namespace.
+        ttl: Time in seconds after which the stored values are considered expired. ``None`` means
+            the values never expire.
+    """
+    def __init__(self, path, namespace='default', ttl=None):
+        self.path = str(path)
+        self.namespace = namespace
+        self.ttl = ttl
+        self._initialized = False
+
+    def _connect(self):
+        if not self._initialized:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.isdir(directory):
+                try:
+                    os.makedirs(directory)
+                except OSError:
+                    # Created by someone else in the meantime
+                    pass
+        connection = sqlite3.connect(self.path, timeout=60)
+        if not self._initialized:
+            with connection:
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS cache ('
+                    'namespace TEXT NOT NULL, key TEXT NOT NULL, stored REAL NOT NULL, '
+                    'value BLOB NOT NULL, PRIMARY KEY (namespace, key))')
+            self._initialized = True
+        return connection
+
+    @staticmethod
+    def _key(key):
+        return key if isinstance(key, six.string_types) else repr(key)
+
+    @property
+    def _oldest_valid(self):
+        if self.ttl is None:
+            return 0
+        return time.time() - self.ttl
+
+    def get_many(self, keys):
+        """Return a dictionary of the keys that are present and not expired."""
+        keys = {self._key(key): key for key in keys}
+        result = {}
+        if not keys:
+            return result
+        try:
+            with closing(self._connect()) as connection:
+                for chunk in _chunks(keys):
+                    rows = connection.execute(
+                        'SELECT key, value FROM cache WHERE namespace = ? AND stored >= ? '
+                        'AND key IN ({})'.format(', '.join('?' * len(chunk))),
+                        [self.namespace, self._oldest_valid] + chunk)
+                    for key, value in rows:
+                        result[keys[key]] = pickle.loads(bytes(value))
+        except sqlite3.Error as e:
+            logger.warning('Could not read from the cache %s: %s', self.path, str(e))
+        return result
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def set_many(self, values):
+        """Store all the key-value pairs from the dictionary."""
+        now = time.time()
+        rows = [
+            (self.namespace, self._key(key), now,
+                sqlite3.Binary(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)))
+            for key, value in values.items()]
+        if not rows:
+            return
+        try:
+            with closing(self._connect()) as connection:
+                with connection:
+                    connection.executemany(
+                        'INSERT OR REPLACE INTO cache (namespace, key, stored, value) '
+                        'VALUES (?, ?, ?, ?)', rows)
+        except sqlite3.Error as e:
+            logger.warning('Could not write into the cache %s: %s', self.path, str(e))
+
+    def set(self, key, value):
+        self.set_many({key: value})
+
+    def delete(self, key):
+        with closing(self._connect()) as connection:
+            with connection:
+                connection.execute(
+                    'DELETE FROM cache WHERE namespace = ? AND key = ?',
+                    (self.namespace, self._key(key)))
+
+    def expire(self):
+        """Remove expired entries of this namespace."""
+        with closing(self._connect()) as connection:
+            with connection:
+                connection.execute(
+                    'DELETE FROM cache WHERE namespace = ? AND stored < ?',
+                    (self.namespace, self._oldest_valid))
+
+    def clear(self):
+        """Remove all entries of this namespace."""
+        with closing(self._connect()) as connection:
+            with connection:
+                connection.execute('DELETE FROM cache WHERE namespace = ?', (self.namespace,))
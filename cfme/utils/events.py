@@ -8,7 +8,8 @@ from time import sleep
 from threading import Thread, Event as ThreadEvent
 
 from cfme.utils.log import create_sublogger
-from manageiq_client.filters import Q
+from cfme.utils.rest import query_resources
+from manageiq_client.filters import Q, gen_filter
 
 logger = create_sublogger('events')
 
@@ -215,6 +216,8 @@ class RestEventListener(Thread):
             cur_last_record_id = self.get_max_record_id()
             if not cur_last_record_id:
                 continue
+            if cur_last_record_id != self._last_processed_id:
+                self.invalidate_inventory(cur_last_record_id)
 
             for exp_event in self._events_to_listen:
 
@@ -243,6 +246,21 @@ class RestEventListener(Thread):
                     break
             self._last_processed_id = cur_last_record_id
 
+    def invalidate_inventory(self, max_id):
+        """Drops the collections the new events are about from the appliance inventory"""
+        filters = [gen_filter('id', '<=', int(max_id))]
+        if self._last_processed_id:
+            filters.append(gen_filter('id', '>', int(self._last_processed_id)))
+        try:
+            new_events = query_resources(
+                self.event_streams, attributes=['target_type'], filters=filters)
+        except Exception:
+            logger.exception("Could not get the target types of new events")
+            self._appliance.inventory.invalidate()
+        else:
+            self._appliance.inventory.invalidate_target_types(
+                {event.get('target_type') for event in new_events})
+
     def get_next_portion(self, evt, max_id=None):
         """ Returns list with one or more events matched with expected event.
 
@@ -1,8 +1,17 @@
 # -*- coding: utf-8 -*-
 
 """Library for event testing.
+
+:py:class:`DbEventListener` polls the ``event_streams`` table for the new rows. With
+``event_listener.push`` set in ``env.yaml``, it gets them pushed by PostgreSQL instead: it installs
+a trigger doing ``pg_notify`` of the id of every new row, and blocks on the ``LISTEN`` connection
+until a notification comes. The trigger stays installed on the appliance. If it cannot be
+installed, the table is polled.
 """
 
+import select
+
+import psycopg2
 from cached_property import cached_property
 from contextlib import contextmanager
 from collections import Iterable
@@ -12,10 +21,31 @@ from sqlalchemy.sql.expression import func
 from time import sleep
 from threading import Thread, Event as ThreadEvent
 
+from cfme.utils import conf
+from cfme.utils.db import notify_connection
 from cfme.utils.log import create_sublogger
 
 logger = create_sublogger('events')
 
+#: Channel the ids of the new ``event_streams`` rows are notified on
+NOTIFY_CHANNEL = 'cfme_event_streams'
+#: Longest time the push mode blocks without checking whether the listener was stopped
+NOTIFY_WAIT = 1
+#: Seconds between the queries of the polling mode
+POLL_DELAY = 0.2
+
+NOTIFY_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION {channel}_notify() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{channel}', NEW.id::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+DROP TRIGGER IF EXISTS {channel}_notify ON event_streams;
+CREATE TRIGGER {channel}_notify AFTER INSERT ON event_streams
+    FOR EACH ROW EXECUTE PROCEDURE {channel}_notify();
+""".format(channel=NOTIFY_CHANNEL)
+
 
 class EventTool(object):
     """EventTool serves as a wrapper to getting the events from the database.
@@ -285,11 +315,19 @@ class DbEventListener(Thread):
     """
      accepts "expected" events, listens to db events and compares showed up events with expected
      events. Runs callback function if expected events have it.
+
+     Args:
+         appliance: The appliance
+         push: Get the events notified by the database instead of polling, ``event_listener.push``
+               in ``env.yaml`` by default (false if not set)
     """
-    def __init__(self, appliance):
+    def __init__(self, appliance, push=None):
         super(DbEventListener, self).__init__()
         self._appliance = appliance
         self._tool = EventTool(self._appliance)
+        if push is None:
+            push = conf.env.get('event_listener', {}).get('push', False)
+        self._push = push
 
         self._events_to_listen = []
         # last_id is used to ignore already arrived messages the database
@@ -387,26 +425,62 @@ class DbEventListener(Thread):
         processes all new db events and compares them with expected events.
         processed events are ignored next time
         """
+        connection = self._notify_connection() if self._push else None
+        if connection is None:
+            self._poll_events()
+            return
+        try:
+            self._receive_events(connection)
+        except (psycopg2.Error, select.error) as e:
+            logger.warning('Event notifications failed, polling the events: %s', str(e))
+            self._poll_events()
+        finally:
+            connection.close()
+
+    def _notify_connection(self):
+        connection = notify_connection(
+            self._appliance.db.client.db_url, NOTIFY_CHANNEL, NOTIFY_TRIGGER_SQL)
+        if connection is None:
+            logger.warning('Polling the events instead of getting them notified')
+        return connection
+
+    def _receive_events(self, connection):
+        # Listening already, the events since the last record are not missed
+        self._process(self.get_next_portion())
+        while not self._stop_event.is_set():
+            if not select.select([connection], [], [], NOTIFY_WAIT)[0]:
+                continue
+            connection.poll()
+            ids = []
+            while connection.notifies:
+                ids.append(int(connection.notifies.pop(0).payload))
+            if ids:
+                self._process(self.get_notified_portion(ids))
+
+    def _poll_events(self):
         while not self._stop_event.is_set():
             events = self.get_next_portion()
             if len(events) == 0:
-                sleep(0.2)
+                sleep(POLL_DELAY)
                 continue
-            for got_event in events:
-                logger.debug("processing event id {}".format(got_event.id))
-                got_event = Event(event_tool=self._tool).build_from_raw_event(got_event)
-                for exp_event in self._events_to_listen:
-                    if exp_event['first_event'] and len(exp_event['matched_events']) > 0:
-                        continue
-
-                    if exp_event['event'].matches(got_event):
-                        if exp_event['callback']:
-                            exp_event['callback'](exp_event=exp_event['event'], got_event=got_event)
-                        exp_event['matched_events'].append(got_event)
-                self.set_last_record(got_event)
-
-                if self._stop_event.is_set():
-                    break
+            self._process(events)
+
+    def _process(self, events):
+        for got_event in events:
+            logger.debug("processing event id {}".format(got_event.id))
+            got_event = Event(event_tool=self._tool).build_from_raw_event(got_event)
+            for exp_event in self._events_to_listen:
+                if exp_event['first_event'] and len(exp_event['matched_events']) > 0:
+                    continue
+
+                if exp_event['event'].matches(got_event):
+                    if exp_event['callback']:
+                        exp_event['callback'](exp_event=exp_event['event'], got_event=got_event)
+                    exp_event['matched_events'].append(got_event)
+            self.set_last_record(got_event)
+
+            if self._stop_event.is_set():
+                break
 
     @property
     def got_events(self):
@@ -430,6 +504,14 @@ class DbEventListener(Thread):
             .filter(self._tool.event_streams.id > self._last_processed_id)\
             .order_by(self._tool.event_streams.id).yield_per(100).all()
 
+    def get_notified_portion(self, ids):
+        """Returns the events of the notified ids not processed yet"""
+        logger.debug("obtaining notified events %s", ids)
+        return self._tool.query(self._tool.event_streams)\
+            .filter(self._tool.event_streams.id.in_(ids))\
+            .filter(self._tool.event_streams.id > self._last_processed_id)\
+            .order_by(self._tool.event_streams.id).all()
+
     def check_expected_events(self):
         return all([len(event['matched_events']) for event in self.got_events])
 
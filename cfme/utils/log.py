@@ -442,9 +442,13 @@ def nth_frame_info(n):
     Returns a frameinfo namedtuple as described in :py:func:`inspect <python:inspect.getframeinfo>`
 
     """
-    # Inspect the stack with 1 line of context, looking at the "n"th frame to determine
-    # the filename and line number of that frame
-    return inspect.getframeinfo(inspect.stack(1)[n][0])
+    # Look only at the "n"th frame (counting this one), inspect.stack would read the source
+    # context of every frame in the stack
+    try:
+        frame = sys._getframe(n)
+    except ValueError:
+        raise IndexError('The stack does not contain frame {}'.format(n))
+    return inspect.getframeinfo(frame, context=1)
 
 
 class ArtifactorHandler(logging.Handler):
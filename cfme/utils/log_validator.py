@@ -1,9 +1,153 @@
 import re
+import threading
+import time
+
 import pytest
 
 from .ssh import SSHTail
 from cfme.utils.log import logger
 
+#: Seconds validate_logs waits for the tail to catch up with the log
+SYNC_TIMEOUT = 30
+#: Seconds without new data after which a rotated log is considered read
+TAIL_SETTLE = 1
+RECV_SIZE = 64 * 1024
+
+# Backreferences are numbered within the combined pattern, those patterns are matched one by one
+_BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+
+
+class LogClassifier(object):
+    """Classifies log lines by the skip, failure and matched patterns in a single regex match
+
+    All the patterns are compiled into one alternation with a named group per pattern. The
+    alternatives are tried in the order skip, failure, matched, so the first group that matched is
+    the one with the highest priority. Only a line matching a matched pattern is matched again,
+    against the following matched patterns, as one line may match several of them.
+
+    Patterns that cannot be combined (using backreferences, or failing to compile together) are
+    matched separately, with the same priorities.
+    """
+    KINDS = ('skip', 'failure', 'matched')
+
+    def __init__(self, skip_patterns=(), failure_patterns=(), matched_patterns=()):
+        self.patterns = []
+        for kind, patterns in zip(self.KINDS, (skip_patterns, failure_patterns, matched_patterns)):
+            self.patterns.extend((kind, pattern, re.compile(pattern)) for pattern in patterns)
+        self._combined = None
+        if self.patterns and not any(_BACKREFERENCE.search(p) for _, p, _ in self.patterns):
+            try:
+                self._combined = re.compile('|'.join(
+                    '(?P<p{}>{})'.format(i, pattern)
+                    for i, (_, pattern, _) in enumerate(self.patterns)))
+            except (re.error, AssertionError):
+                # eg. too many groups or conflicting group names
+                self._combined = None
+
+    def classify(self, line):
+        """Returns the kind of the first matching pattern and the matching patterns of that kind
+
+        Returns:
+            A tuple of the kind (``skip``, ``failure``, ``matched`` or ``None``) and the list of the
+            patterns of that kind matching the line, the first one only for skip and failure.
+        """
+        if self._combined is None:
+            return self._classify_separately(line)
+        match = self._combined.match(line)
+        if match is None:
+            return None, []
+        # The group of the pattern encloses its own groups, so it is the last one closed
+        index = int(match.lastgroup[1:])
+        kind, pattern, _ = self.patterns[index]
+        if kind != 'matched':
+            return kind, [pattern]
+        return kind, [pattern] + [
+            p for k, p, compiled in self.patterns[index + 1:]
+            if k == 'matched' and compiled.match(line)]
+
+    def _classify_separately(self, line):
+        for kind in self.KINDS:
+            matched = [
+                pattern for k, pattern, compiled in self.patterns
+                if k == kind and compiled.match(line)]
+            if matched:
+                return kind, matched if kind == 'matched' else matched[:1]
+        return None, []
+
+
+class _TailStream(object):
+    """``tail -F`` of a remote file on an SSH channel, passing the lines to the callback
+
+    The lines are processed in a reading thread as they come. When the callback is slower than the
+    log grows, the channel window fills and ``tail`` blocks, so nothing piles up in memory.
+    """
+    def __init__(self, client, remote_filename, callback):
+        self.client = client
+        self.remote_filename = remote_filename
+        self.callback = callback
+        self.start_size = None
+        self.received = 0
+        self.last_data = None
+        self._partial = b''
+        self._channel = None
+        self._thread = None
+        self._progress = threading.Condition()
+
+    def file_size(self):
+        result = self.client.run_command(
+            'stat -L -c %s {}'.format(self.remote_filename), ensure_user=True)
+        return int(result.output.strip()) if result.success else 0
+
+    def start(self):
+        self.start_size = self.file_size()
+        self._channel = self.client.get_transport().open_session()
+        # tail the bytes from the current end on, following rotations
+        self._channel.exec_command('tail -c +{} -F {}'.format(
+            self.start_size + 1, self.remote_filename))
+        self.last_data = time.time()
+        self._thread = threading.Thread(target=self._read)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _read(self):
+        while True:
+            data = self._channel.recv(RECV_SIZE)
+            if not data:
+                break
+            lines = (self._partial + data).split(b'\n')
+            self._partial = lines.pop()
+            for line in lines:
+                self.callback(line.decode('utf-8', 'replace'))
+            with self._progress:
+                self.received += len(data)
+                self.last_data = time.time()
+                self._progress.notify_all()
+
+    def sync(self, timeout=SYNC_TIMEOUT):
+        """Waits until the lines written to the log so far have been processed"""
+        target = self.file_size() - self.start_size
+        deadline = time.time() + timeout
+        with self._progress:
+            while time.time() < deadline:
+                if target >= 0 and self.received >= target:
+                    break
+                if target < 0 and time.time() - self.last_data >= TAIL_SETTLE:
+                    # rotated, the size says nothing about what was read
+                    break
+                self._progress.wait(min(TAIL_SETTLE, max(deadline - time.time(), 0)))
+            else:
+                logger.warning('Tail of %s did not catch up in %ss', self.remote_filename, timeout)
+
+    def stop(self):
+        """Stops the tail, passing the last line to the callback even if it is not complete"""
+        if self._channel is not None:
+            self._channel.close()
+        if self._thread is not None:
+            self._thread.join(5)
+        if self._partial:
+            self.callback(self._partial.decode('utf-8', 'replace'))
+            self._partial = b''
+
 
 class LogValidator(object):
     """
@@ -22,11 +166,15 @@ class LogValidator(object):
     to be possible to skip particular ERROR log,
     but fail for wider range of other ERRORs.
 
+    After :py:meth:`fix_before_start` the log is streamed by ``tail -F`` and every line is
+    classified as it is written, :py:meth:`validate_logs` only waits for the tail to catch up.
+
     Args:
         remote_filename: path to the remote log file
         skip_patterns: array of skip regex patterns
         failure_patterns: array of failure regex patterns
         matched_patterns: array of expected regex patterns to be matched
+        stream: Stream the log instead of reading it by sftp in :py:meth:`validate_logs`
 
     Usage:
         .. code-block:: python
@@ -42,37 +190,55 @@ class LogValidator(object):
         self.skip_patterns = kwargs.pop('skip_patterns', [])
         self.failure_patterns = kwargs.pop('failure_patterns', [])
         self.matched_patterns = kwargs.pop('matched_patterns', [])
+        self._stream_logs = kwargs.pop('stream', True)
 
+        self._remote_filename = remote_filename
         self._remote_file_tail = SSHTail(remote_filename, **kwargs)
+        self._classifier = LogClassifier(
+            self.skip_patterns, self.failure_patterns, self.matched_patterns)
+        self._stream = None
         self.matches = {}
+        self.failures = []
 
     def fix_before_start(self):
+        if self._stream_logs and not self._remote_file_tail.is_container and \
+                not self._remote_file_tail.is_pod:
+            try:
+                self._remote_file_tail.connect()
+                self._stream = _TailStream(
+                    self._remote_file_tail, self._remote_filename, self._check_line)
+                self._stream.start()
+                return
+            except Exception as e:
+                logger.warning('Cannot stream %s, reading it at the end: %s',
+                               self._remote_filename, str(e))
+                self._stream = None
         self._remote_file_tail.set_initial_file_end()
 
     def validate_logs(self):
-        for line in self._remote_file_tail:
-            if self._check_skip_logs(line):
-                continue
-            self._check_fail_logs(line)
-            self._check_match_logs(line)
+        if self._stream is not None:
+            self._stream.sync()
+            self._stream.stop()
+            self._remote_file_tail._remote_file_size = (
+                self._stream.start_size + self._stream.received)
+            self._stream = None
+        else:
+            for line in self._remote_file_tail:
+                self._check_line(line)
+        if self.failures:
+            pattern, line = self.failures[0]
+            pytest.fail('Failure pattern {} was matched on line {}'.format(pattern, line))
         self._verify_match_logs()
 
-    def _check_skip_logs(self, line):
-        for pattern in self.skip_patterns:
-            if re.match(pattern, line):
-                logger.info('Skip pattern {} was matched on line {},\
-                            so skipping this line'.format(pattern, line))
-                return True
-        return False
-
-    def _check_fail_logs(self, line):
-        for pattern in self.failure_patterns:
-            if re.match(pattern, line):
-                pytest.fail('Failure pattern {} was matched on line {}'.format(pattern, line))
-
-    def _check_match_logs(self, line):
-        for pattern in self.matched_patterns:
-            if re.match(pattern, line):
+    def _check_line(self, line):
+        kind, patterns = self._classifier.classify(line.rstrip())
+        if kind == 'skip':
+            logger.info('Skip pattern {} was matched on line {},\
+                        so skipping this line'.format(patterns[0], line))
+        elif kind == 'failure':
+            self.failures.append((patterns[0], line))
+        elif kind == 'matched':
+            for pattern in patterns:
                 logger.info('Expected pattern {} was matched on line {}'.format(pattern, line))
                 self.matches[pattern] = True
 
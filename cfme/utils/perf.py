@@ -3,43 +3,108 @@ import time
 
 from cfme.fixtures.pytest_store import store
 from cfme.utils.log import logger
+from cfme.utils.quote import quote
 from cfme.utils.ssh import SSHClient, SSHTail
 
 
-def collect_log(ssh_client, log_prefix, local_file_name, strip_whitespace=False):
-    """Collects all of the logs associated with a single log prefix (ex. evm or top_output) and
-    combines to single gzip log file.  The log file is then scp-ed back to the host.
+LOG_DIR = '/var/www/miq/vmdb/log'
+#: Timestamp of a log line, evm.log style (``[2018-02-15T08:21:27.123456 #1234:...]``)
+LOG_TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S'
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Keeps the lines logged between since and until; the lines without a timestamp (eg. backtraces)
+# go with the last line that had one
+_TIME_FILTER = (
+    "awk -v since={since} -v until={until} 'BEGIN {{ keep = (since == \"\") }} "
+    "{{ if (match($0, /[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]"
+    "T[0-9][0-9]:[0-9][0-9]:[0-9][0-9]/)) "
+    "{{ t = substr($0, RSTART, RLENGTH); "
+    "keep = (since == \"\" || t >= since) && (until == \"\" || t <= until) }} "
+    "if (keep) print }}'")
+
+
+def log_bundle_command(log_prefix, strip_whitespace=False, since=None, until=None,
+                       log_dir=LOG_DIR):
+    """Returns the shell pipeline writing the gzipped logs of the prefix to its stdout
+
+    The rotated logs (``<prefix>.log-*``, gzipped or not) come first, in the order of their names,
+    then the current log. Nothing is written to the disk.
+
+    Args:
+        log_prefix: Prefix of the log, eg. ``evm`` or ``top_output``
+        strip_whitespace: Strip the leading and trailing whitespace and drop the empty lines
+        since: :py:class:`datetime.datetime` (in UTC, like the logs) of the first line to keep;
+            the rotated logs last modified before are not read at all
+        until: :py:class:`datetime.datetime` of the last line to keep
+        log_dir: Directory of the logs
     """
-    log_dir = '/var/www/miq/vmdb/log/'
-
-    log_file = '{}{}.log'.format(log_dir, log_prefix)
-    dest_file = '{}{}.perf.log'.format(log_dir, log_prefix)
-    dest_file_gz = '{}{}.perf.log.gz'.format(log_dir, log_prefix)
-
-    ssh_client.run_command('rm -f {}'.format(dest_file_gz))
-
-    result = ssh_client.run_command('ls -1 {}-*'.format(log_file))
-    if result.success:
-        files = result.output.strip().split('\n')
-        for lfile in sorted(files):
-            ssh_client.run_command('cp {} {}-2.gz'.format(lfile, lfile))
-            ssh_client.run_command('gunzip {}-2.gz'.format(lfile))
-            if strip_whitespace:
-                ssh_client.run_command('sed -i  \'s/^ *//; s/ *$//; /^$/d; /^\s*$/d\' '
-                    '{}-2'.format(lfile))
-            ssh_client.run_command('cat {}-2 >> {}'.format(lfile, dest_file))
-            ssh_client.run_command('rm {}-2'.format(lfile))
-
-    ssh_client.run_command('cp {} {}-2'.format(log_file, log_file))
+    log_file = '{}.log'.format(log_prefix)
+    if since is None:
+        rotated = 'ls -1 {}-* 2> /dev/null'.format(quote(log_file))
+    else:
+        rotated = 'find . -maxdepth 1 -name {} -newermt {} -printf "%f\\n"'.format(
+            quote('{}-*'.format(log_file)), quote(since.strftime('%Y-%m-%d %H:%M:%S')))
+    command = (
+        'set -o pipefail; cd {log_dir} && '
+        'for f in $({rotated} | sort) {log_file}; do '
+        'case "$f" in *.gz) zcat -- "$f";; *) cat -- "$f";; esac; done'.format(
+            log_dir=quote(log_dir), rotated=rotated, log_file=quote(log_file)))
+    if since is not None or until is not None:
+        command += ' | ' + _TIME_FILTER.format(
+            since=quote(since.strftime(LOG_TIMESTAMP_FORMAT) if since else ''),
+            until=quote(until.strftime(LOG_TIMESTAMP_FORMAT) if until else ''))
     if strip_whitespace:
-        ssh_client.run_command('sed -i  \'s/^ *//; s/ *$//; /^$/d; /^\s*$/d\' '
-            '{}-2'.format(log_file))
-    ssh_client.run_command('cat {}-2 >> {}'.format(log_file, dest_file))
-    ssh_client.run_command('rm {}-2'.format(log_file))
-    ssh_client.run_command('gzip {}{}.perf.log'.format(log_dir, log_prefix))
-
-    ssh_client.get_file(dest_file_gz, local_file_name)
-    ssh_client.run_command('rm -f {}'.format(dest_file_gz))
+        command += " | sed 's/^ *//; s/ *$//; /^$/d; /^\\s*$/d'"
+    return command + ' | gzip -c'
+
+
+def collect_log(ssh_client, log_prefix, local_file_name, strip_whitespace=False, since=None,
+                until=None):
+    """Collects all of the logs associated with a single log prefix (ex. evm or top_output) and
+    combines to single gzip log file.
+
+    The logs are streamed through one remote pipeline (see :py:func:`log_bundle_command`) over one
+    SSH channel right into the local file, no copies are made on the appliance.
+
+    Args:
+        ssh_client: :py:class:`cfme.utils.ssh.SSHClient` of the appliance
+        log_prefix: Prefix of the log, eg. ``evm`` or ``top_output``
+        local_file_name: Path of the local gzip file
+        strip_whitespace: Strip the leading and trailing whitespace and drop the empty lines
+        since: Keep the lines logged since this UTC :py:class:`datetime.datetime`
+        until: Keep the lines logged until this UTC :py:class:`datetime.datetime`
+    """
+    command = log_bundle_command(log_prefix, strip_whitespace, since, until)
+    logger.info('Collecting %s logs into %s', log_prefix, local_file_name)
+    started = time.time()
+    session = ssh_client.get_transport().open_session()
+    session.exec_command('bash -c {}'.format(quote(command)))
+    size = 0
+    errors = []
+    with open(local_file_name, 'wb') as local_file:
+        while True:
+            if session.recv_ready():
+                data = session.recv(STREAM_CHUNK_SIZE)
+                local_file.write(data)
+                size += len(data)
+            elif session.recv_stderr_ready():
+                errors.append(session.recv_stderr(STREAM_CHUNK_SIZE))
+            elif session.exit_status_ready():
+                # the output may still be arriving after the exit status
+                data = session.recv(STREAM_CHUNK_SIZE)
+                if not data:
+                    break
+                local_file.write(data)
+                size += len(data)
+            else:
+                time.sleep(0.01)
+    exit_status = session.recv_exit_status()
+    session.close()
+    if exit_status != 0:
+        raise Exception('Collecting {} logs failed ({}): {}'.format(
+            log_prefix, exit_status, b''.join(errors).decode('utf-8', 'replace')))
+    logger.info('Collected %s logs, %d bytes compressed, in %.1fs',
+                log_prefix, size, time.time() - started)
 
 
 def convert_top_mem_to_mib(top_mem):
@@ -9,6 +9,7 @@ dict and will provide you with whatever you ask for with no limitations.
 The main clue to know what is limited by the filters and what isn't is the 'filters' parameter.
 """
 import operator
+import time
 from collections import Mapping, OrderedDict
 from copy import copy
 
@@ -236,12 +237,128 @@ global_filters['enabled_only'] = ProviderFilter(required_tags=['disabled'], inve
 global_filters['restrict_version'] = ProviderFilter(restrict_version=True)
 
 
-def list_providers(filters=None, use_global_filters=True):
+def _freeze(value):
+    """ Turns the filter attributes into something hashable, raises TypeError if not possible """
+    if isinstance(value, Mapping):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    elif isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    elif isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(item) for item in value)
+    hash(value)
+    return value
+
+
+class ProviderCatalog(object):
+    """ Provider crud objects of one appliance, with memoized filtering
+
+    The crud objects are created only once for every provider in the yamls and every distinct
+    filter is evaluated at most once against each of them, so the repeated
+    :py:func:`list_providers` calls done during the test collection mostly just look up already
+    known results.
+
+    Args:
+        appliance: The appliance the crud objects are bound to
+    """
+    def __init__(self, appliance=None):
+        self.appliance = appliance
+        self.keys = list(providers_data)
+        self._providers = {}
+        self._filter_cache = {}
+        self._query_cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __getitem__(self, key):
+        if key not in self._providers:
+            self._providers[key] = get_crud(key)
+        return self._providers[key]
+
+    @staticmethod
+    def filter_signature(prov_filter):
+        """ Returns hashable representation of the filter or ``None`` if it cannot be memoized """
+        if type(prov_filter) is not ProviderFilter:
+            # Subclasses or plain callables may have state we know nothing about
+            return None
+        try:
+            return _freeze((
+                prov_filter.keys, prov_filter.classes, prov_filter.required_fields,
+                prov_filter.required_tags, prov_filter.required_flags,
+                bool(prov_filter.restrict_version), prov_filter.inverted,
+                prov_filter.conjunctive))
+        except TypeError:
+            return None
+
+    def _passing(self, prov_filter, signature, keys):
+        """ Returns the subset of the keys of the providers passing the filter
+
+        The filter is evaluated lazily, only against the providers that were not filtered out
+        before, exactly like when the filters are applied one after another.
+        """
+        if signature is None:
+            return {key for key in keys if prov_filter(self[key])}
+        results = self._filter_cache.setdefault(signature, {})
+        for key in keys:
+            if key not in results:
+                results[key] = bool(prov_filter(self[key]))
+        return {key for key in keys if results[key]}
+
+    def filter_keys(self, filters):
+        """ Returns keys of the providers passing all the filters, in the order of the yamls """
+        signatures = [self.filter_signature(prov_filter) for prov_filter in filters]
+        query = tuple(signatures) if None not in signatures else None
+        if query is not None and query in self._query_cache:
+            self.hits += 1
+            list_providers_stats['cached'] += 1
+            keys = self._query_cache[query]
+        else:
+            self.misses += 1
+            passing = set(self.keys)
+            for prov_filter, signature in zip(filters, signatures):
+                passing = self._passing(prov_filter, signature, passing)
+            keys = [key for key in self.keys if key in passing]
+            if query is not None:
+                self._query_cache[query] = keys
+        return list(keys)
+
+    def filter(self, filters):
+        """ Returns the memoized provider crud objects passing all the filters
+
+        The objects are shared by all the callers, they are meant for evaluating filters only.
+        """
+        return [self[key] for key in self.filter_keys(filters)]
+
+
+# Catalog of the current appliance, see :py:func:`provider_catalog`
+_catalog = None
+# Default for the use_catalog parameter of list_providers
+use_provider_catalog = True
+# Time spent in list_providers and the number of calls, reported at the end of the collection
+list_providers_stats = {'calls': 0, 'cached': 0, 'time': 0.0}
+
+
+def provider_catalog():
+    """ Returns the :py:class:`ProviderCatalog` for the current appliance
+
+    A new catalog is created whenever the current appliance changes.
+    """
+    global _catalog
+    from cfme.utils.appliance import get_or_create_current_appliance
+    appliance = get_or_create_current_appliance()
+    if _catalog is None or _catalog.appliance is not appliance:
+        _catalog = ProviderCatalog(appliance)
+    return _catalog
+
+
+def list_providers(filters=None, use_global_filters=True, use_catalog=None):
     """ Lists provider crud objects, global filter optional
 
     Args:
         filters: List if :py:class:`ProviderFilter` or None
         use_global_filters: Will apply global filters as well if `True`, will not otherwise
+        use_catalog: Use the memoized :py:func:`provider_catalog` if `True`, create new crud
+            objects and evaluate all the filters from scratch if `False`. Module-wide
+            ``use_provider_catalog`` is used if `None`.
 
     Note: Requires the framework to be pointed at an appliance to succeed.
 
@@ -251,12 +368,22 @@ def list_providers(filters=None, use_global_filters=True):
         raise TypeError(
             'You are probably using the old-style invocation of provider setup functions! '
             'You need to change it appropriately.')
+    started = time.time()
     filters = filters or []
     if use_global_filters:
         filters = filters + list(global_filters.values())
-    providers = [get_crud(prov_key) for prov_key in providers_data]
-    for prov_filter in filters:
-        providers = list(filter(prov_filter, providers))
+    if use_catalog is None:
+        use_catalog = use_provider_catalog
+    if use_catalog:
+        # Only the filtering is memoized, every caller gets its own crud objects as tests modify
+        # them, including their endpoints and credentials
+        providers = [get_crud(prov_key) for prov_key in provider_catalog().filter_keys(filters)]
+    else:
+        providers = [get_crud(prov_key) for prov_key in providers_data]
+        for prov_filter in filters:
+            providers = list(filter(prov_filter, providers))
+    list_providers_stats['calls'] += 1
+    list_providers_stats['time'] += time.time() - started
     return providers
 
 
@@ -0,0 +1,178 @@
+"""Long-lived Rails evaluation session over SSH
+
+Every ``bin/rails runner`` and ``bin/rails c`` boots Rails, which takes 20-40 seconds.
+:py:class:`RailsSession` boots it once: it runs ``data/utils/rails_session.rb`` on a dedicated SSH
+channel, which reads Ruby snippets from stdin and evaluates them in the booted process, so the
+following calls take milliseconds.
+
+The protocol is framed, a request is ``<length>\\n<JSON>`` and a reply is
+``<marker> <length>\\n<JSON>``. Output before the marker (Rails boot messages) is skipped. A call
+that does not finish in its timeout kills the process, a dead process is spawned again by the next
+call.
+
+:py:meth:`cfme.utils.ssh.SSHClient.run_rails_command` and
+:py:meth:`cfme.utils.ssh.SSHClient.run_rails_console` use it when they can.
+"""
+import json
+import socket
+import threading
+import time
+
+import gevent
+
+from cfme.utils.log import logger
+from cfme.utils.path import data_path
+from cfme.utils.ssh import RUNCMD_TIMEOUT, SSHResult
+
+#: Seconds to wait for Rails to boot
+RAILS_BOOT_TIMEOUT = 300
+SESSION_SCRIPT = data_path.join('utils', 'rails_session.rb')
+REMOTE_SESSION_SCRIPT = '/tmp/rails_session.rb'
+MARKER = b'#RAILS-SESSION#'
+RECV_SIZE = 64 * 1024
+
+
+class RailsSessionError(Exception):
+    """Raised when the session cannot be started or dies during a call"""
+    pass
+
+
+class RailsSession(object):
+    """One Rails process on a dedicated channel of the SSH client, evaluating Ruby snippets
+
+    The calls are serialized. The session is only supported when logged in as root directly on the
+    appliance, containers and pods need the one-off processes.
+
+    Args:
+        ssh_client: The :py:class:`cfme.utils.ssh.SSHClient` of the appliance
+        boot_timeout: Seconds to wait for Rails to boot
+    """
+    def __init__(self, ssh_client, boot_timeout=RAILS_BOOT_TIMEOUT):
+        self.ssh_client = ssh_client
+        self.boot_timeout = boot_timeout
+        self.pid = None
+        self.spawns = 0
+        self.calls = 0
+        # Set when the session could not be started, the callers use one-off processes then
+        self.broken = False
+        self._channel = None
+        self._buffer = b''
+        self._lock = threading.Lock()
+
+    @property
+    def supported(self):
+        client = self.ssh_client
+        return (not self.broken and not client.is_container and not client.is_pod and
+                client.username == 'root')
+
+    @property
+    def alive(self):
+        return (self._channel is not None and not self._channel.closed and
+                not self._channel.exit_status_ready())
+
+    def _open_channel(self):
+        """Uploads the session script and runs it, returns the channel"""
+        self.ssh_client.put_file(SESSION_SCRIPT.strpath, REMOTE_SESSION_SCRIPT)
+        channel = self.ssh_client.get_transport().open_session()
+        channel.exec_command(
+            'cd /var/www/miq/vmdb; exec bin/rails runner {}'.format(REMOTE_SESSION_SCRIPT))
+        return channel
+
+    def _spawn(self):
+        logger.info('Starting Rails session on %r', self.ssh_client)
+        started = time.time()
+        self._channel = self._open_channel()
+        self._buffer = b''
+        self.spawns += 1
+        try:
+            ready = self._read_reply(self.boot_timeout)
+        except (RailsSessionError, socket.timeout) as e:
+            self.close()
+            self.broken = True
+            raise RailsSessionError('Rails session did not start: {}'.format(e))
+        self.pid = ready['pid']
+        logger.info('Rails session started in %.1fs, pid %s', time.time() - started, self.pid)
+
+    def _read_reply(self, timeout):
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            start = self._buffer.find(MARKER)
+            if start >= 0:
+                header_end = self._buffer.find(b'\n', start)
+                if header_end >= 0:
+                    length = int(self._buffer[start + len(MARKER):header_end])
+                    end = header_end + 1 + length
+                    if len(self._buffer) >= end:
+                        if start:
+                            logger.debug('Rails session: %s', self._buffer[:start].decode(
+                                'utf-8', 'replace').rstrip())
+                        payload = self._buffer[header_end + 1:end]
+                        self._buffer = self._buffer[end:]
+                        return json.loads(payload.decode('utf-8'))
+            if self._channel.recv_stderr_ready():
+                logger.debug('Rails session stderr: %s', self._channel.recv_stderr(
+                    RECV_SIZE).decode('utf-8', 'replace').rstrip())
+            elif self._channel.recv_ready():
+                data = self._channel.recv(RECV_SIZE)
+                if not data:
+                    raise RailsSessionError('Rails session closed the output')
+                self._buffer += data
+            elif self._channel.closed or self._channel.exit_status_ready():
+                raise RailsSessionError(
+                    'Rails session exited: {}'.format(self._buffer.decode('utf-8', 'replace')))
+            elif deadline is not None and time.time() > deadline:
+                raise socket.timeout('Rails session did not reply in {}s'.format(timeout))
+            else:
+                gevent.sleep(0.01)
+
+    def run(self, code, timeout=RUNCMD_TIMEOUT, sandbox=False, runner=False):
+        """Evaluates the Ruby code, starting the session if it is not running
+
+        Args:
+            code: The Ruby code
+            timeout: Seconds the call may take, the process is killed after that
+            sandbox: Roll back the database changes of the code
+            runner: The code may be a path of a file to run, like with ``bin/rails runner``
+        Returns:
+            A :py:class:`cfme.utils.ssh.SSHResult` with the output of the code and the return
+            code, 1 if it raised an exception, the exit status if it exited.
+        Raises:
+            RailsSessionError: If the session cannot be started
+            socket.timeout: If the code did not finish in time
+        """
+        with self._lock:
+            if not self.alive:
+                self._spawn()
+            request = json.dumps({'code': code, 'sandbox': sandbox, 'runner': runner})
+            request = request.encode('utf-8')
+            self.calls += 1
+            started = time.time()
+            try:
+                self._channel.sendall('{}\n'.format(len(request)).encode('utf-8') + request)
+                reply = self._read_reply(timeout)
+            except socket.timeout:
+                logger.error('Rails code %r did not finish in %ss, killing the session',
+                             code, timeout)
+                self.kill()
+                raise
+            except (RailsSessionError, socket.error) as e:
+                logger.error('Rails session died running %r: %s', code, e)
+                self.close()
+                return SSHResult(rc=1, output=str(e), command=code)
+            logger.debug('Rails code took %.3fs', time.time() - started)
+            if reply['rc']:
+                logger.warning('Exit code %d!', reply['rc'])
+            return SSHResult(rc=reply['rc'], output=reply['output'], command=code)
+
+    def kill(self):
+        """Kills the process, for when it is stuck in a call"""
+        if self.pid is not None:
+            self.ssh_client.run_command('kill -9 {}'.format(self.pid), timeout=30)
+        self.close()
+
+    def close(self):
+        """Closes the channel; the process ends when it reads the end of its input"""
+        if self._channel is not None:
+            self._channel.close()
+        self._channel = None
+        self.pid = None
@@ -1,10 +1,25 @@
 # -*- coding: utf-8 -*-
 """Helper functions for tests using REST API."""
+import re
+from collections import namedtuple, OrderedDict
+from multiprocessing.pool import ThreadPool
+
 import pytest
-from collections import namedtuple
+import six
+from manageiq_client.filters import gen_filter
 
 from cfme.exceptions import OptionNotAvailable
-from cfme.utils.wait import wait_for
+from cfme.utils.wait import Backoff, TimedOutError, wait_for
+
+# Number of resources requested in one page by query_resources
+QUERY_PAGE_SIZE = 1000
+# Number of values matched in one request by find_resources_by, keeps the URL reasonably short
+QUERY_CHUNK_SIZE = 50
+# Number of requests query_resources and find_resources_by have in flight at once
+QUERY_WORKERS = 4
+# Delay between the queries of wait_for_resources, grows up to the max delay
+WAIT_POLL_DELAY = 0.5
+WAIT_POLL_MAX_DELAY = 10
 
 
 def assert_response(
@@ -125,6 +140,138 @@ def get_vms_in_service(service):
     return [rest_api.get_entity('vms', vm['id']) for vm in service.vms.all]
 
 
+def _map_concurrently(func, items, workers):
+    items = list(items)
+    if len(items) < 2 or workers < 2:
+        return [func(item) for item in items]
+    pool = ThreadPool(min(workers, len(items)))
+    try:
+        return pool.map(func, items)
+    finally:
+        pool.close()
+
+
+def query_resources(collection, attributes=None, filters=None, page_size=QUERY_PAGE_SIZE,
+                    workers=QUERY_WORKERS):
+    """Returns raw data of all the resources in the collection matching the filters.
+
+    The resources are requested expanded, in pages of ``page_size``, so there are only a few
+    requests even for big collections. The first page tells how many resources there are,
+    the rest of the pages is requested concurrently.
+
+    Args:
+        collection: REST API collection, e.g. ``appliance.rest_api.collections.vms``
+        attributes: List of attributes to return; only the ``id`` and ``href`` are returned
+            besides them. All the attributes are returned if ``None``.
+        filters: List of ``filter[]`` expressions
+        page_size: Number of resources in one response
+        workers: Number of pages requested at once
+
+    Returns: List of dictionaries with the resource data.
+    """
+    api = collection._api
+    params = {'expand': 'resources', 'limit': page_size}
+    if attributes:
+        params['attributes'] = ','.join(attributes)
+    if filters:
+        params['filter[]'] = list(filters)
+
+    def _get_page(offset):
+        return api.get(collection._href, offset=offset, **params)
+
+    first_page = _get_page(0)
+    resources = list(first_page.get('resources', []))
+    # subquery_count is the number of matching resources when filtering
+    total = first_page.get('subquery_count' if filters else 'count', len(resources))
+    for page in _map_concurrently(_get_page, range(page_size, total, page_size), workers):
+        resources.extend(page.get('resources', []))
+    return resources
+
+
+def find_resources_by(collection, field, values, attributes=None, chunk_size=QUERY_CHUNK_SIZE,
+                      workers=QUERY_WORKERS):
+    """Returns raw data of the resources having ``field`` equal to any of the ``values``.
+
+    The values are matched by ``or``-ed filters, ``chunk_size`` values in one request.
+
+    Returns: List of dictionaries with the resource data, see :py:func:`query_resources`.
+    """
+    values = list(values)
+    if attributes and field not in attributes:
+        attributes = list(attributes) + [field]
+
+    def _find_chunk(chunk):
+        filters = [gen_filter(field, '=', value, is_or=bool(i)) for i, value in enumerate(chunk)]
+        return query_resources(collection, attributes=attributes, filters=filters, workers=1)
+
+    chunks = [values[i:i + chunk_size] for i in range(0, len(values), chunk_size)]
+    return [
+        resource
+        for found in _map_concurrently(_find_chunk, chunks, workers)
+        for resource in found]
+
+
+def _value_matches(value, found):
+    """Compares the value as ``filter[]`` does, ``%`` matches any substring"""
+    if not isinstance(value, six.string_types) or '%' not in value:
+        return six.text_type(value) == six.text_type(found)
+    pattern = '.*'.join(re.escape(part) for part in value.split('%'))
+    return re.match('{}$'.format(pattern), six.text_type(found), re.DOTALL) is not None
+
+
+def wait_for_resources(collection, field, values, exist=True, num_sec=180,
+                       max_delay=WAIT_POLL_MAX_DELAY, message=None):
+    """Waits until resources with ``field`` equal to each of the ``values`` exist, or none exists.
+
+    All the values still pending are checked with one filtered query per poll (see
+    :py:func:`find_resources_by`), with the delay between the polls starting at half a second
+    and backing off up to ``max_delay``.
+
+    Args:
+        collection: REST API collection
+        field: Name of the attribute to match, e.g. ``name`` or ``id``
+        values: Values to wait for; ``%`` in a value matches any substring
+        exist: Wait for the resources to appear if ``True``, to disappear otherwise
+        num_sec: Timeout
+        max_delay: Maximum delay between the polls
+        message: Description of the wait for the logs
+
+    Raises:
+        TimedOutError: If some of the resources did not appear/disappear in time
+    """
+    message = message or 'resources in {} {}'.format(
+        collection.name, 'to appear' if exist else 'to disappear')
+    pending = list(OrderedDict.fromkeys(values))
+
+    def _check():
+        found = [
+            resource[field]
+            for resource in find_resources_by(collection, field, pending, attributes=[field])]
+        pending[:] = [
+            value for value in pending
+            if any(_value_matches(value, f) for f in found) != exist]
+        return not pending
+
+    try:
+        wait_for(_check, num_sec=num_sec, delay=Backoff(WAIT_POLL_DELAY, max_delay),
+                 message=message, very_quiet=True)
+    except TimedOutError:
+        raise TimedOutError('Timed out waiting for {}, pending: {}'.format(message, pending))
+
+
+def _resource_ids(resources):
+    """Groups ids of the resources by their collection"""
+    collections = OrderedDict()
+    for resource in resources:
+        collection = resource.collection
+        resource_id = resource.id
+        if isinstance(resource_id, six.string_types) and resource_id.isdigit():
+            # compared as numbers by filter[]
+            resource_id = int(resource_id)
+        collections.setdefault(collection._href, (collection, []))[1].append(resource_id)
+    return collections.values()
+
+
 def create_resource(rest_api, col_name, col_data, col_action='create', substr_search=False):
     """Creates new resource in collection."""
     collection = getattr(rest_api.collections, col_name)
@@ -137,16 +284,17 @@ def create_resource(rest_api, col_name, col_data, col_action='create', substr_se
     entities = action(*col_data)
     action_response = rest_api.response
     search_str = '%{}%' if substr_search else '{}'
+    searched = OrderedDict([('name', []), ('description', [])])
     for entity in col_data:
         if entity.get('name'):
-            wait_for(lambda: collection.find_by(
-                name=search_str.format(entity.get('name'))) or False, num_sec=180, delay=10)
+            searched['name'].append(search_str.format(entity.get('name')))
         elif entity.get('description'):
-            wait_for(lambda: collection.find_by(
-                description=search_str.format(entity.get('description'))) or False,
-                num_sec=180, delay=10)
+            searched['description'].append(search_str.format(entity.get('description')))
         else:
             raise NotImplementedError
+    for field, values in searched.items():
+        if values:
+            wait_for_resources(collection, field, values, num_sec=180)
 
     # make sure action response is preserved
     rest_api.response = action_response
@@ -165,8 +313,9 @@ def delete_resources_from_collection(
     collection.action.delete(*resources)
     _assert_response()
 
-    for resource in resources:
-        resource.wait_not_exists(num_sec=num_sec, delay=delay)
+    for resource_collection, ids in _resource_ids(resources):
+        wait_for_resources(
+            resource_collection, 'id', ids, exist=False, num_sec=num_sec, max_delay=delay)
 
     if not_found:
         with pytest.raises(Exception, match='ActiveRecord::RecordNotFound'):
@@ -191,12 +340,13 @@ def delete_resources_from_detail(
         getattr(resource.action.delete, method)()
         _assert_response()
 
-    # Wait for resource non-existence in separate loop so the delete actions are
-    # not delayed by waiting for the previously deleted resource to disappear.
-    # This way the combined wait time is likely to be much shorter.
-    for resource in resources:
-        resource.wait_not_exists(num_sec=num_sec, delay=delay)
+    # Wait for non-existence of all the resources at once, after all the delete actions,
+    # so the combined wait time is as short as possible.
+    for resource_collection, ids in _resource_ids(resources):
+        wait_for_resources(
+            resource_collection, 'id', ids, exist=False, num_sec=num_sec, max_delay=delay)
 
+    for resource in resources:
         with pytest.raises(Exception, match='ActiveRecord::RecordNotFound'):
             getattr(resource.action.delete, method)()
         _assert_response(http_status=404)
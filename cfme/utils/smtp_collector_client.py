@@ -1,8 +1,14 @@
 # -*- coding: utf-8 -*-
 
+import time
+
 from cfme.utils.timeutil import parsetime
+from cfme.utils.wait import TimedOutError
 import requests
 
+#: Longest time the collector holds one long poll request
+MAX_POLL = 60
+
 
 class SMTPCollectorClient(object):
     """Client for smtp_collector.py script
@@ -16,8 +22,17 @@ class SMTPCollectorClient(object):
         self._host = host
         self._port = port
 
-    def _query(self, method, path, **params):
-        return method("http://{}:{}/{}".format(self._host, self._port, path), params=params)
+    def _query(self, method, path, request_timeout=None, **params):
+        return method(
+            "http://{}:{}/{}".format(self._host, self._port, path), params=params,
+            timeout=request_timeout)
+
+    @staticmethod
+    def _convert_times(filter):
+        for key in ("time_from", "time_to"):
+            if isinstance(filter.get(key), parsetime):
+                filter[key] = filter[key].to_request_format()
+        return filter
 
     def clear_database(self):
         """Clear the database in collector
@@ -52,16 +67,39 @@ class SMTPCollectorClient(object):
             time_to: E-mail arrived before this time.
             text: Text matches exactly.
             text_like: Text is LIKE.
+            text_match: Text matches the SQLite full text query, eg. ``request approved``.
 
         Returns: List of dicts with e-mails matching the criteria.
         """
-        if filter.get("time_from") is not None:
-            if isinstance(filter["time_from"], parsetime):
-                filter["time_from"] = filter["time_from"].to_request_format()
-        if filter.get("time_to") is not None:
-            if isinstance(filter["time_to"], parsetime):
-                filter["time_to"] = filter["time_to"].to_request_format()
-        return self._query(requests.get, "messages", **filter).json()
+        return self._query(requests.get, "messages", **self._convert_times(filter)).json()
+
+    def wait_for_emails(self, count=1, timeout=120, **filter):
+        """Wait until at least ``count`` e-mails matching the filter arrived
+
+        The collector answers as soon as they arrive, instead of being polled.
+
+        Args:
+            count: Number of the matching e-mails to wait for
+            timeout: Seconds to wait
+            **filter: Filter keywords, see :py:meth:`get_emails`
+        Returns: List of dicts with the e-mails matching the criteria.
+        Raises:
+            :py:class:`cfme.utils.wait.TimedOutError` if fewer e-mails arrived in time.
+        """
+        filter = self._convert_times(filter)
+        deadline = time.time() + timeout
+        while True:
+            remaining = deadline - time.time()
+            wait = max(min(remaining, MAX_POLL), 0)
+            emails = self._query(
+                requests.get, "messages/wait", request_timeout=wait + 30,
+                count=count, timeout=wait, **filter).json()
+            if len(emails) >= count:
+                return emails
+            if remaining <= MAX_POLL:
+                raise TimedOutError(
+                    "{} e-mails matching {!r} arrived in {}s, expected {}".format(
+                        len(emails), filter, timeout, count))
 
     def get_html_report(self):
         return self._query(requests.get, "messages.html").text.strip()
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import gevent
+import shlex
 import socket
 import sys
 from subprocess import check_call
@@ -204,6 +205,7 @@ class SSHClient(paramiko.SSHClient):
     def close(self):
         with diaper:
             _client_session.remove(self)
+        self.close_rails_session()
         super(SSHClient, self).close()
 
     @property
@@ -409,16 +411,66 @@ class SSHClient(paramiko.SSHClient):
             "for ((i=0; i<instances; i++)) do while (($(date +%s) < $endtime)); "
             "do :; done & done".format(seconds, cpus), **kwargs)
 
-    def run_rails_command(self, command, timeout=RUNCMD_TIMEOUT, **kwargs):
+    @cached_property
+    def rails_session(self):
+        """The :py:class:`cfme.utils.rails_session.RailsSession` of this client"""
+        from cfme.utils.rails_session import RailsSession
+        return RailsSession(self)
+
+    def close_rails_session(self):
+        """Ends the Rails session, eg. so that it does not hold a database connection"""
+        # Not creating the session just to close it, and __del__ may run on a partial instance
+        session = getattr(self, '__dict__', {}).get('rails_session')
+        if session is not None:
+            session.close()
+
+    def _run_in_rails_session(self, code, timeout, **kwargs):
+        """Runs the code in the Rails session, returns ``None`` if the session is not usable"""
+        from cfme.utils.rails_session import RailsSessionError
+        if not self.rails_session.supported:
+            return None
+        try:
+            return self.rails_session.run(code, timeout=timeout, **kwargs)
+        except RailsSessionError as e:
+            logger.warning('Not using the Rails session: %s', str(e))
+            return None
+
+    def run_rails_command(self, command, timeout=RUNCMD_TIMEOUT, use_session=True, **kwargs):
+        """Runs ``bin/rails runner`` with the command, a shell quoted Ruby code or script path
+
+        The command is evaluated in the :py:attr:`rails_session` if possible, which saves the
+        Rails boot. That needs the command to be a single shell word and no ``run_command`` kwargs.
+
+        Args:
+            command: The argument of ``bin/rails runner``
+            timeout: Timeout after which the command execution fails
+            use_session: Set to False to run a new ``bin/rails runner`` process
+        """
         logger.info("Running rails command %r", command)
+        if use_session and not kwargs:
+            try:
+                words = shlex.split(command)
+            except ValueError:
+                words = None
+            if words and len(words) == 1:
+                result = self._run_in_rails_session(words[0], timeout, runner=True)
+                if result is not None:
+                    return result
         return self.run_command('cd /var/www/miq/vmdb; bin/rails runner {command}'.format(
             command=command), timeout=timeout, **kwargs)
 
-    def run_rails_console(self, command, sandbox=False, timeout=RUNCMD_TIMEOUT):
+    def run_rails_console(self, command, sandbox=False, timeout=RUNCMD_TIMEOUT, use_session=True):
         """Runs Ruby inside of rails console. stderr is thrown away right now but could prove useful
         for future performance analysis of the queries rails runs.  The command is encapsulated by
         double quotes. Sandbox rolls back all changes made to the database if used.
+
+        The command is evaluated in the :py:attr:`rails_session` if possible, unless
+        ``use_session`` is False. The output then contains only what the command prints.
         """
+        if use_session:
+            result = self._run_in_rails_session(command, timeout, sandbox=sandbox)
+            if result is not None:
+                return result
         if sandbox:
             return self.run_command('cd /var/www/miq/vmdb; echo \"{}\" '
                 '| bundle exec bin/rails c -s 2> /dev/null'.format(command), timeout=timeout)
@@ -1,5 +1,5 @@
+import time
 from contextlib import closing
-from subprocess import check_call, CalledProcessError
 from threading import Lock
 
 from cached_property import cached_property
@@ -21,6 +21,7 @@ from cfme.utils.conf import cfme_data, credentials
 from cfme.utils.log import logger
 from cfme.utils.providers import get_mgmt
 from cfme.utils.ssh import SSHClient
+from cfme.utils.template.image_cache import get_image_cache, ImageCacheError
 
 NUM_OF_TRIES = 3
 lock = Lock()
@@ -36,7 +37,16 @@ class TemplateUploadException(Exception):
     pass
 
 
-def log_wrap(process_message):
+STAGES = ('download', 'convert', 'upload', 'deploy')
+
+
+def log_wrap(process_message, stage=None):
+    """Logs the beginning and the result of the step
+
+    Args:
+        process_message: Description of the step
+        stage: One of :py:data:`STAGES` the time of the step is accounted to
+    """
     def decorate(func):
         def call(*args, **kwargs):
             log_name = args[0].log_name
@@ -44,7 +54,12 @@ def log_wrap(process_message):
             template_name = args[0].template_name
             logger.info("(template-upload) [%s:%s:%s] BEGIN %s",
                         log_name, provider_key, template_name, process_message)
-            result = func(*args, **kwargs)
+            started = time.time()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                if stage:
+                    args[0].record_stage(stage, time.time() - started)
             if result:
                 logger.info("(template-upload) [%s:%s:%s] END %s",
                             log_name, provider_key, template_name, process_message)
@@ -58,6 +73,17 @@ def log_wrap(process_message):
     return decorate
 
 
+def stage_report(uploaders):
+    """Returns the lines of the report of the time the uploaders spent in the stages"""
+    lines = ['{:<30} '.format('provider') + ' '.join('{:>9}'.format(s) for s in STAGES)]
+    for uploader in uploaders:
+        lines.append('{:<30} '.format(uploader.provider_key) + ' '.join(
+            '{:>8.1f}s'.format(uploader.stage_times[s]) if s in uploader.stage_times else
+            '{:>9}'.format('-')
+            for s in STAGES))
+    return lines
+
+
 class ProviderTemplateUpload(object):
     """ Base class for template management.
 
@@ -86,6 +112,10 @@ class ProviderTemplateUpload(object):
         self.template_name = template_name
         self.glance_key = kwargs.get('glance_key')  # available for multiple provider type
         self.image_url = image_url  # TODO default
+        self.stage_times = {}
+
+    def record_stage(self, stage, duration):
+        self.stage_times[stage] = self.stage_times.get(stage, 0) + duration
 
     @property
     def stream_url(self):
@@ -106,7 +136,7 @@ class ProviderTemplateUpload(object):
                          "Please specify stream with --stream", self.stream)
             raise TemplateUploadException("Cannot get stream URL.")
 
-    @property
+    @cached_property
     def raw_image_url(self):
         """ Returns URL to exact image file.
 
@@ -137,9 +167,25 @@ class ProviderTemplateUpload(object):
         """
         return self.raw_image_url.split("/")[-1]
 
+    @cached_property
+    def image_checksum(self):
+        """ Returns sha256 checksum of the image from SHA256SUM of the image directory, if any."""
+        try:
+            with closing(urlopen('/'.join([self.image_url, 'SHA256SUM']))) as sums:
+                lines = sums.read().decode('utf-8').splitlines()
+        except (URLError, IOError, ValueError):
+            return None
+        for line in lines:
+            fields = line.split()
+            if len(fields) == 2 and fields[1].lstrip('*') == self.image_name:
+                return fields[0]
+        return None
+
     @property
     def local_file_path(self):
-        return project_path.join(self.image_name).strpath
+        """ Returns path of the downloaded image, in the shared image cache."""
+        return (get_image_cache().lookup(self.raw_image_url) or
+                project_path.join(self.image_name).strpath)
 
     @property
     def mgmt(self):
@@ -215,7 +261,7 @@ class ProviderTemplateUpload(object):
                                                     **kwargs)
         return True
 
-    @log_wrap("deploy template")
+    @log_wrap("deploy template", stage='deploy')
     def deploy_template(self):
         deploy_args = {
             'vm_name': 'test_{}_{}'.format(self.template_name, gen_alphanumeric(8)),
@@ -231,30 +277,21 @@ class ProviderTemplateUpload(object):
             template.deploy(**deploy_args)
         return True
 
-    @log_wrap("download image locally")
+    @log_wrap("download image locally", stage='download')
     def download_image(self):
-        # Check if file exists already:
-        try:
-            check_call(['ls', self.local_file_path])
-        except CalledProcessError:
-            pass
-        else:
-            logger.info('Local image found, skipping download: %s', self.local_file_path)
-            return True
+        """ Downloads the image to the image cache shared by all the uploaders.
 
-        # Download file to cli-tool-client
+        Concurrent uploaders of the same image wait for a single download.
+        """
         try:
-            check_call(['curl',
-                        '--output',
-                        self.local_file_path,
-                        self.raw_image_url])
-        except CalledProcessError:
-            logger.exception('Failed download of image using curl')
+            get_image_cache().fetch(self.raw_image_url, checksum=self.image_checksum)
+        except ImageCacheError:
+            logger.exception('Failed download of image')
             return False
         else:
             return True
 
-    @log_wrap('add template to glance')
+    @log_wrap('add template to glance', stage='upload')
     def glance_upload(self):
         """Push template to glance server
         if session is true, use keystone auth session from self.mgmt
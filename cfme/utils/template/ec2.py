@@ -33,7 +33,7 @@ class EC2TemplateUpload(ProviderTemplateUpload):
         except Exception:
             return False
 
-    @log_wrap("upload image to bucket")
+    @log_wrap("upload image to bucket", stage='upload')
     def upload_image(self):
         try:
             self.mgmt.upload_file_to_s3_bucket(self.bucket_name,
@@ -43,7 +43,7 @@ class EC2TemplateUpload(ProviderTemplateUpload):
         except:
             return False
 
-    @log_wrap("import image from bucket")
+    @log_wrap("import image from bucket", stage='convert')
     def import_image(self):
         try:
             import_task_id = self.mgmt.import_image(s3bucket=self.bucket_name,
@@ -1,5 +1,4 @@
 import re
-from subprocess import check_call
 
 from cached_property import cached_property
 
@@ -27,18 +26,6 @@ class GoogleCloudTemplateUpload(ProviderTemplateUpload):
         }
         return creds
 
-    @log_wrap("download image locally")
-    def download_image(self):
-        # Check if file exists already:
-        if check_call('ls', self.local_file_path) == 0:
-            logger.info('Local image found, skipping download: %s', self.local_file_path)
-            return True
-
-        # Download file to cli-tool-client
-        return check_call('curl',
-                          '--output {}'.format(self.local_file_path),
-                          self.raw_image_url) == 0
-
     @log_wrap("create bucket on GCE")
     def create_bucket(self):
         if not self.mgmt.bucket_exists(self.bucket_name):
@@ -48,7 +35,7 @@ class GoogleCloudTemplateUpload(ProviderTemplateUpload):
                         self.log_name, self.provider, self.template_name, self.bucket_name)
         return True
 
-    @log_wrap("upload image to bucket")
+    @log_wrap("upload image to bucket", stage='upload')
     def upload_image(self):
         if self.mgmt.get_file_from_bucket(self.bucket_name, self.image_name):
             logger.info('(template-upload) [%s:%s:%s] File %s already exists on bucket.',
@@ -59,7 +46,7 @@ class GoogleCloudTemplateUpload(ProviderTemplateUpload):
 
         return True
 
-    @log_wrap("create template from image")
+    @log_wrap("create template from image", stage='convert')
     def create_template(self):
         image = self.mgmt.get_file_from_bucket(self.bucket_name, self.image_name)
         self.mgmt.create_image(image_name=self.template_name, bucket_url=image['selfLink'])
@@ -0,0 +1,248 @@
+"""Local cache of the appliance images for the template upload
+
+The images are stored by the sha256 digest of their content, ``<directory>/<digest>/<file name>``,
+with an index mapping the image URLs to the digests. All the uploaders of one run, and concurrent
+runs on the same machine, share the cache:
+
+* Only one download of an URL runs at a time, the others wait for it and use the result.
+* The image is downloaded by several concurrent ranged GETs when the server supports it. The parts
+  survive a failure, the next attempt resumes them.
+* The content is verified against the checksum, if one is given, before it gets into the cache.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import closing, contextmanager
+from multiprocessing.pool import ThreadPool
+
+import requests
+
+from cfme.utils.conf import cfme_data
+from cfme.utils.disk_cache import DiskCache
+from cfme.utils.log import logger
+from cfme.utils.path import cache_path
+
+#: Number of concurrent ranged GETs of one image
+DOWNLOAD_WORKERS = 4
+#: Size of the blocks read from the responses and the parts
+BLOCK_SIZE = 1024 * 1024
+#: Attempts to download one part
+PART_TRIES = 3
+
+CHECKSUM_ALGORITHMS = {32: 'md5', 40: 'sha1', 64: 'sha256', 128: 'sha512'}
+
+
+class ImageCacheError(Exception):
+    """Raised when an image cannot be downloaded or does not match its checksum"""
+    pass
+
+
+def _url_key(url):
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+
+def _validators(headers):
+    """Returns the response headers telling whether the remote file changed"""
+    return {
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+        'length': headers.get('Content-Length'),
+    }
+
+
+class ImageCache(object):
+    """Content-addressed cache of downloaded images
+
+    Args:
+        directory: Directory of the cache, ``template_upload.image_cache_dir`` in cfme_data or
+            ``.cache/images`` by default
+        workers: Number of concurrent ranged GETs of one image
+    """
+    _locks = {}
+    _locks_lock = threading.Lock()
+
+    def __init__(self, directory=None, workers=DOWNLOAD_WORKERS):
+        directory = (directory or cfme_data.get('template_upload', {}).get('image_cache_dir') or
+                     cache_path.join('images').strpath)
+        self.directory = str(directory)
+        self.workers = workers
+        for subdir in ('partial', 'locks'):
+            path = os.path.join(self.directory, subdir)
+            if not os.path.isdir(path):
+                try:
+                    os.makedirs(path)
+                except OSError:
+                    # created concurrently
+                    pass
+        self.index = DiskCache(os.path.join(self.directory, 'index.sqlite'), namespace='images')
+        self.session = requests.Session()
+        self.downloads = 0
+
+    @contextmanager
+    def _single_flight(self, url):
+        """Lets one thread of one process at a time work on the URL"""
+        key = _url_key(url)
+        with self._locks_lock:
+            lock = self._locks.setdefault((self.directory, key), threading.Lock())
+        with lock:
+            with open(os.path.join(self.directory, 'locks', key), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def lookup(self, url, checksum=None):
+        """Returns the path of the cached image of the URL, ``None`` if not cached
+
+        Args:
+            url: URL of the image
+            checksum: Hex digest the image must have, md5, sha1, sha256 or sha512
+        """
+        entry = self.index.get(url)
+        if entry is None or not os.path.isfile(entry['path']):
+            return None
+        algorithm = CHECKSUM_ALGORITHMS.get(len(checksum)) if checksum else None
+        if checksum and entry['checksums'].get(algorithm) != checksum.lower():
+            return None
+        return entry['path']
+
+    def fetch(self, url, checksum=None):
+        """Returns the path of the image of the URL, downloading it if not cached or changed
+
+        Without a checksum, the cached image is used if the server reports the same ETag,
+        modification time and size as when it was downloaded.
+
+        Raises:
+            ImageCacheError: If the download failed or the checksum does not match
+        """
+        if checksum and len(checksum) not in CHECKSUM_ALGORITHMS:
+            raise ImageCacheError('Unknown checksum type: {}'.format(checksum))
+        with self._single_flight(url):
+            path = self.lookup(url, checksum)
+            if path is not None and checksum:
+                logger.info('Using the cached image %s', path)
+                return path
+            try:
+                head = self.session.head(url, allow_redirects=True)
+                head.raise_for_status()
+            except requests.RequestException as e:
+                raise ImageCacheError('Cannot get {}: {}'.format(url, e))
+            if path is not None and self.index.get(url)['validators'] == _validators(head.headers):
+                logger.info('Using the cached image %s', path)
+                return path
+            return self._download(url, head, checksum)
+
+    def _download(self, url, head, checksum):
+        started = time.time()
+        self.downloads += 1
+        validators = _validators(head.headers)
+        length = int(head.headers.get('Content-Length') or 0)
+        partial = os.path.join(self.directory, 'partial', _url_key(url))
+        if length and head.headers.get('Accept-Ranges') == 'bytes':
+            part_size = -(-length // self.workers)
+            ranges = [
+                [start, min(start + part_size, length) - 1]
+                for start in range(0, length, part_size)]
+        else:
+            ranges = [[0, None]]
+        parts = [
+            (os.path.join(partial, 'part{}'.format(i)), start, end)
+            for i, (start, end) in enumerate(ranges)]
+
+        # Only the parts of the same file split the same way can be resumed
+        meta = dict(validators, ranges=ranges)
+        meta_path = os.path.join(partial, 'meta.json')
+        if os.path.isdir(partial):
+            try:
+                with open(meta_path) as f:
+                    resumable = json.load(f) == meta
+            except (IOError, ValueError):
+                resumable = False
+            if not resumable or not validators['etag'] and not validators['last_modified']:
+                shutil.rmtree(partial)
+        if not os.path.isdir(partial):
+            os.makedirs(partial)
+            with open(meta_path, 'w') as f:
+                json.dump(meta, f)
+
+        pool = ThreadPool(min(len(parts), self.workers))
+        try:
+            pool.map(lambda part: self._fetch_part(url, *part), parts)
+        finally:
+            pool.close()
+            pool.join()
+        downloaded = time.time()
+
+        name = url.rstrip('/').rsplit('/', 1)[-1]
+        assembled = os.path.join(partial, name)
+        algorithm = CHECKSUM_ALGORITHMS.get(len(checksum)) if checksum else None
+        hashes = {a: hashlib.new(a) for a in {'sha256', algorithm} if a}
+        with open(assembled, 'wb') as out:
+            for part_path, _, _ in parts:
+                with open(part_path, 'rb') as part:
+                    for block in iter(lambda: part.read(BLOCK_SIZE), b''):
+                        for h in hashes.values():
+                            h.update(block)
+                        out.write(block)
+        checksums = {a: h.hexdigest() for a, h in hashes.items()}
+        if checksum and checksums[algorithm] != checksum.lower():
+            shutil.rmtree(partial)
+            raise ImageCacheError('Checksum of {} does not match: {} != {}'.format(
+                url, checksums[algorithm], checksum))
+
+        object_dir = os.path.join(self.directory, checksums['sha256'])
+        path = os.path.join(object_dir, name)
+        if not os.path.isdir(object_dir):
+            os.makedirs(object_dir)
+        os.rename(assembled, path)
+        shutil.rmtree(partial)
+        self.index.set(url, {'path': path, 'checksums': checksums, 'validators': validators})
+        logger.info('Downloaded %s in %.1fs (%d parts, %.1f MB/s), verified in %.1fs',
+                    url, downloaded - started, len(parts),
+                    os.path.getsize(path) / 1024.0 / 1024 / max(downloaded - started, 0.001),
+                    time.time() - downloaded)
+        return path
+
+    def _fetch_part(self, url, path, start, end):
+        """Downloads the bytes ``start`` to ``end`` (or the whole file) to the part file,
+        resuming what is there already"""
+        for attempt in range(1, PART_TRIES + 1):
+            done = os.path.getsize(path) if os.path.exists(path) else 0
+            if end is not None and start + done > end:
+                return
+            headers = {}
+            if end is not None:
+                headers['Range'] = 'bytes={}-{}'.format(start + done, end)
+            try:
+                with closing(self.session.get(url, headers=headers, stream=True)) as response:
+                    response.raise_for_status()
+                    if end is not None and response.status_code != 206:
+                        raise ImageCacheError('Range requests not honoured for {}'.format(url))
+                    # a whole file download cannot be resumed
+                    with open(path, 'ab' if end is not None else 'wb') as f:
+                        for block in response.iter_content(BLOCK_SIZE):
+                            f.write(block)
+                if end is None:
+                    return
+            except (requests.RequestException, IOError) as e:
+                logger.warning('Download of %s from byte %d failed (attempt %d/%d): %s',
+                               url, start + done, attempt, PART_TRIES, e)
+        done = os.path.getsize(path) if os.path.exists(path) else 0
+        if end is None or start + done <= end:
+            raise ImageCacheError('Cannot download {} from byte {}'.format(url, start + done))
+
+
+_image_cache = None
+
+
+def get_image_cache():
+    """Returns the image cache shared by the uploaders of this process"""
+    global _image_cache
+    if _image_cache is None:
+        _image_cache = ImageCache()
+    return _image_cache
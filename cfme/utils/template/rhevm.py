@@ -27,7 +27,7 @@ class RHEVMTemplateUpload(ProviderTemplateUpload):
                                         requires_authentication=False)
         return True
 
-    @log_wrap("import template from Glance server")
+    @log_wrap("import template from Glance server", stage='upload')
     def import_template_from_glance(self):
         """Import the template from glance to local rhevm datastore, sucks."""
         self.mgmt.import_glance_image(
@@ -50,7 +50,7 @@ class RHEVMTemplateUpload(ProviderTemplateUpload):
                 rv_tmpl.update_nic(**nic_args)
         return True
 
-    @log_wrap('Deploy template to vm - before templatizing')
+    @log_wrap('Deploy template to vm - before templatizing', stage='convert')
     def deploy_vm_from_template(self):
         """Deploy a VM from the raw template with resource limits set from yaml"""
         stream_hardware = cfme_data.template_upload.hardware[self.stream]
@@ -65,7 +65,7 @@ class RHEVMTemplateUpload(ProviderTemplateUpload):
             raise TemplateUploadException('Failed to deploy VM from imported template')
         return True
 
-    @log_wrap('Add db disk to temp vm')
+    @log_wrap('Add db disk to temp vm', stage='convert')
     def add_disk_to_vm(self):
         """Add a disk with specs from cfme_data.template_upload
             Generally for database disk
@@ -88,7 +88,7 @@ class RHEVMTemplateUpload(ProviderTemplateUpload):
         logger.info('%s:%s Successfully added disk', self.provider_key, self.temp_vm_name)
         return True
 
-    @log_wrap('templatize temp vm with disk')
+    @log_wrap('templatize temp vm with disk', stage='convert')
     def templatize_vm(self):
         """Templatizes temporary VM. Result is template with two disks.
         """
@@ -37,7 +37,7 @@ class OpenshiftTemplateUpload(ProviderTemplateUpload):
     def create_destination_directory(self):
         return self.execute_ssh_command('mkdir -p {}'.format(self.destination_directory)).success
 
-    @log_wrap('download template')
+    @log_wrap('download template', stage='download')
     def download_template(self):
         return self.execute_ssh_command(
             'wget -q --no-parent --no-directories --reject "index.html*" '
@@ -16,7 +16,7 @@ class SCVMMTemplateUpload(ProviderTemplateUpload):
     def vhd_name(self):
         return "{}.vhd".format(self.template_name)
 
-    @log_wrap("upload VHD image to Library VHD folder")
+    @log_wrap("upload VHD image to Library VHD folder", stage='upload')
     def upload_vhd(self):
         script = """
                     (New-Object System.Net.WebClient).DownloadFile("{}", "{}{}")
@@ -30,7 +30,7 @@ class SCVMMTemplateUpload(ProviderTemplateUpload):
         except Exception:
             return False
 
-    @log_wrap("add HW Resource File and Template to Library")
+    @log_wrap("add HW Resource File and Template to Library", stage='convert')
     def make_template(self):
         script = """
             $JobGroupId01 = [Guid]::NewGuid().ToString()
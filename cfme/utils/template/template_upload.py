@@ -9,7 +9,8 @@ from miq_version import TemplateName
 from cfme.utils.conf import cfme_data
 from cfme.utils.log import logger, add_stdout_handler
 from cfme.utils.providers import list_provider_keys
-from cfme.utils.template.base import TemplateUploadException, PROVIDER_TYPES, ALL_STREAMS
+from cfme.utils.template.base import (
+    TemplateUploadException, PROVIDER_TYPES, ALL_STREAMS, stage_report)
 from cfme.utils.template.ec2 import EC2TemplateUpload
 from cfme.utils.template.gce import GoogleCloudTemplateUpload
 from cfme.utils.template.openstack import OpenstackTemplateUpload
@@ -127,6 +128,7 @@ if __name__ == '__main__':
         sys.exit(1)
 
     thread_queue = []
+    uploaders = []
 
     # threaded loop
     for provider_type in provider_types:
@@ -156,6 +158,7 @@ if __name__ == '__main__':
             thread = Thread(target=uploader.main)
             thread.daemon = True
             thread_queue.append(thread)
+            uploaders.append(uploader)
             thread.start()
 
     if not thread_queue:
@@ -164,3 +167,5 @@ if __name__ == '__main__':
 
     for thread in thread_queue:
         thread.join()
+
+    logger.info('Template upload stage times:\n%s', '\n'.join(stage_report(uploaders)))
@@ -12,7 +12,7 @@ class VMWareTemplateUpload(ProviderTemplateUpload):
     log_name = 'VSPHERE'
     image_pattern = re.compile(r'<a href="?\'?([^"\']*vsphere[^"\'>]*)')
 
-    @log_wrap("upload template")
+    @log_wrap("upload template", stage='upload')
     def upload_template(self):
         cmd_args = [
             "ovftool --noSSLVerify",
@@ -51,7 +51,7 @@ class VMWareTemplateUpload(ProviderTemplateUpload):
     def _temp_vm_mgmt(self):
         return self.mgmt.get_vm(self.temp_template_name)
 
-    @log_wrap("add disk to VM")
+    @log_wrap("add disk to VM", stage='convert')
     def add_disk_to_vm(self):
         # adding disk #1 (base disk is 0)
         result, msg = self._temp_vm_mgmt.add_disk(
@@ -59,7 +59,7 @@ class VMWareTemplateUpload(ProviderTemplateUpload):
             provision_type='thin')
         return result
 
-    @log_wrap("templatize VM")
+    @log_wrap("templatize VM", stage='convert')
     def templatize_vm(self):
         # move it to other datastore
         host = self.template_upload_data.get('host') or self.mgmt.list_host().pop()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Fakes shared by the tests of the utils"""
+import socket
+from collections import namedtuple
+
+import pytest
+
+Notify = namedtuple('Notify', 'payload')
+
+
+class FakeNotifyConnection(object):
+    """``LISTEN`` connection of psycopg2, readable when the test sends a notification"""
+    def __init__(self):
+        self.reader, self.writer = socket.socketpair()
+        self.notifies = []
+        self.pending = []
+        self.closed = False
+
+    def notify(self, *payloads):
+        self.pending.extend(Notify(str(payload)) for payload in payloads or ('',))
+        self.writer.send(b'x')
+
+    def fileno(self):
+        return self.reader.fileno()
+
+    def poll(self):
+        self.reader.recv(1024)
+        self.notifies.extend(self.pending)
+        self.pending = []
+
+    def close(self):
+        self.closed = True
+        self.reader.close()
+        self.writer.close()
+
+
+class UnreachableDb(object):
+    """``appliance.db`` of an appliance whose database cannot be connected to"""
+    class client(object):
+        db_url = 'postgresql://nobody@localhost:1/vmdb_production'
+
+
+@pytest.fixture
+def notify_connection():
+    return FakeNotifyConnection()
+
+
+@pytest.fixture
+def unreachable_db():
+    return UnreachableDb()
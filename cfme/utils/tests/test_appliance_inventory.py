@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from cfme.common.provider import BaseProvider
+from cfme.common.vm import BaseVM
+from cfme.utils import rest
+from cfme.utils.appliance.inventory import ApplianceInventory
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+RESOURCES = {
+    'providers': [{'id': '1', 'name': 'vsphere', 'type': 'ManageIQ::Providers::Vmware'}],
+    'vms': [
+        {'id': '10', 'name': 'vm_a', 'ems_id': 1},
+        {'id': '11', 'name': 'vm_b', 'ems_id': None},
+    ],
+    'templates': [],
+}
+
+
+class FakeCollection(object):
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeAppliance(object):
+    def __init__(self):
+        collections = type('Collections', (object,), {
+            name: FakeCollection(name) for name in RESOURCES})
+        self.rest_api = type('RestAPI', (object,), {'collections': collections})
+        self.inventory = ApplianceInventory(self)
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    queries = []
+
+    def query_resources(collection, attributes=None, **kwargs):
+        queries.append(collection.name)
+        return [dict(r) for r in RESOURCES[collection.name]]
+
+    monkeypatch.setattr(rest, 'query_resources', query_resources)
+    return queries
+
+
+def test_exists_served_from_memory(queries):
+    appliance = FakeAppliance()
+    provider = type('Provider', (object,), {'name': 'vsphere', 'appliance': appliance})
+    for _ in range(5):
+        assert BaseProvider.exists.fget(provider)
+    assert queries == ['providers']
+
+    vm = type('VM', (object,), {
+        'name': 'vm_a', 'appliance': appliance, 'provider': provider,
+        'INVENTORY_COLLECTION': 'vms', '_exists_in_inventory': BaseVM._exists_in_inventory})
+    for name, exists in [('vm_a', True), ('vm_b', False), ('vm_c', False)]:
+        vm.name = name
+        assert BaseVM.exists.fget(vm()) is exists
+    assert queries == ['providers', 'vms']
+
+
+def test_ttl_and_invalidation(queries):
+    inventory = FakeAppliance().inventory
+    inventory.ttl = 0.05
+    assert inventory.names('vms') == {'vm_a', 'vm_b'}
+    time.sleep(0.1)
+    inventory.names('vms')
+    assert queries == ['vms', 'vms']
+
+    inventory.ttl = 60
+    inventory.names('providers')
+    inventory.invalidate_target_types(['VmOrTemplate', None])
+    inventory.names('providers')
+    inventory.names('vms')
+    assert queries == ['vms', 'vms', 'providers', 'vms']
+    inventory.invalidate_target_types(['MiqRequest'])
+    inventory.names('providers')
+    assert queries[-1] == 'providers'
+    # always fresh when asked so
+    inventory.names('providers', max_age=0)
+    assert queries.count('providers') == 3
+
+
+def test_invalidated_while_fetching(monkeypatch):
+    inventory = FakeAppliance().inventory
+
+    def query_resources(collection, attributes=None, **kwargs):
+        # eg. the event listener thread drops the collection meanwhile
+        inventory.invalidate(collection.name)
+        return RESOURCES[collection.name]
+
+    monkeypatch.setattr(rest, 'query_resources', query_resources)
+    inventory.names('vms')
+    inventory.names('vms')
+    assert inventory.misses == 2
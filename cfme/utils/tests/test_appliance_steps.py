@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from cfme.utils.appliance.steps import Step, StepGraph
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+
+def sleeper(log, name, seconds=0.2):
+    def step():
+        log.append(('start', name))
+        time.sleep(seconds)
+        log.append(('end', name))
+    return step
+
+
+def test_independent_steps_run_concurrently():
+    log = []
+    graph = StepGraph([
+        Step('a', sleeper(log, 'a')),
+        Step('b', sleeper(log, 'b')),
+        Step('c', sleeper(log, 'c'), restart_evm=True),
+        Step('db', sleeper(log, 'db'), requires=['a', 'b']),
+        Step('after_db', sleeper(log, 'after_db'), requires=['db']),
+    ])
+    started = time.time()
+    timings = graph.run()
+    # three levels of 0.2s instead of five steps in sequence
+    assert time.time() - started < 0.8
+    assert set(timings) == {'a', 'b', 'c', 'db', 'after_db'}
+    assert log.index(('start', 'db')) > max(log.index(('end', 'a')), log.index(('end', 'b')))
+    assert log.index(('start', 'after_db')) > log.index(('end', 'db'))
+    assert graph.restart_requested
+    assert len(graph.format_timings()) == 5
+
+
+def test_disabled_steps():
+    log = []
+    graph = StepGraph([
+        Step('a', sleeper(log, 'a', 0), restart_evm=True, enabled=False),
+        Step('b', sleeper(log, 'b', 0), requires=['a']),
+    ])
+    graph.run()
+    assert log == [('start', 'b'), ('end', 'b')]
+    assert not graph.restart_requested
+
+
+def test_failure_stops_the_dependent_steps():
+    log = []
+
+    def fail():
+        raise RuntimeError('broken')
+
+    graph = StepGraph([
+        Step('fail', fail),
+        Step('slow', sleeper(log, 'slow')),
+        Step('dependent', sleeper(log, 'dependent', 0), requires=['fail']),
+    ])
+    with pytest.raises(RuntimeError):
+        graph.run()
+    # the running step finished, the dependent one never started
+    assert log == [('start', 'slow'), ('end', 'slow')]
+
+
+def test_workers_and_wrapper():
+    running = []
+    peak = []
+    entered = []
+    lock = threading.Lock()
+
+    @contextmanager
+    def wrapper():
+        entered.append(threading.current_thread().name)
+        yield
+
+    def step():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.pop()
+
+    StepGraph([Step(str(i), step) for i in range(6)], workers=2, wrapper=wrapper).run()
+    assert max(peak) == 2
+    assert len(entered) == 6
+
+
+def test_invalid_graphs():
+    with pytest.raises(ValueError):
+        StepGraph([Step('a', None, requires=['missing'])])
+    with pytest.raises(ValueError):
+        StepGraph([Step('a', None, requires=['b']), Step('b', None, requires=['a'])])
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+from six.moves.xmlrpc_server import SimpleXMLRPCRequestHandler, SimpleXMLRPCServer
+
+from cfme.utils.bz import Bugzilla
+from cfme.utils.disk_cache import DiskCache
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+CLONE_COMMENT = "+++ This bug was initially created as a clone of Bug #{} +++\n\nfoo"
+
+BUGS = {
+    1: dict(status="NEW", resolution="", dupe_of=None, blocks=[2, 3]),
+    2: dict(status="NEW", resolution="", dupe_of=None, blocks=[], copy_of=1),
+    3: dict(status="NEW", resolution="", dupe_of=None, blocks=[]),
+    4: dict(status="CLOSED", resolution="DUPLICATE", dupe_of=1, blocks=[]),
+}
+
+
+class FakeBugzilla(object):
+    """Minimal stand-in of the Bugzilla XML-RPC API, recording which bugs were asked for."""
+    def __init__(self):
+        self.requested = []
+
+    def _bug(self, bug_id):
+        data = dict(BUGS[bug_id])
+        copy_of = data.pop("copy_of", None)
+        data.update(
+            id=bug_id, summary="Bug {}".format(bug_id), product="ManageIQ",
+            comments=[{"text": CLONE_COMMENT.format(copy_of) if copy_of else "Description"}])
+        return data
+
+    def _dispatch(self, method, params):
+        if method == "Bugzilla.version":
+            return {"version": "5.0"}
+        elif method == "Bug.get":
+            ids = [int(bug_id) for bug_id in params[0]["ids"]]
+            self.requested.append(ids)
+            return {"bugs": [self._bug(bug_id) for bug_id in ids if bug_id in BUGS], "faults": []}
+        raise Exception("Method {} not supported".format(method))
+
+
+class BugzillaRequestHandler(SimpleXMLRPCRequestHandler):
+    rpc_paths = ('/xmlrpc.cgi',)
+
+
+@pytest.fixture
+def fake_bugzilla():
+    server = SimpleXMLRPCServer(
+        ("127.0.0.1", 0), requestHandler=BugzillaRequestHandler, logRequests=False,
+        allow_none=True)
+    fake = FakeBugzilla()
+    server.register_instance(fake)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield fake, "http://127.0.0.1:{}/xmlrpc.cgi".format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+def make_bugzilla(url, cache):
+    return Bugzilla(
+        url=url, user=None, password=None, cookiefile=None, tokenfile=None, disk_cache=cache)
+
+
+def test_disk_cache_shared_and_expiring(tmpdir):
+    path = tmpdir.join('cache.sqlite')
+    DiskCache(path, namespace='test', ttl=60).set_many({1: 'one', 2: 'two'})
+    assert DiskCache(path, namespace='test', ttl=60).get_many([1, 2, 3]) == {1: 'one', 2: 'two'}
+    assert DiskCache(path, namespace='other', ttl=60).get(1) is None
+    time.sleep(0.1)
+    assert DiskCache(path, namespace='test', ttl=0.05).get(1) is None
+
+
+def test_prefetch_fetches_variants_in_bulk(fake_bugzilla, tmpdir):
+    fake, url = fake_bugzilla
+    cache = DiskCache(tmpdir.join('blockers.sqlite'), namespace='bz', ttl=60)
+    bugzilla = make_bugzilla(url, cache)
+    bugzilla.prefetch_bugs([4])
+    requests_after_prefetch = len(fake.requested)
+    # One request per round of the variant expansion, not one per bug
+    assert requests_after_prefetch < len(BUGS)
+    variants = bugzilla.get_bug_variants(4)
+    assert {bug.id for bug in variants} == {1, 2}
+    assert len(fake.requested) == requests_after_prefetch
+
+    # Another process (eg. a parallelizer slave) is served from the shared cache
+    other_bugzilla = make_bugzilla(url, cache)
+    assert {bug.id for bug in other_bugzilla.get_bug_variants(4)} == {1, 2}
+    assert len(fake.requested) == requests_after_prefetch
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from cfme.utils.browser import BrowserManager
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+
+class FakeBrowser(object):
+    def __init__(self, number):
+        self.number = number
+        self.url_key = None
+        self.dead = False
+        self.closed = False
+
+    @property
+    def current_url(self):
+        if self.dead or self.closed:
+            raise WebDriverException('session gone')
+        return self.url_key
+
+    def get(self, url_key):
+        self.current_url
+        self.url_key = url_key
+
+
+class FakeFactory(object):
+    def __init__(self, launch_time=0):
+        self.launch_time = launch_time
+        self.launched = []
+        self.lock = threading.Lock()
+
+    def launch(self):
+        time.sleep(self.launch_time)
+        with self.lock:
+            browser = FakeBrowser(len(self.launched))
+            self.launched.append(browser)
+        return browser
+
+    def navigate(self, browser, url_key):
+        browser.get(url_key)
+        return browser
+
+    def create(self, url_key):
+        return self.navigate(self.launch(), url_key)
+
+    def close(self, browser):
+        if browser:
+            browser.closed = True
+
+
+def test_switch_between_appliances_without_quitting():
+    factory = FakeFactory()
+    manager = BrowserManager(factory, pool_size=2)
+    first = manager.ensure_open('https://a')
+    second = manager.ensure_open('https://b')
+    assert manager.ensure_open('https://a') is first
+    assert manager.ensure_open('https://b') is second
+    assert len(factory.launched) == 2
+    assert not first.closed and not second.closed
+
+    # the least recently used one makes room
+    manager.ensure_open('https://a')
+    manager.ensure_open('https://c')
+    assert second.closed and not first.closed
+    assert list(manager.sessions) == ['https://a', 'https://c']
+
+    manager.quit_all()
+    assert all(browser.closed for browser in factory.launched)
+    assert manager.browser is None and not manager.sessions
+
+
+def test_single_browser_by_default():
+    factory = FakeFactory()
+    manager = BrowserManager(factory)
+    first = manager.ensure_open('https://a')
+    cleanups = []
+    manager.add_cleanup(lambda: cleanups.append('a'))
+    manager.ensure_open('https://b')
+    assert first.closed and cleanups == ['a']
+    assert len(manager.sessions) == 1
+
+
+def test_idle_browsers_quit():
+    manager = BrowserManager(FakeFactory(), pool_size=3, idle_timeout=60)
+    first = manager.ensure_open('https://a')
+    manager.ensure_open('https://b')
+    first.last_used -= 61
+    manager.ensure_open('https://b')
+    assert first.closed
+    assert list(manager.sessions) == ['https://b']
+
+
+def test_warm_spare_replaces_dead_browser():
+    factory = FakeFactory(launch_time=0.2)
+    manager = BrowserManager(factory, pool_size=2, warm_spare=True)
+    first = manager.ensure_open('https://a')
+    manager._spare_thread.join()
+    assert manager._spare is not None
+
+    first.dead = True
+    started = time.time()
+    replacement = manager.ensure_open('https://a')
+    # the spare was launched already
+    assert time.time() - started < factory.launch_time
+    assert replacement is not first and first.closed
+    assert replacement.url_key == 'https://a'
+
+    manager.quit_all()
+    assert all(browser.closed for browser in factory.launched)
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from cfme.fixtures import collection_cache
+from cfme.utils.disk_cache import DiskCache
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+
+def test_manifest_invalidated_by_module_and_config_changes(tmpdir):
+    cache = DiskCache(tmpdir.join('collection.sqlite'), namespace='manifest')
+    module = tmpdir.join('test_foo.py')
+    module.write('def test_foo(provider):\n    pass\n')
+    nodeids = ['test_foo.py::test_foo[rhv]', 'test_foo.py::test_foo[vsphere]']
+    collection_cache.update({str(module): nodeids}, 'config1', cache=cache)
+
+    assert collection_cache.lookup([str(module)], cache=cache) == {str(module): nodeids}
+    assert collection_cache.lookup([str(module)], config='config1', cache=cache)
+    assert not collection_cache.lookup([str(module)], config='config2', cache=cache)
+
+    module.write('def test_foo(provider):\n    assert True\n')
+    assert not collection_cache.lookup([str(module)], cache=cache)
+
+
+def test_config_digest_depends_on_version():
+    assert (collection_cache.config_digest('5.9.0.1') ==
+            collection_cache.config_digest('5.9.0.1'))
+    assert (collection_cache.config_digest('5.9.0.1') !=
+            collection_cache.config_digest('5.10.0.1'))
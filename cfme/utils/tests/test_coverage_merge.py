@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+import random
+
+import pytest
+
+from cfme.utils import coverage_merge
+from cfme.utils.coverage_merge import (
+    CoverageMergeError, find_resultsets, iter_resultset, merge_resultsets)
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+SOURCES = ['/var/www/miq/vmdb/app/controllers/c{}.rb'.format(i) for i in range(40)] + [
+    # multi-byte characters span the chunks of the reads
+    u'/var/www/miq/vmdb/app/controllers/\u00fcbersicht_\u20ac_\U0001f600.rb']
+
+
+@pytest.fixture
+def resultsets(tmpdir):
+    """Result sets of 9 processes on 3 appliances, and the expected merged line hits"""
+    rand = random.Random(42)
+    shapes = {
+        source: [None if rand.random() < 0.3 else 0 for _ in range(rand.randint(1, 30))]
+        for source in SOURCES}
+    expected = {}
+    for n in range(9):
+        coverage = {}
+        for source in rand.sample(SOURCES[:-1], 25) + SOURCES[-1:]:
+            lines = [None if hit is None else rand.randint(0, 5) for hit in shapes[source]]
+            # newer simplecov stores the lines in a dict
+            coverage[source] = {'lines': lines} if n % 2 else lines
+            expected[source] = [
+                None if hit is None else hit + expected.get(source, [0] * len(lines))[i]
+                for i, hit in enumerate(lines)]
+        tmpdir.join('10.0.0.{}'.format(n % 3), str(n), '.resultset.json').write_binary(
+            json.dumps({'10.0.0.{}-{}'.format(n % 3, n): {
+                'coverage': coverage, 'timestamp': 1000 + n}}, indent=n % 3,
+                ensure_ascii=False).encode('utf-8'), ensure=True)
+    return find_resultsets(tmpdir.strpath), expected
+
+
+@pytest.mark.parametrize('processes', [1, 3])
+def test_merge_resultsets(resultsets, tmpdir, processes, monkeypatch):
+    # small reads make values span the chunks
+    monkeypatch.setattr(coverage_merge, 'READ_SIZE', 7)
+    paths, expected = resultsets
+    assert len(paths) == 9
+    output = tmpdir.join('merged.json').strpath
+    merge_resultsets(paths, output, processes=processes)
+    with open(output) as f:
+        merged = json.load(f)
+    assert merged['merged_data']['timestamp'] == 1008
+    assert merged['merged_data']['coverage'] == expected
+
+
+def test_iter_resultset_and_mismatch(tmpdir):
+    data = {'a': {'coverage': {'x.rb': [None, 1], 'y.rb': {'lines': [2]}}, 'timestamp': 12345}}
+    items = list(iter_resultset(io.BytesIO(json.dumps(data).encode('utf-8'))))
+    assert sorted(items, key=str) == sorted(
+        [('x.rb', [None, 1]), ('y.rb', [2]), (None, 12345)], key=str)
+
+    for i, lines in enumerate([[1, None], [None, 1], [None, 1, 0]]):
+        tmpdir.join(str(i), '.resultset.json').write(
+            json.dumps({'a': {'coverage': {'x.rb': lines}, 'timestamp': 1}}), ensure=True)
+    with pytest.raises(CoverageMergeError):
+        merge_resultsets([tmpdir.join('0', '.resultset.json'), tmpdir.join('1', '.resultset.json')],
+                         tmpdir.join('out.json'), processes=1)
+    with pytest.raises(CoverageMergeError):
+        merge_resultsets([tmpdir.join('1', '.resultset.json'), tmpdir.join('2', '.resultset.json')],
+                         tmpdir.join('out.json'), processes=1)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import psycopg2
+import pytest
+
+from cfme.utils import db
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+
+class Cursor(object):
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql, args=None):
+        if sql == 'TRIGGER SQL' and self.connection.fail:
+            raise psycopg2.ProgrammingError('permission denied')
+        self.connection.executed.append(sql)
+
+    def fetchone(self):
+        return (1,) if self.connection.trigger_exists else None
+
+
+class Connection(object):
+    def __init__(self, trigger_exists, fail=False):
+        self.trigger_exists = trigger_exists
+        self.fail = fail
+        self.executed = []
+        self.autocommit = False
+        self.closed = False
+
+    def cursor(self):
+        return Cursor(self)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize('trigger_exists', [False, True])
+def test_notify_connection(monkeypatch, trigger_exists):
+    connection = Connection(trigger_exists)
+    monkeypatch.setattr(psycopg2, 'connect', lambda url: connection)
+    assert db.notify_connection('postgresql://db', 'channel', 'TRIGGER SQL') is connection
+    assert connection.autocommit
+    assert connection.executed[-1] == 'LISTEN channel'
+    assert ('TRIGGER SQL' in connection.executed) is not trigger_exists
+
+
+def test_notify_connection_failures(monkeypatch, unreachable_db):
+    assert db.notify_connection(unreachable_db.client.db_url, 'channel', 'TRIGGER SQL') is None
+    connection = Connection(trigger_exists=False, fail=True)
+    monkeypatch.setattr(psycopg2, 'connect', lambda url: connection)
+    assert db.notify_connection('postgresql://db', 'channel', 'TRIGGER SQL') is None
+    assert connection.closed
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import pytest
+from sqlalchemy import create_engine
+
+from cfme.utils import db as db_module
+from cfme.utils.db import Db
+from cfme.utils.disk_cache import DiskCache
+from cfme.utils.wait import wait_for
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+
+@pytest.fixture
+def database(tmpdir, monkeypatch):
+    """Sqlite database standing in for the VMDB"""
+    engine = create_engine('sqlite:///{}'.format(tmpdir.join('vmdb.sqlite')))
+    engine.execute('CREATE TABLE schema_migrations (version VARCHAR PRIMARY KEY)')
+    engine.execute("INSERT INTO schema_migrations VALUES ('20180101000000')")
+    engine.execute('CREATE TABLE vms (id INTEGER PRIMARY KEY, name VARCHAR)')
+    engine.execute('CREATE TABLE hosts (id INTEGER PRIMARY KEY, name VARCHAR)')
+    engine.execute("INSERT INTO vms VALUES (1, 'vm1')")
+    disk_cache = DiskCache(tmpdir.join('db_schema.sqlite'), namespace='db-schema')
+    monkeypatch.setattr(db_module, 'get_schema_disk_cache', lambda: disk_cache)
+    monkeypatch.setattr(db_module, '_schema_cache', {})
+    monkeypatch.setattr(db_module, '_schemas_reflecting', set())
+    return engine, disk_cache
+
+
+def make_db(engine):
+    db = Db(hostname='vmdb', credentials={}, port=5432)
+    db.__dict__['engine'] = engine
+    return db
+
+
+def test_schema_reflected_once_and_shared(database):
+    engine, disk_cache = database
+    first = make_db(engine)
+    assert first.session.query(first['vms'].name).scalar() == 'vm1'
+    wait_for(lambda: disk_cache.get(first.schema_key) is not None, num_sec=10, delay=0.1)
+
+    # Another Db in the process gets all the tables without reflecting them
+    second = make_db(engine)
+    assert {'vms', 'hosts', 'schema_migrations'} <= set(second.metadata.tables)
+    assert second.metadata is not first.metadata
+    assert second.metadata.bind is engine
+    assert second.session.query(second['vms'].name).scalar() == 'vm1'
+
+    # A new process loads it from the disk
+    db_module._schema_cache.clear()
+    third = make_db(engine)
+    assert 'hosts' in third.metadata.tables
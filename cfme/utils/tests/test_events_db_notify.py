@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+from cfme.utils import events_db
+from cfme.utils.events_db import DbEventListener
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+
+class Appliance(object):
+    def __init__(self, db):
+        self.db = db
+
+
+class Listener(DbEventListener):
+    def __init__(self, connection, db, **kwargs):
+        super(Listener, self).__init__(Appliance(db), **kwargs)
+        self.connection = connection
+        self.calls = []
+
+    def _notify_connection(self):
+        return self.connection
+
+    def get_next_portion(self):
+        self.calls.append('poll')
+        return []
+
+    def get_notified_portion(self, ids):
+        self.calls.append(ids)
+        return []
+
+
+def run(listener):
+    thread = threading.Thread(target=listener.process_events)
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    assert condition()
+
+
+def test_push_mode(monkeypatch, notify_connection, unreachable_db):
+    monkeypatch.setattr(events_db, 'NOTIFY_WAIT', 0.05)
+    connection = notify_connection
+    listener = Listener(connection, unreachable_db, push=True)
+    thread = run(listener)
+    # one catch-up query after starting to listen
+    wait_until(lambda: listener.calls == ['poll'])
+    connection.notify(10, 11)
+    wait_until(lambda: listener.calls == ['poll', [10, 11]])
+    # idle, no queries
+    time.sleep(0.2)
+    assert listener.calls == ['poll', [10, 11]]
+    listener.stop()
+    thread.join(5)
+    assert not thread.is_alive() and connection.closed
+
+
+def test_polling_fallback(monkeypatch, unreachable_db):
+    monkeypatch.setattr(events_db, 'POLL_DELAY', 0.01)
+    listener = Listener(None, unreachable_db, push=True)
+    thread = run(listener)
+    wait_until(lambda: len(listener.calls) > 3)
+    listener.stop()
+    thread.join(5)
+    assert set(listener.calls) == {'poll'}
+
+
+def test_polling_by_default(monkeypatch, notify_connection, unreachable_db):
+    monkeypatch.setattr(events_db, 'POLL_DELAY', 0.01)
+    listener = Listener(notify_connection, unreachable_db)
+    thread = run(listener)
+    wait_until(lambda: len(listener.calls) > 3)
+    listener.stop()
+    thread.join(5)
+    assert set(listener.calls) == {'poll'}
+    assert not notify_connection.closed
+
+
+def test_unreachable_database(unreachable_db):
+    listener = DbEventListener(Appliance(unreachable_db), push=True)
+    assert listener._notify_connection() is None
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+import threading
+
+import pytest
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from six.moves.socketserver import ThreadingMixIn
+
+from cfme.utils.template.image_cache import ImageCache, ImageCacheError
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+IMAGE = os.urandom(3 * 1024 * 1024 + 123)
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class ImageRequestHandler(BaseHTTPRequestHandler):
+    """Serves ``IMAGE`` with HEAD, ETag and byte ranges; records the requests"""
+    def log_message(self, *args):
+        pass
+
+    def _headers(self, status, length, extra=()):
+        self.send_response(status)
+        self.send_header('Content-Length', str(length))
+        self.send_header('ETag', '"v1"')
+        if self.server.ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        for header in extra:
+            self.send_header(*header)
+        self.end_headers()
+
+    def do_HEAD(self):
+        self.server.requests.append(('HEAD', None))
+        self._headers(200, len(IMAGE))
+
+    def do_GET(self):
+        range_header = self.headers.get('Range')
+        self.server.requests.append(('GET', range_header))
+        if range_header and self.server.ranges:
+            start, end = [int(x) for x in range_header.split('=')[1].split('-')]
+            self._headers(206, end - start + 1,
+                          [('Content-Range', 'bytes {}-{}/{}'.format(start, end, len(IMAGE)))])
+            self.wfile.write(IMAGE[start:end + 1])
+        else:
+            self._headers(200, len(IMAGE))
+            self.wfile.write(IMAGE)
+
+
+@pytest.fixture
+def image_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ImageRequestHandler)
+    server.requests = []
+    server.ranges = True
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server, 'http://127.0.0.1:{}/cfme-rhevm.qcow2'.format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+def gets(server):
+    return [r for method, r in server.requests if method == 'GET']
+
+
+def test_parallel_ranged_download(image_server, tmpdir):
+    server, url = image_server
+    cache = ImageCache(tmpdir.strpath, workers=4)
+    path = cache.fetch(url, checksum=hashlib.sha256(IMAGE).hexdigest())
+    with open(path, 'rb') as f:
+        assert f.read() == IMAGE
+    assert os.path.basename(os.path.dirname(path)) == hashlib.sha256(IMAGE).hexdigest()
+    assert len(gets(server)) == 4 and all(gets(server))
+
+    # unchanged on the server, served from the cache
+    assert ImageCache(tmpdir.strpath).fetch(url) == path
+    del server.requests[:]
+    assert ImageCache(tmpdir.strpath).fetch(url, checksum=hashlib.sha256(IMAGE).hexdigest()) == path
+    assert not server.requests
+
+
+def test_single_flight(image_server, tmpdir):
+    server, url = image_server
+    server.ranges = False
+    cache = ImageCache(tmpdir.strpath)
+    paths = []
+    threads = [threading.Thread(target=lambda: paths.append(cache.fetch(url))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(paths)) == 1 and len(paths) == 4
+    assert cache.downloads == 1
+    assert gets(server) == [None]
+
+
+def test_resume_and_checksum(image_server, tmpdir, monkeypatch):
+    server, url = image_server
+    cache = ImageCache(tmpdir.strpath, workers=2)
+    failed = []
+    fetch_part = cache._fetch_part
+
+    def flaky_fetch_part(url, path, start, end):
+        # the download of the second part breaks after a few bytes
+        if start and not failed:
+            failed.append(path)
+            with open(path, 'ab') as f:
+                f.write(IMAGE[start:start + 30])
+            raise ImageCacheError('connection reset')
+        return fetch_part(url, path, start, end)
+
+    monkeypatch.setattr(cache, '_fetch_part', flaky_fetch_part)
+    with pytest.raises(ImageCacheError):
+        cache.fetch(url)
+    del server.requests[:]
+    path = cache.fetch(url)
+    with open(path, 'rb') as f:
+        assert f.read() == IMAGE
+    # only the second part was resumed, after the 30 bytes downloaded before
+    second_start = -(-len(IMAGE) // 2)
+    assert gets(server) == ['bytes={}-{}'.format(second_start + 30, len(IMAGE) - 1)]
+
+    with pytest.raises(ImageCacheError):
+        ImageCache(tmpdir.join('other').strpath).fetch(url, checksum='0' * 64)
+    assert ImageCache(tmpdir.join('other').strpath).lookup(url) is None
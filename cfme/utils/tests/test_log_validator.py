@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+
+from cfme.utils import log_validator
+from cfme.utils.log_validator import LogClassifier, _TailStream
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+
+@pytest.mark.parametrize('backreference', [False, True], ids=['combined', 'separate'])
+def test_classifier(backreference):
+    matched = ['.*to true.*', '.*sso_enabled.*']
+    if backreference:
+        matched.append(r'.*(abc)\1.*')
+    classifier = LogClassifier(
+        skip_patterns=['.*ERROR.*known issue.*'], failure_patterns=['.*ERROR.*'],
+        matched_patterns=matched)
+    assert (classifier._combined is None) == backreference
+    assert classifier.classify('[----] I, : nothing interesting') == (None, [])
+    assert classifier.classify('ERROR: known issue 42') == ('skip', ['.*ERROR.*known issue.*'])
+    assert classifier.classify('ERROR: sso_enabled to true') == ('failure', ['.*ERROR.*'])
+    # all the matched patterns matching the line
+    assert classifier.classify('INFO: sso_enabled to true') == (
+        'matched', ['.*to true.*', '.*sso_enabled.*'])
+    assert classifier.classify('INFO: sso_enabled to false') == ('matched', ['.*sso_enabled.*'])
+
+
+class FakeChannel(object):
+    def __init__(self):
+        self.chunks = []
+        self.ready = threading.Condition()
+        self.closed = False
+
+    def exec_command(self, command):
+        self.command = command
+
+    def feed(self, data):
+        with self.ready:
+            self.chunks.append(data)
+            self.ready.notify()
+
+    def recv(self, size):
+        with self.ready:
+            while not self.chunks and not self.closed:
+                self.ready.wait()
+            return self.chunks.pop(0) if self.chunks else b''
+
+    def close(self):
+        with self.ready:
+            self.closed = True
+            self.ready.notify()
+
+
+class FakeResult(object):
+    success = True
+
+    def __init__(self, output):
+        self.output = output
+
+
+class FakeClient(object):
+    def __init__(self):
+        self.size = 100
+        self.channel = FakeChannel()
+
+    def run_command(self, command, **kwargs):
+        return FakeResult('{}\n'.format(self.size))
+
+    def get_transport(self):
+        return self
+
+    def open_session(self):
+        return self.channel
+
+
+def test_tail_stream(monkeypatch):
+    monkeypatch.setattr(log_validator, 'TAIL_SETTLE', 0.05)
+    client = FakeClient()
+    lines = []
+    stream = _TailStream(client, '/var/www/miq/vmdb/log/evm.log', lines.append)
+    stream.start()
+    assert client.channel.command == 'tail -c +101 -F /var/www/miq/vmdb/log/evm.log'
+    client.channel.feed(b'first\nsec')
+    client.channel.feed(b'ond\nthi')
+    client.size = 100 + len(b'first\nsecond\nthird')
+    # the last chunk comes while syncing
+    threading.Timer(0.1, client.channel.feed, args=(b'rd',)).start()
+    stream.sync(timeout=5)
+    assert stream.received == len(b'first\nsecond\nthird')
+    stream.stop()
+    assert lines == ['first', 'second', 'third']
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import pytest
+from _pytest.config import PytestPluginManager
+from _pytest.fixtures import FixtureManager
+from _pytest.main import Session
+
+from cfme.fixtures.parallelizer import ParallelSession, remote
+from cfme.utils.log import logger
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+
+def collect(options, args):
+    """Collects like a slave does, with the config built from the options and args"""
+    config = remote._init_config(options, args)
+    session = Session(config)
+    # done by the pytest_sessionstart hook of the fixtures plugin
+    session._fixturemanager = FixtureManager(session)
+    session.perform_collect()
+    return session
+
+
+def test_slaves_collect_only_the_modules_to_run(request, tmpdir, monkeypatch):
+    tests = tmpdir.mkdir('tests')
+    tests.join('test_a.py').write('import pytest\n\n'
+                                  '@pytest.mark.parametrize("n", [1, 2])\n'
+                                  'def test_a(n):\n    pass\n')
+    tests.join('test_b.py').write('def test_b():\n    pass\n')
+    monkeypatch.chdir(tmpdir)
+    # the cfme plugins need a configured appliance, only the pytest collection is compared
+    monkeypatch.setattr(PytestPluginManager, 'load_setuptools_entrypoints', lambda self, name: None)
+    options = dict(vars(request.config.option), keyword='', markexpr='', plugins=[])
+    master_session = collect(dict(options), ['tests'])
+    # test_b.py was deselected by the master
+    master_session.items = [
+        item for item in master_session.items if item.fspath.basename == 'test_a.py']
+
+    parallel_session = ParallelSession.__new__(ParallelSession)
+    parallel_session.config = master_session.config
+    parallel_session.session = master_session
+    parallel_session.log = logger
+    slave_args = parallel_session._slave_args()
+    assert slave_args == ['tests/test_a.py']
+
+    slave_session = collect(dict(options), slave_args)
+    assert [item.nodeid for item in slave_session.items] == [
+        item.nodeid for item in master_session.items] == [
+        'tests/test_a.py::test_a[1]', 'tests/test_a.py::test_a[2]']
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import gzip
+import io
+import os
+import subprocess
+import time
+from datetime import datetime
+
+import pytest
+
+from cfme.utils.perf import log_bundle_command
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+
+def line(day, hour, message):
+    return '[----] I, [2018-02-{:02d}T{:02d}:00:00.000000 #1:2b0]  INFO -- : {}'.format(
+        day, hour, message)
+
+
+@pytest.fixture
+def log_dir(tmpdir):
+    """Two gzipped rotations, one plain one, and the current log"""
+    old_mtime = time.mktime(datetime(2018, 2, 13).timetuple())
+    for name, lines, mtime in [
+            ('evm.log-20180213.gz', [line(12, 10, 'oldest')], old_mtime),
+            ('evm.log-20180214.gz', [line(13, 10, 'older'), '  backtrace line  ', ''], None),
+            ('evm.log-20180215', [line(14, 10, 'old')], None)]:
+        path = tmpdir.join(name).strpath
+        content = ('\n'.join(lines) + '\n').encode('utf-8')
+        if name.endswith('.gz'):
+            with gzip.open(path, 'wb') as f:
+                f.write(content)
+        else:
+            tmpdir.join(name).write_binary(content)
+        if mtime:
+            os.utime(path, (mtime, mtime))
+    tmpdir.join('evm.log').write('\n'.join([line(15, 10, 'current'), line(15, 12, 'latest')]))
+    tmpdir.join('top_output.log').write('unrelated\n')
+    return tmpdir
+
+
+def bundle(log_dir, **kwargs):
+    command = log_bundle_command('evm', log_dir=log_dir.strpath, **kwargs)
+    output = subprocess.check_output(['bash', '-c', command])
+    return gzip.GzipFile(fileobj=io.BytesIO(output)).read().decode('utf-8')
+
+
+def test_bundle_in_order(log_dir):
+    assert bundle(log_dir) == '\n'.join([
+        line(12, 10, 'oldest'), line(13, 10, 'older'), '  backtrace line  ', '',
+        line(14, 10, 'old'), line(15, 10, 'current'), line(15, 12, 'latest')])
+    assert bundle(log_dir, strip_whitespace=True).split('\n')[1:3] == [
+        line(13, 10, 'older'), 'backtrace line']
+    # nothing left behind
+    assert sorted(os.listdir(log_dir.strpath)) == [
+        'evm.log', 'evm.log-20180213.gz', 'evm.log-20180214.gz', 'evm.log-20180215',
+        'top_output.log']
+
+
+def test_bundle_time_range(log_dir):
+    assert bundle(
+        log_dir, since=datetime(2018, 2, 13, 9), until=datetime(2018, 2, 15, 11)
+    ).split('\n') == [
+        line(13, 10, 'older'), '  backtrace line  ', '', line(14, 10, 'old'),
+        line(15, 10, 'current'), '']
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import attr
+import pytest
+
+from cfme.utils import providers
+from cfme.utils.providers import ProviderCatalog, ProviderFilter
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+PROVIDERS_DATA = {
+    'rhv': {'type': 'rhevm', 'tags': ['default']},
+    'vsphere': {'type': 'virtualcenter', 'tags': ['default', 'disabled']},
+    'ec2': {'type': 'ec2', 'tags': ['cloud'], 'small_template': 'tiny'},
+}
+
+
+@attr.s
+class FakeProvider(object):
+    key = attr.ib()
+    data = attr.ib()
+    name = attr.ib(default=None)
+    endpoints = attr.ib(default=attr.Factory(lambda: {'default': 'endpoint'}))
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    created = []
+
+    def get_crud(key):
+        created.append(key)
+        return FakeProvider(key, PROVIDERS_DATA[key])
+
+    monkeypatch.setattr(providers, 'providers_data', PROVIDERS_DATA)
+    monkeypatch.setattr(providers, 'get_crud', get_crud)
+    catalog = ProviderCatalog()
+    catalog.created = created
+    return catalog
+
+
+def keys(provider_list):
+    return sorted(provider.key for provider in provider_list)
+
+
+def test_catalog_matches_sequential_filtering(catalog):
+    filter_sets = [
+        [],
+        [ProviderFilter(required_tags=['disabled'], inverted=True)],
+        [ProviderFilter(keys=['ec2'], required_tags=['default'], conjunctive=False)],
+        [ProviderFilter(required_fields=[('small_template', 'tiny')])],
+        [ProviderFilter(required_tags=['default']),
+         ProviderFilter(required_tags=['disabled'], inverted=True)],
+    ]
+    for filters in filter_sets:
+        expected = list(PROVIDERS_DATA)
+        for prov_filter in filters:
+            expected = [
+                key for key in expected
+                if prov_filter(FakeProvider(key, PROVIDERS_DATA[key]))]
+        assert keys(catalog.filter(filters)) == sorted(expected)
+
+
+def test_catalog_memoizes_cruds_and_queries(catalog):
+    enabled = ProviderFilter(required_tags=['disabled'], inverted=True)
+    assert keys(catalog.filter([enabled])) == ['ec2', 'rhv']
+    # An equal filter is recognized even though it is a different object
+    assert keys(catalog.filter([enabled.copy()])) == ['ec2', 'rhv']
+    assert catalog.hits == 1
+    assert sorted(catalog.created) == sorted(PROVIDERS_DATA)
+
+    # Filters that cannot be memoized are still evaluated
+    assert keys(catalog.filter([lambda provider: provider.key == 'rhv'])) == ['rhv']
+    assert sorted(catalog.created) == sorted(PROVIDERS_DATA)
+
+
+def test_list_providers_returns_own_objects(catalog, monkeypatch):
+    monkeypatch.setattr(providers, 'provider_catalog', lambda: catalog)
+    rhv_only = [ProviderFilter(keys=['rhv'])]
+    provider, = providers.list_providers(rhv_only, use_global_filters=False, use_catalog=True)
+    provider.endpoints['default'] = 'changed'
+    provider, = providers.list_providers(rhv_only, use_global_filters=False, use_catalog=True)
+    assert provider.endpoints['default'] == 'endpoint'
+    assert catalog.hits == 1
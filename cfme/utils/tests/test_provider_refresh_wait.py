@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import datetime
+
+import pytest
+import six
+
+from cfme.common import provider as provider_module
+from cfme.common.provider import BaseProvider
+from cfme.utils.wait import TimedOutError
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+NOW = datetime.datetime(2018, 1, 1, 12, 0, 0)
+
+
+class FakeProvider(object):
+    name = 'fake'
+    wait_for_refresh = six.get_unbound_function(BaseProvider.wait_for_refresh)
+
+    def __init__(self, states):
+        self.states = list(states)
+        self.polls = 0
+        self.refreshes = 0
+
+    def _refresh_state(self):
+        self.polls += 1
+        return self.states.pop(0) if len(self.states) > 1 else self.states[0]
+
+    def refresh_provider_relationships(self):
+        self.refreshes += 1
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(provider_module, 'REFRESH_POLL_DELAY', 0.01)
+    monkeypatch.setattr(provider_module, 'REFRESH_POLL_MAX_DELAY', 0.01)
+
+
+def test_returns_when_initial_refresh_finishes():
+    finished = NOW + datetime.timedelta(seconds=3)
+    provider = FakeProvider([(None, None, NOW), (None, None, NOW), (finished, None, finished)])
+    assert provider.wait_for_refresh(num_sec=5) == finished
+    assert provider.polls == 3
+    # the initial refresh is running, no other refresh requested
+    assert provider.refreshes == 0
+
+
+def test_stale_refresh_requests_new_one():
+    stale = NOW - datetime.timedelta(hours=1)
+    finished = NOW + datetime.timedelta(seconds=3)
+    provider = FakeProvider([(stale, None, NOW), (stale, None, NOW), (finished, None, finished)])
+    assert provider.wait_for_refresh(num_sec=5) == finished
+    assert provider.refreshes == 1
+
+
+def test_times_out():
+    provider = FakeProvider([(None, None, NOW)])
+    with pytest.raises(TimedOutError):
+        provider.wait_for_refresh(since=NOW, num_sec=0.1)
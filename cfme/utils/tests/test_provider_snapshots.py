@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from cfme.fixtures import provider as provider_fixtures
+from cfme.fixtures.provider import _restore_provider_snapshot, provider_snapshot_name
+from cfme.utils.version import Version
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+
+class Conf(object):
+    class cfme_data(object):
+        management_systems = {
+            'vsphere': {'type': 'virtualcenter', 'hostname': 'vc.example.com'},
+            'rhv': {'type': 'rhevm', 'hostname': 'rhv.example.com'},
+        }
+
+
+class Client(object):
+    schema_key = 'vmdb-20180101000000-1000'
+
+
+class Db(object):
+    def __init__(self, snapshots=(), fail=False):
+        self.client = Client()
+        self.snapshots = set(snapshots)
+        self.fail = fail
+        self.restored = []
+
+    def has_snapshot(self, name):
+        return name in self.snapshots
+
+    def restore_snapshot(self, name):
+        if self.fail:
+            raise RuntimeError('pg_restore failed')
+        self.restored.append(name)
+
+
+class Appliance(object):
+    version = Version('5.9.3.1')
+    build = '20180501120000_abcdef'
+
+    def __init__(self, db):
+        self.db = db
+
+
+class Provider(object):
+    def __init__(self, key, exists=True):
+        self.key = key
+        self.exists = exists
+
+
+class Reporter(object):
+    def write_line(self, line, **markup):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def fake_conf(monkeypatch):
+    monkeypatch.setattr(provider_fixtures, 'conf', Conf)
+    monkeypatch.setattr(provider_fixtures.store, '_terminalreporter', Reporter())
+
+
+def test_provider_snapshot_name(monkeypatch):
+    appliance = Appliance(Db())
+    name = provider_snapshot_name(appliance, {'vsphere', 'rhv'})
+    assert name.startswith('providers-5.9.3.1-20180501120000_abcdef-vmdb-20180101000000-1000-')
+    assert name == provider_snapshot_name(appliance, ['rhv', 'vsphere'])
+    assert name != provider_snapshot_name(appliance, {'vsphere'})
+
+    # a different schema, build or provider data makes a different snapshot
+    appliance.db.client.schema_key = 'vmdb-20180201000000-1001'
+    assert provider_snapshot_name(appliance, {'vsphere', 'rhv'}) != name
+    appliance.db.client.schema_key = Client.schema_key
+    appliance.build = '20180502120000_abcdef'
+    assert provider_snapshot_name(appliance, {'vsphere', 'rhv'}) != name
+    del appliance.build
+    monkeypatch.setitem(Conf.cfme_data.management_systems, 'rhv', {'type': 'rhevm'})
+    assert provider_snapshot_name(appliance, {'vsphere', 'rhv'}) != name
+
+    # unknown schema, no snapshots
+    appliance.db.client.schema_key = None
+    assert provider_snapshot_name(appliance, {'vsphere'}) is None
+
+
+def test_restore_provider_snapshot():
+    db = Db()
+    appliance = Appliance(db)
+    provider = Provider('vsphere')
+    name = provider_snapshot_name(appliance, {'vsphere'})
+    db.snapshots.add(name)
+    assert _restore_provider_snapshot(appliance, provider, {'vsphere'})
+    assert db.restored == [name]
+
+
+@pytest.mark.parametrize('case', ['no_snapshot', 'no_schema', 'restore_fails', 'no_provider'])
+def test_restore_provider_snapshot_fallbacks(case):
+    db = Db(fail=case == 'restore_fails')
+    appliance = Appliance(db)
+    provider = Provider('vsphere', exists=case != 'no_provider')
+    if case != 'no_snapshot':
+        db.snapshots.add(provider_snapshot_name(appliance, {'vsphere'}))
+    if case == 'no_schema':
+        db.client.schema_key = None
+    assert not _restore_provider_snapshot(appliance, provider, {'vsphere'})
+    assert bool(db.restored) == (case == 'no_provider')
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+import json
+import socket
+
+import pytest
+
+from cfme.utils.rails_session import MARKER, RailsSession, RailsSessionError
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+
+def frame(data):
+    payload = json.dumps(data).encode('utf-8')
+    return MARKER + ' {}\n'.format(len(payload)).encode('utf-8') + payload
+
+
+class FakeChannel(object):
+    """Channel of a fake session process answering the requests right away"""
+    def __init__(self, pid, boot=True):
+        self.closed = False
+        self.exited = False
+        self.stdout = b'Rails boot warning\n' + frame({'ready': True, 'pid': pid}) if boot else b''
+        self.stderr = b'deprecation warning\n'
+
+    def recv_ready(self):
+        return bool(self.stdout)
+
+    def recv(self, size):
+        data, self.stdout = self.stdout[:size], self.stdout[size:]
+        return data
+
+    def recv_stderr_ready(self):
+        return bool(self.stderr)
+
+    def recv_stderr(self, size):
+        data, self.stderr = self.stderr, b''
+        return data
+
+    def exit_status_ready(self):
+        return self.exited
+
+    def sendall(self, data):
+        length, request = data.split(b'\n', 1)
+        assert int(length) == len(request)
+        request = json.loads(request.decode('utf-8'))
+        if request['code'] == 'exit!':
+            self.exited = True
+        elif request['code'] != 'sleep':
+            self.stdout += frame({'rc': 0, 'output': '{code} {sandbox} {runner}'.format(**request)})
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSSHClient(object):
+    is_container = False
+    is_pod = False
+    username = 'root'
+
+    def __init__(self):
+        self.commands = []
+
+    def run_command(self, command, **kwargs):
+        self.commands.append(command)
+
+
+class FakeSession(RailsSession):
+    def __init__(self, *args, **kwargs):
+        super(FakeSession, self).__init__(*args, **kwargs)
+        self.channels = []
+
+    def _open_channel(self):
+        channel = FakeChannel(pid=100 + len(self.channels), boot=self.boot_timeout > 0)
+        self.channels.append(channel)
+        return channel
+
+
+def test_session_reused():
+    session = FakeSession(FakeSSHClient())
+    assert session.supported
+    result = session.run('puts 1', runner=True)
+    assert result.success and result.output == 'puts 1 False True'
+    assert session.run('User.count', sandbox=True).output == 'User.count True False'
+    assert session.spawns == 1 and session.calls == 2 and session.pid == 100
+
+
+def test_session_respawn():
+    client = FakeSSHClient()
+    session = FakeSession(client)
+    with pytest.raises(socket.timeout):
+        session.run('sleep', timeout=0.1)
+    # the stuck process is killed
+    assert client.commands == ['kill -9 100']
+    assert session.channels[0].closed and not session.alive
+    assert session.run('1').success
+    assert session.spawns == 2 and session.pid == 101
+
+    # the process died, the next call starts a new one
+    result = session.run('exit!')
+    assert result.failed
+    assert session.run('2').output == '2 False False'
+    assert session.spawns == 3
+
+
+def test_session_boot_failure():
+    session = FakeSession(FakeSSHClient(), boot_timeout=0)
+    with pytest.raises(RailsSessionError):
+        session.run('1')
+    assert session.broken and not session.supported
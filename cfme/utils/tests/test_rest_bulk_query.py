@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import re
+import time
+
+import pytest
+import six
+
+from cfme.common.provider import BaseProvider
+from cfme.utils import rest
+from cfme.utils.log import logger
+from cfme.utils.rest import find_resources_by, query_resources
+from cfme.utils.wait import TimedOutError
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+VMS = 2500
+FILTER_RE = re.compile(r'^(?:or )?(\w+) = "?(.*?)"?$')
+
+
+class FakeAPI(object):
+    """Stand-in for the appliance REST API with a single ``vms`` collection"""
+    def __init__(self, latency=0):
+        self.latency = latency
+        self.requests = 0
+        self.resources = [
+            {'id': str(i), 'href': '/api/vms/{}'.format(i), 'name': 'vm_{}'.format(i),
+             'type': 'ManageIQ::Providers::Vmware::InfraManager::Vm', 'guid': 'guid_{}'.format(i)}
+            for i in range(VMS)]
+
+    def get(self, href, **params):
+        self.requests += 1
+        time.sleep(self.latency)
+        if href != '/api/vms':
+            # single entity
+            return dict(self.resources[int(href.rsplit('/', 1)[-1])])
+        resources = self.resources
+        filters = params.get('filter[]')
+        if filters:
+            wanted = {}
+            for expression in filters:
+                field, value = FILTER_RE.match(expression).groups()
+                wanted.setdefault(field, set()).add(value)
+            resources = [
+                r for r in resources if all(r[f] in values for f, values in wanted.items())]
+        offset, limit = params.get('offset', 0), params.get('limit', len(resources))
+        page = resources[offset:offset + limit]
+        if 'attributes' in params:
+            keys = {'id', 'href'} | set(params['attributes'].split(','))
+            page = [{key: r[key] for key in keys} for r in page]
+        return {'name': 'vms', 'count': VMS, 'subcount': len(page),
+                'subquery_count': len(resources), 'resources': page}
+
+
+class FakeCollection(object):
+    name = 'vms'
+
+    def __init__(self, api):
+        self._api = api
+        self._href = '/api/vms'
+
+
+class FakeProvider(object):
+    get_vm_id = six.get_unbound_function(BaseProvider.get_vm_id)
+    get_vm_ids = six.get_unbound_function(BaseProvider.get_vm_ids)
+    get_all_template_details = six.get_unbound_function(BaseProvider.get_all_template_details)
+
+    def __init__(self, api):
+        vms = FakeCollection(api)
+        collections = type('Collections', (object,), {'vms': vms, 'templates': vms})
+        rest_api = type('RestAPI', (object,), {'collections': collections})
+        self.appliance = type('Appliance', (object,), {'rest_api': rest_api})
+
+
+def test_query_resources_pages():
+    api = FakeAPI()
+    resources = query_resources(FakeCollection(api), attributes=['name'], page_size=1000)
+    assert [r['id'] for r in resources] == [str(i) for i in range(VMS)]
+    assert set(resources[0]) == {'id', 'href', 'name'}
+    assert api.requests == 3
+
+
+def test_find_resources_by_chunks():
+    api = FakeAPI()
+    names = ['vm_{}'.format(i) for i in range(0, VMS, 10)] + ['missing']
+    found = find_resources_by(FakeCollection(api), 'name', names, chunk_size=50)
+    assert len(found) == VMS // 10
+    assert api.requests == 6
+
+
+def test_bulk_provider_helpers_benchmark():
+    """Compares request count and time with one request per VM, as the helpers used to do"""
+    api = FakeAPI(latency=0.001)
+    provider = FakeProvider(api)
+    names = ['vm_{}'.format(i) for i in range(VMS - 5, VMS)]
+
+    started = time.time()
+    id_map = {}
+    for vm in query_resources(provider.appliance.rest_api.collections.vms, attributes=['id']):
+        name = api.get(vm['href'])['name']
+        if name in names:
+            id_map[name] = vm['id']
+    n_plus_one = api.requests, time.time() - started
+
+    api.requests = 0
+    started = time.time()
+    assert provider.get_vm_ids(names) == id_map
+    assert provider.get_vm_id(names[0]) == id_map[names[0]]
+    details = provider.get_all_template_details()
+    assert details['1'] == {'name': 'vm_1', 'type': api.resources[1]['type'], 'guid': 'guid_1'}
+    bulk = api.requests, time.time() - started
+
+    logger.info('N+1 lookup: %d requests in %.2fs, bulk helpers: %d requests in %.2fs',
+                n_plus_one[0], n_plus_one[1], bulk[0], bulk[1])
+    assert bulk[0] < 10 < n_plus_one[0]
+
+
+def test_wait_for_resources_polls_all_at_once(monkeypatch):
+    monkeypatch.setattr(rest, 'WAIT_POLL_DELAY', 0.01)
+    api = FakeAPI()
+    deleted = {'5', '6', '7'}
+    resources = api.resources
+
+    def get(href, **params):
+        # the resources disappear after the third query
+        api.resources = [r for r in resources if api.requests < 2 or r['id'] not in deleted]
+        return FakeAPI.get(api, href, **params)
+
+    monkeypatch.setattr(api, 'get', get)
+    rest.wait_for_resources(FakeCollection(api), 'id', [5, 6, 7], exist=False, num_sec=5)
+    assert api.requests == 3
+
+    with pytest.raises(TimedOutError):
+        rest.wait_for_resources(FakeCollection(api), 'name', ['vm_5'], num_sec=0.05)
+    assert rest._value_matches('%vm_1%', 'my_vm_12')
+    assert not rest._value_matches('vm_1', 'vm_12')
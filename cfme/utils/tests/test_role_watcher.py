@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+from cfme.utils.appliance import roles
+from cfme.utils.appliance.roles import RoleWatcher
+from cfme.utils.wait import TimedOutError
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+
+class Appliance(object):
+    def __init__(self, db):
+        self.db = db
+        self.roles = {'automate': False, 'ems_inventory': True}
+        self.reads = 0
+
+    @property
+    def server_roles(self):
+        self.reads += 1
+        return dict(self.roles)
+
+
+class Watcher(RoleWatcher):
+    def __init__(self, appliance, connection):
+        super(Watcher, self).__init__(appliance, push=True)
+        self.fake_connection = connection
+
+    def _notify_connection(self):
+        return self.fake_connection
+
+
+def activate_later(appliance, connection, delay=0.2):
+    def activate():
+        time.sleep(delay)
+        appliance.roles['automate'] = True
+        if connection is not None:
+            connection.notify()
+    thread = threading.Thread(target=activate)
+    thread.daemon = True
+    thread.start()
+
+
+def test_notified_change_is_seen_at_once(monkeypatch, notify_connection, unreachable_db):
+    # without the notification the roles would not be read again in time
+    monkeypatch.setattr(roles, 'NOTIFY_WAIT', 30)
+    appliance = Appliance(unreachable_db)
+    connection = notify_connection
+    with Watcher(appliance, connection) as watcher:
+        activate_later(appliance, connection)
+        started = time.time()
+        result = watcher.wait(lambda current: current['automate'], timeout=10)
+    assert result['automate']
+    assert time.time() - started < 1
+    assert appliance.reads == 2
+    assert connection.closed
+
+
+@pytest.mark.parametrize('push', [False, True], ids=['default', 'unreachable'])
+def test_polls_without_notifications(monkeypatch, unreachable_db, push):
+    monkeypatch.setattr(roles, 'POLL_DELAY', 0.05)
+    appliance = Appliance(unreachable_db)
+    with RoleWatcher(appliance, push=push) as watcher:
+        assert watcher.connection is None
+        activate_later(appliance, None)
+        assert watcher.wait(lambda current: current['automate'], timeout=10)['automate']
+    assert appliance.reads > 2
+
+
+def test_timeout(monkeypatch, unreachable_db):
+    monkeypatch.setattr(roles, 'POLL_DELAY', 0.05)
+    with RoleWatcher(Appliance(unreachable_db)) as watcher:
+        with pytest.raises(TimedOutError):
+            watcher.wait(lambda current: current['automate'], timeout=0.2)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from cfme.utils.appliance import settings_cache
+from cfme.utils.appliance.settings_cache import SettingsCache, settings_diff
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+
+class FakeCache(SettingsCache):
+    def __init__(self):
+        SettingsCache.__init__(self, appliance=None)
+        self.current_version = (1, 1, None)
+
+    def version(self):
+        return self.current_version
+
+
+def test_settings_diff():
+    current = {'server': {'name': 'EVM', 'role': 'automate', 'worker': {'count': 2}},
+               'log': {'level': 'info'}}
+    assert settings_diff(current, {'server': {'name': 'EVM'}}) == {}
+    assert settings_diff(current, {'server': {'name': 'x', 'worker': {'count': 2}}}) == {
+        'server': {'name': 'x'}}
+    assert settings_diff(current, {'log': 'debug', 'new': {'a': 1}}) == {
+        'log': 'debug', 'new': {'a': 1}}
+    assert settings_diff(current, {'server': {'worker': {'count': 3}}}) == {
+        'server': {'worker': {'count': 3}}}
+
+
+def test_settings_fetched_when_changed(monkeypatch):
+    monkeypatch.setattr(settings_cache, 'stats', settings_cache.Counter())
+    cache = FakeCache()
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return {'server': {'name': 'EVM {}'.format(len(fetches))}}
+
+    assert cache.get(fetch) == {'server': {'name': 'EVM 1'}}
+    settings = cache.get(fetch)
+    assert settings == {'server': {'name': 'EVM 1'}}
+    # the callers may modify the returned settings
+    settings['server']['name'] = 'changed'
+    assert cache.get(fetch) == {'server': {'name': 'EVM 1'}}
+    assert len(fetches) == 1
+
+    cache.current_version = (2, 2, None)
+    assert cache.get(fetch) == {'server': {'name': 'EVM 2'}}
+    cache.invalidate()
+    assert cache.get(fetch) == {'server': {'name': 'EVM 3'}}
+
+    # not cached without a version
+    cache.current_version = None
+    cache.get(fetch)
+    cache.get(fetch)
+    assert len(fetches) == 5
+    assert settings_cache.stats == {'fetched': 5, 'cached': 2}
+    assert 'fetched 5 times, 2 fetches avoided' in settings_cache.stats_report()[0]
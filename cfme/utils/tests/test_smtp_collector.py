@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import imp
+import threading
+import time
+from wsgiref.simple_server import make_server, WSGIRequestHandler
+
+import bottle
+import pytest
+
+from cfme.utils.path import scripts_path
+from cfme.utils.smtp_collector_client import SMTPCollectorClient
+from cfme.utils.wait import TimedOutError
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+MAIL = """From: cfme@example.com
+To: {to}
+Subject: {subject}
+
+{text}
+"""
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+@pytest.fixture(scope='module')
+def collector():
+    module = imp.load_source('smtp_collector', scripts_path.join('smtp_collector.py').strpath)
+    server = make_server('127.0.0.1', 0, bottle.default_app(), module.ThreadingWSGIServer,
+                         QuietHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield module, SMTPCollectorClient('127.0.0.1', server.server_port)
+    server.shutdown()
+    server.server_close()
+
+
+def send(module, to, subject, text=''):
+    module.store_message(MAIL.format(to=to, subject=subject, text=text))
+
+
+def test_filters(collector):
+    module, client = collector
+    client.clear_database()
+    send(module, 'a@example.com', 'Request approved', 'The request 42 was approved')
+    send(module, 'b@example.com', 'Request denied', 'The request 43 was denied')
+    assert [m['subject'] for m in client.get_emails()] == ['Request approved', 'Request denied']
+    assert len(client.get_emails(to_address='b@example.com')) == 1
+    assert len(client.get_emails(subject_like='%approved%')) == 1
+    assert [m['to_address'] for m in client.get_emails(text_match='denied')] == ['b@example.com']
+    assert client.clear_database() is True
+    assert client.get_emails() == []
+
+
+def test_wait_for_emails(collector):
+    module, client = collector
+    client.clear_database()
+    send(module, 'a@example.com', 'Alert Triggered: first')
+    timer = threading.Timer(0.5, send, args=(module, 'a@example.com', 'Alert Triggered: second'))
+    timer.start()
+    started = time.time()
+    emails = client.wait_for_emails(count=2, timeout=10, subject_like='Alert Triggered%')
+    # answered when the e-mail arrived, not at the end of the timeout
+    assert time.time() - started < 5
+    assert [m['subject'] for m in emails] == ['Alert Triggered: first', 'Alert Triggered: second']
+    timer.join()
+
+    with pytest.raises(TimedOutError):
+        client.wait_for_emails(count=3, timeout=0.5, to_address='a@example.com')
@@ -1,3 +1,6 @@
+import inspect
+import linecache
+
 import pytest
 from cfme.fixtures import artifactor_plugin
 from cfme.fixtures.soft_assert import SoftAssertionError, _soft_assert_cm
@@ -99,3 +102,29 @@ def some_fixture(soft_assert):
 @pytest.mark.xfail(raises=SoftAssertionError)
 def test_soft_assert_fail_in_fixture(some_fixture):
     pass
+
+
+def test_soft_assert_inspects_only_the_failing_frame(soft_assert, monkeypatch):
+    """Failing soft asserts do not inspect the whole stack, the source line of the assertion is
+    read only when there is no message"""
+    def stack(*args, **kwargs):
+        raise AssertionError('inspect.stack called')
+    monkeypatch.setattr(inspect, 'stack', stack)
+    lines = []
+
+    def getline(filename, lineno, module_globals=None):
+        lines.append((filename, lineno))
+        return 'the source line'
+    monkeypatch.setattr(linecache, 'getline', getline)
+
+    with pytest.raises(SoftAssertionError):
+        with _soft_assert_cm():
+            soft_assert(True, 'message')
+            soft_assert(False, 'message')
+            assert not lines
+            soft_assert(False)
+    caught_asserts = soft_assert.caught_asserts()
+    assert len(lines) == 1 and lines[0][0].endswith('test_soft_assert.py')
+    assert caught_asserts[0].startswith('message (')
+    assert caught_asserts[1].startswith('the source line (')
+    soft_assert.clear_asserts()
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import pytest
+from selenium.common.exceptions import WebDriverException
+from widgetastic.browser import Browser
+
+from widgetastic_manageiq import NestedSummaryTable, SummaryTable, Table
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+
+def cell(text, links=(), checked=None, klass=None, rowspan=None):
+    return {'text': text, 'links': list(links), 'checked': checked, 'class': klass,
+            'rowspan': rowspan}
+
+
+class LiveAccess(AssertionError):
+    pass
+
+
+class NoSelenium(object):
+    """Every element lookup fails the test, the tables have to be read from the snapshot"""
+    def __getattr__(self, name):
+        raise LiveAccess('Live access to the browser: {}'.format(name))
+
+
+class SnapshotBrowser(Browser):
+    def __init__(self, snapshot):
+        Browser.__init__(self, NoSelenium())
+        self.snapshot = snapshot
+        # a list, the methods run bound to the wrappers of the browser
+        self.scripts = []
+
+    def execute_script(self, script, *args, **kwargs):
+        if script != Table.SNAPSHOT_SCRIPT:
+            # the page safety check
+            return True
+        self.scripts.append(args)
+        if isinstance(self.snapshot, Exception):
+            raise self.snapshot
+        return self.snapshot
+
+
+def test_table_read_from_snapshot():
+    browser = SnapshotBrowser({
+        'headers': ['', 'Name ', ' Power  State'],
+        'header_in_body': False,
+        'rows': [
+            {'id': 'vm_1', 'class': 'odd', 'cells': [
+                cell('', checked=False), cell(' vm 1', links=['https://a/vm/1']), cell('on')]},
+            {'id': 'vm_2', 'class': 'even', 'cells': [
+                cell('', checked=True), cell('vm\n2'), cell('off')]},
+        ]})
+    table = Table(browser, './/table')
+    assert table.read() == [
+        {0: '', 'Name': 'vm 1', 'Power State': 'on'},
+        {0: '', 'Name': 'vm 2', 'Power State': 'off'}]
+    assert table.headers == (None, 'Name', 'Power State')
+    rows = list(table)
+    assert [row.row_id for row in rows] == ['vm_1', 'vm_2']
+    assert [row[0].checked for row in rows] == [False, True]
+    assert rows[0].name.links == ['https://a/vm/1']
+    assert rows[1].index == 2
+    assert len(browser.scripts) == 2
+
+
+def test_summary_tables_read_from_snapshot():
+    browser = SnapshotBrowser({
+        'headers': ['Properties'],
+        'header_in_body': False,
+        'rows': [
+            {'id': None, 'class': None, 'cells': [cell('Name', klass='label'), cell('vm 1')]},
+            {'id': None, 'class': None, 'cells': [
+                cell('IP Address', klass='label'), cell('10.0.0.1')]},
+            {'id': None, 'class': None, 'cells': [cell('Not a field'), cell('x')]},
+        ]})
+    table = SummaryTable(browser, 'Properties')
+    assert table.read() == {'Name': 'vm 1', 'IP Address': '10.0.0.1'}
+    assert table.fields == ['Name', 'IP Address']
+    assert len(browser.scripts) == 2
+
+    browser = SnapshotBrowser({
+        'headers': ['Name', 'Value'],
+        'header_in_body': True,
+        'rows': [{'id': None, 'class': None, 'cells': [cell('a'), cell('1')]}]})
+    nested = NestedSummaryTable(browser, 'Labels')
+    assert nested.read() == [{'Name': 'a', 'Value': '1'}]
+
+
+def test_table_read_live_when_script_fails():
+    browser = SnapshotBrowser(WebDriverException('no XPath'))
+    table = Table(browser, './/table')
+    with pytest.raises(LiveAccess):
+        table.read()
+    table.BULK_READ = False
+    with pytest.raises(LiveAccess):
+        table.read()
+    assert len(browser.scripts) == 1
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+from cfme.utils import wait
+from cfme.utils.disk_cache import DiskCache
+from cfme.utils.wait import Backoff, TimedOutError, wait_for
+
+pytestmark = [
+    pytest.mark.nondestructive,
+    pytest.mark.skip_selenium,
+]
+
+
+@pytest.fixture(autouse=True)
+def clean_stats(monkeypatch):
+    monkeypatch.setattr(wait, '_learned', False)
+    wait.reset_stats()
+    yield
+    wait.reset_stats()
+
+
+def ready_after(seconds):
+    ready_at = time.time() + seconds
+    return lambda: time.time() >= ready_at
+
+
+def test_backoff_delays():
+    delays = Backoff(1, 10).delays()
+    values = [next(delays) for _ in range(50)]
+    assert values[0] == 1
+    assert all(1 <= delay <= 10 for delay in values)
+    assert len(set(values)) > 2
+
+    delays = Backoff(1, 10, jitter=False).delays()
+    assert [next(delays) for _ in range(6)] == [1, 2, 4, 8, 10, 10]
+    # starts from a quarter of the learned latency
+    assert next(Backoff(1, 10).delays(typical=20)) == 5
+    assert next(Backoff(1, 10, learn=False).delays(typical=20)) == 1
+
+
+def test_checks_before_deadline():
+    started = time.time()
+    # the delay would sleep through the deadline, the last check is done right before it
+    wait_for(ready_after(0.2), num_sec=0.3, delay=10)
+    assert time.time() - started < 1
+
+    started = time.time()
+    with pytest.raises(TimedOutError):
+        wait_for(lambda: False, num_sec=0.2, delay=10)
+    assert time.time() - started < 1
+
+
+def test_wake_event():
+    event = threading.Event()
+    ready = []
+
+    def _ready():
+        ready.append(True)
+        event.set()
+
+    threading.Timer(0.1, _ready).start()
+    started = time.time()
+    wait_for(lambda: bool(ready), num_sec=10, delay=Backoff(5, 5), wake=event)
+    assert time.time() - started < 1
+    assert not event.is_set()
+
+
+def test_stats_and_learned_latency(tmpdir):
+    for _ in range(2):
+        wait_for(ready_after(0.1), num_sec=5, delay=0.05)
+    stats, = wait.all_stats()
+    assert stats.site.endswith('test_wait_backoff.py:{}'.format(
+        test_stats_and_learned_latency.__code__.co_firstlineno + 2))
+    assert stats.calls == 2 and stats.polls >= 4 and not stats.timeouts
+    assert 0 < stats.needed <= stats.waited
+    assert stats.overslept <= 2 * 0.05 + 0.02
+    assert 0.05 < stats.typical < 0.2
+
+    with pytest.raises(TimedOutError):
+        wait_for(lambda: False, num_sec=0.1, delay=0.05)
+    report = wait.stats_report()
+    assert len(report) == 3
+    assert '(1 timed out)' in report[-1] or '(1 timed out)' in report[-2]
+
+    cache = DiskCache(tmpdir.join('wait.sqlite'), namespace='test')
+    wait.save_learned_latencies(cache)
+    assert cache.get(stats.site) == stats.typical
@@ -1,7 +1,266 @@
+"""Waiting for conditions
+
+:py:func:`wait_for` is the ``wait_for`` package function logging to the cfme logger, with a few
+additions:
+
+* ``delay`` can be a :py:class:`Backoff` strategy instead of a number of seconds. The backoff
+  grows exponentially with decorrelated jitter and starts from the latency learned for the call
+  site, so a wait that usually takes two minutes does not poll every second from the start.
+* The delay is never slept past the deadline, the condition is checked once more right before
+  timing out.
+* ``wake`` takes a :py:class:`threading.Event`; setting it (eg. from an event listener) ends the
+  current delay and checks the condition immediately.
+* The duration of every wait is recorded per call site. :py:func:`stats_report` shows how much
+  time was spent waiting and how much of it was slept after the condition could have been met
+  already, ``--wait-stats`` prints it at the end of the test run.
+"""
+import random
+import sys
+import threading
+import time
+from functools import partial
+
+import attr
 from wait_for import wait_for as wait_for_mod, wait_for_decorator as wait_for_decorator_mod
 from wait_for import RefreshTimer, TimedOutError  # NOQA
+from wait_for import _get_timeout_secs
+
+from cfme.utils.disk_cache import DiskCache
 from cfme.utils.log import logger
-from functools import partial
+from cfme.utils.path import cache_path, project_path
+
+#: Weight of the latest duration in the learned latency of a call site
+LATENCY_WEIGHT = 0.3
+#: Slack left before the deadline for the last check of the condition
+DEADLINE_SLACK = 0.05
+
+
+@attr.s
+class WaitStats(object):
+    """Waiting statistics of one call site
+
+    ``needed`` is the part of ``waited`` spent before the last check that could have succeeded,
+    the rest was the delay slept after the condition might have been met already.
+    """
+    site = attr.ib()
+    calls = attr.ib(default=0)
+    timeouts = attr.ib(default=0)
+    polls = attr.ib(default=0)
+    waited = attr.ib(default=0.0)
+    needed = attr.ib(default=0.0)
+    typical = attr.ib(default=None)
+
+    @property
+    def overslept(self):
+        return self.waited - self.needed
+
+    def record(self, polls, waited, needed=None, timed_out=False):
+        if needed is None or timed_out:
+            needed = waited
+        self.calls += 1
+        self.polls += polls
+        self.waited += waited
+        self.needed += needed
+        if timed_out:
+            self.timeouts += 1
+        elif self.typical is None:
+            self.typical = needed
+        else:
+            self.typical += LATENCY_WEIGHT * (needed - self.typical)
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+_learned = None
+
+
+def get_latency_cache():
+    return DiskCache(cache_path.join('wait_stats.sqlite'), namespace='typical-latency')
+
+
+def _learned_latency(site):
+    """Returns the latency of the call site learned in the previous runs"""
+    global _learned
+    if _learned is None:
+        try:
+            _learned = get_latency_cache()
+        except Exception as e:
+            logger.warning('Cannot load the learned wait latencies: %s', str(e))
+            _learned = False
+    if not _learned:
+        return None
+    try:
+        return _learned.get(site)
+    except Exception:
+        return None
+
+
+def site_stats(site, learn=False):
+    """Returns the :py:class:`WaitStats` of the call site, creating them if needed
+
+    Args:
+        site: The call site, ``path:line``
+        learn: Initialize the typical latency from the previous runs
+    """
+    with _stats_lock:
+        stats = _stats.get(site)
+        if stats is None:
+            stats = _stats[site] = WaitStats(site)
+    if learn and stats.typical is None and not stats.calls:
+        stats.typical = _learned_latency(site)
+    return stats
+
+
+def all_stats():
+    with _stats_lock:
+        return list(_stats.values())
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def save_learned_latencies(cache=None):
+    """Stores the typical latency of the call sites for the following runs"""
+    latencies = {stats.site: stats.typical for stats in all_stats() if stats.typical is not None}
+    if latencies:
+        (cache or get_latency_cache()).set_many(latencies)
+
+
+def stats_report(limit=20):
+    """Returns the lines of the per call site waiting report, the most overslept first"""
+    stats = sorted(all_stats(), key=lambda s: s.overslept, reverse=True)[:limit]
+    lines = ['{:>9} {:>9} {:>9} {:>6} {:>6} {:>8}  {}'.format(
+        'waited', 'needed', 'overslept', 'calls', 'polls', 'typical', 'site')]
+    for s in stats:
+        lines.append('{:>8.1f}s {:>8.1f}s {:>8.1f}s {:>6} {:>6} {:>8}  {}{}'.format(
+            s.waited, s.needed, s.overslept, s.calls, s.polls,
+            '-' if s.typical is None else '{:.1f}s'.format(s.typical), s.site,
+            ' ({} timed out)'.format(s.timeouts) if s.timeouts else ''))
+    return lines
+
+
+@attr.s
+class Backoff(object):
+    """Exponential backoff with decorrelated jitter
+
+    Every delay is picked randomly between ``initial`` and three times the previous delay, capped
+    at ``maximum``. Without ``jitter`` the delay simply doubles. The first delay is a quarter of
+    the latency learned for the call site, if there is one.
+
+    Args:
+        initial: Shortest delay
+        maximum: Longest delay
+        jitter: Randomize the delays
+        learn: Start from the latency learned for the call site
+    """
+    initial = attr.ib(default=1)
+    maximum = attr.ib(default=60)
+    jitter = attr.ib(default=True)
+    learn = attr.ib(default=True)
+
+    def delays(self, typical=None):
+        delay = self.initial
+        if self.learn and typical:
+            delay = max(self.initial, min(typical / 4.0, self.maximum))
+        while True:
+            yield delay
+            if self.jitter:
+                delay = min(self.maximum, random.uniform(self.initial, delay * 3))
+            else:
+                delay = min(self.maximum, delay * 2)
+
+
+def _fixed_delays(delay, expo=False):
+    while True:
+        yield delay
+        if expo:
+            delay *= 2
+
+
+def _call_site(depth=2):
+    frame = sys._getframe(depth)
+    filename = frame.f_code.co_filename
+    if filename.startswith(project_path.strpath):
+        filename = filename[len(project_path.strpath) + 1:]
+    return '{}:{}'.format(filename, frame.f_lineno)
+
+
+class _Poller(object):
+    """Sleeps between the checks of :py:func:`wait_for`, passed to it as ``fail_func``"""
+    def __init__(self, delays, num_sec, wake=None, fail_func=None):
+        self.delays = delays
+        self.wake = wake
+        self.fail_func = fail_func
+        self.started = time.time()
+        self.deadline = self.started + num_sec
+        self.polls = 1
+        self.last_check = False
+        # End of the last check that failed and the end of the delay after it
+        self.failed_at = self.slept_until = self.started
+
+    def __call__(self):
+        self.failed_at = time.time()
+        remaining = self.deadline - self.failed_at
+        delay = next(self.delays)
+        if self.last_check:
+            # Past the deadline, wait_for times out
+            delay = remaining + DEADLINE_SLACK
+        elif delay >= remaining - DEADLINE_SLACK:
+            # Check once more right before the deadline instead of sleeping through it
+            delay = remaining - DEADLINE_SLACK
+            self.last_check = True
+        if delay > 0:
+            if self.wake is None:
+                time.sleep(delay)
+            elif self.wake.wait(delay):
+                self.wake.clear()
+        self.slept_until = time.time()
+        self.polls += 1
+        if self.fail_func:
+            self.fail_func()
+
+    def needed(self, finished):
+        """Time needed, i.e. the waiting without the last delay"""
+        return (self.failed_at - self.started) + (finished - self.slept_until)
+
+
+def wait_for(func, func_args=[], func_kwargs={}, **kwargs):
+    """:py:func:`wait_for.wait_for` logging to the cfme logger and recording statistics
+
+    Takes the same arguments, and in addition:
+
+    Args:
+        delay: Seconds between the checks, or a :py:class:`Backoff`
+        wake: A :py:class:`threading.Event` ending the delay when set
+    """
+    site = _call_site()
+    delay = kwargs.pop('delay', 1)
+    wake = kwargs.pop('wake', None)
+    num_sec = _get_timeout_secs(kwargs)
+    kwargs['num_sec'] = num_sec
+    kwargs.pop('timeout', None)
+    kwargs.setdefault('logger', logger)
+    expo = kwargs.pop('expo', False)
+    if isinstance(delay, Backoff):
+        stats = site_stats(site, learn=delay.learn)
+        delays = delay.delays(stats.typical)
+    else:
+        stats = site_stats(site)
+        delays = _fixed_delays(delay, expo)
+    poller = _Poller(delays, num_sec, wake=wake, fail_func=kwargs.pop('fail_func', None))
+    try:
+        result = wait_for_mod(
+            func, func_args, func_kwargs, delay=0, fail_func=poller, **kwargs)
+    except TimedOutError:
+        stats.record(poller.polls, time.time() - poller.started, timed_out=True)
+        raise
+    finished = time.time()
+    # A silent failure returns None
+    stats.record(poller.polls, finished - poller.started, poller.needed(finished),
+                 timed_out=result is None)
+    return result
+
 
-wait_for = partial(wait_for_mod, logger=logger)
 wait_for_decorator = partial(wait_for_decorator_mod, logger=logger)
@@ -0,0 +1,67 @@
+# Evaluation server of cfme.utils.rails_session, run by bin/rails runner.
+#
+# Request frames on stdin are "<length>\n<JSON>", the JSON having the Ruby "code", the "runner"
+# flag (the code is a file to load if it exists, like bin/rails runner does) and the "sandbox"
+# flag (the changes are rolled back). Replies on stdout are "<marker> <length>\n<JSON>" with the
+# "rc" and the "output". Anything else the code writes to the real stdout goes to stderr.
+require 'json'
+require 'stringio'
+
+RAILS_SESSION_MARKER = '#RAILS-SESSION#'.freeze
+
+rails_session_in = STDIN.dup
+rails_session_out = STDOUT.dup
+rails_session_out.sync = true
+STDIN.reopen(File::NULL)
+STDOUT.reopen(STDERR)
+
+# Every call gets its own local variables
+def rails_session_binding
+  binding
+end
+
+def rails_session_reply(out, data)
+  payload = data.to_json
+  out.write("#{RAILS_SESSION_MARKER} #{payload.bytesize}\n#{payload}")
+end
+
+rails_session_reply(rails_session_out, 'ready' => true, 'pid' => Process.pid)
+
+loop do
+  header = rails_session_in.gets
+  break if header.nil?
+  request = JSON.parse(rails_session_in.read(header.to_i))
+  code = request['code']
+  filename = '(rails session)'
+  if request['runner'] && File.file?(code)
+    filename = code
+    code = File.read(code)
+  end
+
+  output = StringIO.new
+  rc = 0
+  $stdout = output
+  begin
+    # The database may have been restarted and the settings changed since the last call
+    ActiveRecord::Base.connection.verify!
+    Vmdb::Settings.reload! if defined?(Vmdb::Settings) && Vmdb::Settings.respond_to?(:reload!)
+    if request['sandbox']
+      ActiveRecord::Base.transaction do
+        eval(code, rails_session_binding, filename)
+        raise ActiveRecord::Rollback
+      end
+    else
+      eval(code, rails_session_binding, filename)
+    end
+  rescue SystemExit => e
+    rc = e.status
+  rescue Exception => e
+    rc = 1
+    output.puts("#{e.class}: #{e.message}")
+    output.puts(e.backtrace.first(20))
+  ensure
+    $stdout = STDOUT
+  end
+  rails_session_reply(
+    rails_session_out, 'rc' => rc, 'output' => output.string.force_encoding('UTF-8').scrub)
+end
@@ -7,16 +7,21 @@ import os
 import py
 import re
 import requests
+import shutil
 import subprocess
+import tarfile
+import tempfile
 import time
 
 from collections import namedtuple
+from multiprocessing.pool import ThreadPool
 from requests.auth import HTTPBasicAuth
 from six.moves.urllib.parse import urlsplit, urlunsplit
 
 from cfme.test_framework.sprout.client import SproutClient
 from cfme.utils.appliance import IPAppliance
 from cfme.utils.conf import credentials, env
+from cfme.utils.coverage_merge import merge_resultsets
 from cfme.utils.log import logger, add_stdout_handler
 from cfme.utils.path import log_path
 from cfme.utils.quote import quote
@@ -628,133 +633,96 @@ def setup_appliance_for_merger(appliance, ssh):
             COVERAGE_DIR))
 
 
-def cleanup_coverage_data_wave(ssh, coverage_dir):
-    """Cleanup Coverage Data Wave
+def download_coverage_data(build, jenkins_data, directory):
+    """Download the coverage tarball of a build and extract its result sets.
 
-    Cleans up coverage data leftover from previous wave, and puts the
-    merged .resultset.json file in a place it will be picked up for merger
-    in the next wave.
+    Only the ``.resultset.json`` files are extracted, to ``directory/<job>-<build>/<n>/``.
 
     Args:
-        ssh:  ssh object
-        coverage_dir: directory where coverage data is extracted.
+        build:  jenkins job build from which to pull coverage data.
+        jenkins_data:  Named tupple with these attributes:  url, user, token, client
+        directory:  Local directory to extract the result sets to.
 
     Returns:
-        Nothing
-
-    Raises:
-
+        List of the paths of the extracted result sets.
     """
-    # Remove result set files.   They are all in directories like: $ip/$pid.
-    # So we will remove recursively directories and their contents that start with
-    # a number under the coverage directory.
-    ssh_run_cmd(
-        ssh=ssh,
-        cmd='cd {}; rm -rf [0-9]*'.format(coverage_dir),
-        error_msg='Could not cleanup old resultset files.')
-
-    # Move merged resultset where it will be treated like a resultset to be merged.
-    # We will create a directory like 1/1 and move the merged resultset under that.
-    merged_data_dir = py.path.local(coverage_dir).join('/1/1')
-    merged_resultset = py.path.local(coverage_dir).join('/merged/.resultset.json')
-    ssh_run_cmd(
-        ssh=ssh,
-        cmd='mkdir -p {}'.format(merged_data_dir),
-        error_msg='Could not make new merged data dir: {}'.format(merged_data_dir))
-    ssh_run_cmd(
-        ssh=ssh,
-        cmd='mv {} {}'.format(merged_resultset, merged_data_dir),
-        error_msg='Could not move merged result set, {}, to merged data dir, {}'.format(
-            merged_resultset, merged_data_dir))
-
-    # Remove merged directory.
-    merged_dir = '{}/merged'.format(coverage_dir)
-    ssh_run_cmd(
-        ssh=ssh,
-        cmd='rm -rf {}'.format(merged_dir),
-        error_msg='Failed removing merged directory, {}'.format(merged_dir))
+    logger.info('Downloading the coverage data from build %s', build.number)
+    build_dir = os.path.join(directory, '{}-{}'.format(build.job, build.number))
+    os.makedirs(build_dir)
+    archive = os.path.join(build_dir, 'coverage.tgz')
+    url = '{}/job/{}/{}/artifact/{}'.format(
+        jenkins_data.url, build.job, build.number, build.coverage_archive)
+    response = requests.get(
+        url, verify=False, stream=True, auth=HTTPBasicAuth(jenkins_data.user, jenkins_data.token))
+    response.raise_for_status()
+    with open(archive, 'wb') as f:
+        for block in response.iter_content(1024 * 1024):
+            f.write(block)
+
+    logger.info('Extracting the coverage data from build %s', build.number)
+    resultsets = []
+    with tarfile.open(archive) as tar:
+        for member in tar:
+            if not member.isfile() or os.path.basename(member.name) != '.resultset.json':
+                continue
+            resultset_dir = os.path.join(build_dir, str(len(resultsets)))
+            os.makedirs(resultset_dir)
+            resultset = os.path.join(resultset_dir, '.resultset.json')
+            with open(resultset, 'wb') as f:
+                shutil.copyfileobj(tar.extractfile(member), f)
+            resultsets.append(resultset)
+    os.remove(archive)
+    return resultsets
 
 
 def download_and_merge_coverage_data(ssh, builds, jenkins_data, wave_size):
-    """Download and merge coverage data in waves.
+    """Download and merge coverage data locally.
 
-    Download the coverage tarballs from from the specified builds in waves, merging
-    the coverage data a few tarballs at a time.
+    The coverage tarballs of the builds are downloaded ``wave_size`` at a time and all their
+    result sets are merged locally by :py:func:`cfme.utils.coverage_merge.merge_resultsets`.
+    The merged result set is uploaded to the appliance, where ``coverage_merger.rb`` only adds the
+    files not covered at all and generates the HTML.
 
     Args:
         ssh:  ssh object
         builds:  jenkins job builds from which to pull coverage data.
         jenkins_data:  Named tupple with these attributes:  url, user, token, client
-        wave_size:  How many coverage tarballs to extract at a time when merging
+        wave_size:  How many coverage tarballs to download at a time
 
     Returns:
         Nothing
     """
-    # Note, this is totally based around the fact that coverage_merger.rb
-    # doesn't care where a .resultset.json file (i.e. ruby code coverage
-    # data file) comes from, such that we can reuse the merged data file
-    # with successive waves of coverage data from different jenkins builds.
-    #
-    # What we will do for each wave is:
-    #
-    #   * extract some coverage data tarballs.
-    #   * merge those.
-    #   * cleanup the old data, and make the merged data look like just another
-    #     result set.  On the last wave there is no cleanup.
-    i = 0
-    wave = 1
-    while i < len(builds):
-        logger.info('Processing wave #%s of coverage tarballs.', wave)
-        build_wave = builds[i:i + wave_size]
-        for build in build_wave:
-            logger.info('Downloading the coverage data from build %s', build.number)
-            download_url = jenkins_artifact_url(
-                jenkins_data.user,
-                jenkins_data.token,
-                jenkins_data.url,
-                build.job,
-                build.number,
-                build.coverage_archive)
-            ssh_run_cmd(
-                ssh=ssh,
-                cmd='curl -k -o {} {}'.format(
-                    py.path.local(COVERAGE_DIR).join('tmp.tgz'),
-                    quote(download_url)),
-                error_msg='Could not download coverage data from jenkins!')
-
-            logger.info('Extracting the coverage data from build %s', build.number)
-            extract_command = ' && '.join([
-                'cd {}'.format(COVERAGE_DIR),
-                'tar xf tmp.tgz --strip-components=1',
-                'rm -f tmp.tgz'])
-            ssh_run_cmd(
-                ssh=ssh,
-                cmd=extract_command,
-                error_msg='Could not extract coverage data!')
-
-        merge_coverage_data(
+    workdir = tempfile.mkdtemp(prefix='coverage-')
+    try:
+        pool = ThreadPool(wave_size)
+        try:
+            resultsets = [
+                resultset
+                for build_resultsets in pool.map(
+                    lambda build: download_coverage_data(build, jenkins_data, workdir), builds)
+                for resultset in build_resultsets]
+        finally:
+            pool.close()
+            pool.join()
+
+        logger.info('Merging %d result sets from %d builds', len(resultsets), len(builds))
+        started = time.time()
+        merged = merge_resultsets(resultsets, os.path.join(workdir, '.resultset.json'))
+        logger.info('Merged the coverage data in %.1fs', time.time() - started)
+
+        # coverage_merger.rb takes it as the result set of a process
+        merged_data_dir = py.path.local(COVERAGE_DIR).join('1', '1')
+        ssh_run_cmd(
             ssh=ssh,
-            coverage_dir=COVERAGE_DIR)
+            cmd='mkdir -p {}'.format(merged_data_dir),
+            error_msg='Could not make merged data dir: {}'.format(merged_data_dir))
+        ssh.put_file(merged, merged_data_dir.join('.resultset.json').strpath)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
 
-        # Increment index and wave count
-        i += wave_size
-        wave += 1
-
-        # We have to cleanup the coverage data we just extracted, move
-        # the merged .resultset.json file, and remove the merged data directory.
-        # We move the .resultset.json files so that it will be seen as just another
-        # result set to merge in the next wave, and the merged data directory is removed
-        # so coverage_merger.rb won't get confused by results already being where it drops
-        # it's results.   However it is important that we don't do that
-        # on the last wave, as we want the merge results to be available after the
-        # last wave.
-        #
-        # XXX: Yes, this is a hack.  Not even one I am proud of.
-        if i < len(builds):
-            cleanup_coverage_data_wave(
-                ssh=ssh,
-                coverage_dir=COVERAGE_DIR,
-            )
+    merge_coverage_data(
+        ssh=ssh,
+        coverage_dir=COVERAGE_DIR)
 
 
 def aggregate_coverage(appliance, jenkins_url, jenkins_user, jenkins_token, jenkins_jobs,
@@ -772,7 +740,7 @@ def aggregate_coverage(appliance, jenkins_url, jenkins_user, jenkins_token, jenk
         jenkins_user: Jenkins user name
         jenkins_token:  Jenkins user authentication token.
         jenkins_jobs:  Jenkins job names from which to aggregate coverage data
-        wave_size:  How many coverage tarballs to extract at a time when merging
+        wave_size:  How many coverage tarballs to download at a time
 
     Returns:
         Nothing
@@ -856,7 +824,7 @@ def aggregate_coverage(appliance, jenkins_url, jenkins_user, jenkins_token, jenk
 @click.option('--jenkins-token', 'jenkins_token', default=None,
     help='Jenkins user authentication token')
 @click.option('--wave-size', 'wave_size', default=10,
-    help='How many coverage tarballs to extract at a time when merging')
+    help='How many coverage tarballs to download at a time')
 def coverage_report_jenkins(jenkins_url, jenkins_jobs, jenkins_user, jenkins_token, appliance_ip,
         appliance_version, wave_size):
     """Aggregate coverage data from jenkins job(s) and upload to sonarqube"""
@@ -1,19 +1,24 @@
 #!/usr/bin/env python2
 
+import argparse
 import os
 import os.path
-import sys
 import re
 import six
 
-if len(sys.argv) == 1:
-    print("""
-Invoke either by supplying a path or a file and optionally a string to find in a test name
-
-e.g. list_test . provision
-e.g. list_test file.py
-""")
-    sys.exit(1)
+arg_parser = argparse.ArgumentParser(
+    description='Invoke either by supplying a path or a file and optionally a string to find in '
+    'a test name, e.g. "list_tests.py . provision" or "list_tests.py file.py"',
+    epilog='With --appliance-version, the modules collected by an earlier test run with the same '
+    'configuration are listed from the collection manifest.')
+arg_parser.add_argument('path', help='Test module or directory with test modules')
+arg_parser.add_argument('exp', nargs='?', default=None, help='String to find in the test names')
+arg_parser.add_argument('--appliance-version', default=None,
+    help='Version of the appliance the tests were collected against')
+arg_parser.add_argument('--use-provider', action='append', default=[],
+    help='Provider keys the tests were collected with, same as the pytest option')
+arg_parser.add_argument('--parametrized', action='store_true', default=False,
+    help='List the parametrized tests of the modules found in the collection manifest')
 
 
 def parser(filename, exp=None):
@@ -34,15 +39,40 @@ def parser(filename, exp=None):
             print("{} :: {}".format(filename, test[0]))
 
 
-exp = None
-if len(sys.argv) == 3:
-    exp = sys.argv[2]
+def print_manifest(filename, nodeids, exp=None, parametrized=False):
+    listed = set()
+    for nodeid in nodeids:
+        test = nodeid.split('::')[-1]
+        if not parametrized:
+            test = test.split('[', 1)[0]
+        if test in listed or (exp and exp not in test):
+            continue
+        listed.add(test)
+        print("{} :: {}".format(filename, test))
+
+
+args = arg_parser.parse_args()
 
-if sys.argv[1].endswith('.py'):
-    parser(sys.argv[1], exp)
+if args.path.endswith('.py'):
+    files = [args.path]
 else:
-    files = [os.path.join(d, fn) for d, dn, fns in os.walk(sys.argv[1]) for fn in fns]
+    files = [os.path.join(d, fn) for d, dn, fns in os.walk(args.path) for fn in fns
+             if fn.endswith('.py')]
+
+# Modules unchanged since a collection with the same configuration are listed from the manifest,
+# the config hash depends on the appliance version so the manifest is used only if it is given
+manifest = {}
+if args.appliance_version:
+    try:
+        from cfme.fixtures.collection_cache import config_digest, lookup
+        manifest = lookup(files, config=config_digest(args.appliance_version, args.use_provider))
+    except Exception:
+        manifest = {}
+elif args.parametrized:
+    arg_parser.error('--parametrized requires --appliance-version')
 
-    for filename in files:
-        if filename.endswith('.py'):
-            parser(filename, exp)
+for filename in files:
+    if filename in manifest:
+        print_manifest(filename, manifest[filename], args.exp, args.parametrized)
+    else:
+        parser(filename, args.exp)
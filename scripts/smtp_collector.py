@@ -1,6 +1,11 @@
 #!/usr/bin/env python2
 # -*- coding: utf-8 -*-
-"""Script used to catch and expose e-mails from CFME"""
+"""Script used to catch and expose e-mails from CFME
+
+The e-mails are kept in an in-memory SQLite database, indexed by the addresses, subject and
+arrival time, with a full text index of the bodies for the ``text_match`` filter.
+``/messages/wait`` is a long poll, it returns as soon as enough matching e-mails arrived.
+"""
 
 from bottle import route, run, response, request
 from collections import namedtuple
@@ -16,18 +21,25 @@ import re
 import sqlite3
 import sys
 import threading
+import time
+from six.moves.socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIServer
 
 
 TIME_FORMAT = "%Y-%m-%d-%H-%M-%S"
 ROWS = ("from_address", "to_address", "subject", "time", "text")
+#: Longest time one /messages/wait request waits
+MAX_WAIT = 60
 
-# Shared variable with all messages
+# Shared variable with all messages, the condition is notified when an e-mail arrives
 db_lock = threading.RLock()
+new_email = threading.Condition(db_lock)
 connection = sqlite3.connect(":memory:", check_same_thread=False)
 cur = connection.cursor()
 cur.execute(
     """
     CREATE TABLE emails (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
         from_address TEXT,
         to_address TEXT,
         subject TEXT,
@@ -36,6 +48,14 @@ cur.execute(
     )
     """
 )
+for column in ("from_address", "to_address", "subject", "time"):
+    cur.execute("CREATE INDEX emails_{0} ON emails ({0})".format(column))
+try:
+    cur.execute("CREATE VIRTUAL TABLE emails_fts USING fts4 (text)")
+    fts_enabled = True
+except sqlite3.OperationalError:
+    # SQLite built without FTS, text_match falls back to LIKE
+    fts_enabled = False
 connection.commit()
 
 # To write the e-mails into the files
@@ -62,44 +82,55 @@ def write(what, end="\n"):
     sys.stdout.flush()
 
 
+def store_message(data):
+    """Puts the raw e-mail in the database and wakes up the requests waiting for e-mails"""
+    message = email.message_from_string(data)
+    payload = message.get_payload()
+    if isinstance(payload, list):
+        # Message can have multiple payloads, so let's join them for simplicity
+        payload = "\n".join([x.get_payload().strip() for x in payload])
+    d = dict(message.items())
+    with db_lock:
+        global connection
+        cursor = connection.cursor()
+        cursor.execute(
+            "INSERT INTO emails (from_address, to_address, subject, time, text) "
+            "VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?)",
+            (
+                d["From"],
+                ",".join([address.strip() for address in d["To"].strip().split(",")]),
+                d["Subject"],
+                payload)
+        )
+        if fts_enabled:
+            cursor.execute(
+                "INSERT INTO emails_fts (docid, text) VALUES (?, ?)",
+                (cursor.lastrowid, payload))
+        connection.commit()
+        new_email.notify_all()
+    if email_folder is not None:
+        with files_lock:
+            # Create directories if they don't exist
+            current_test_folder = email_folder.join(test_name or "default-test")
+            if not current_test_folder.exists():
+                current_test_folder.mkdir()
+            arrived = datetime.now()
+
+            def _getfname(counter):
+                return current_test_folder\
+                    .join("%s-%d.eml" % (arrived.strftime("%Y%m%d%H%M%S"), int(counter)))
+            cnt = 0
+            while _getfname(cnt).exists():
+                cnt += 1
+            with _getfname(cnt).open("w") as output:
+                # Dump the raw e-mail data
+                output.write(data)
+
+
 class EmailServer(SMTPServer):
     """Simple e-mail server. What does it do is that every mail is put in the database."""
     def process_message(self, peer, mailfrom, rcpttos, data):
-        message = email.message_from_string(data)
-        payload = message.get_payload()
-        if isinstance(payload, list):
-            # Message can have multiple payloads, so let's join them for simplicity
-            payload = "\n".join([x.get_payload().strip() for x in payload])
-        d = dict(message.items())
-        with db_lock:
-            global connection
-            cursor = connection.cursor()
-            cursor.execute(
-                "INSERT INTO emails VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?)",
-                (
-                    d["From"],
-                    ",".join([address.strip() for address in d["To"].strip().split(",")]),
-                    d["Subject"],
-                    payload)
-            )
-            connection.commit()
-        if email_folder is not None:
-            with files_lock:
-                # Create directories if they don't exist
-                current_test_folder = email_folder.join(test_name or "default-test")
-                if not current_test_folder.exists():
-                    current_test_folder.mkdir()
-                arrived = datetime.now()
-
-                def _getfname(counter):
-                    return current_test_folder\
-                        .join("%s-%d.eml" % (arrived.strftime("%Y%m%d%H%M%S"), int(counter)))
-                cnt = 0
-                while _getfname(cnt).exists():
-                    cnt += 1
-                with _getfname(cnt).open("w") as output:
-                    # Dump the raw e-mail data
-                    output.write(data)
+        store_message(data)
 
 
 @route("/set_test_name")
@@ -115,15 +146,11 @@ def set_test_name():
         return json.dumps(False)
 
 
-@route("/messages")
-def all_messages():
-    """Return a JSON with all e-mails (eventually filtered)"""
-    response.content_type = "application/json"
-
-    # Build SQL
-    sql = 'SELECT * FROM emails'
+def _filter_sql():
+    """Builds the WHERE clause of the request filters
 
-    # Build WHERE clause(s)
+    Returns: A tuple of the clause (an empty string if there is no filter) and the bindings.
+    """
     bindings = ()
     where_clause = list()
     if request.query.from_address:
@@ -141,32 +168,62 @@ def all_messages():
     if request.query.text_like:
         where_clause.append("text LIKE ?")
         bindings += (request.query.text_like,)
+    if request.query.text_match:
+        if fts_enabled:
+            where_clause.append("id IN (SELECT docid FROM emails_fts WHERE text MATCH ?)")
+            bindings += (request.query.text_match,)
+        else:
+            where_clause.append("text LIKE ?")
+            bindings += ("%{}%".format(request.query.text_match),)
     if request.query.text:
         where_clause.append("text = ?")
         bindings += (request.query.text,)
     if request.query.time_from:
-        time = parsetime.from_request_format(request.query.time_from)
+        time_from = parsetime.from_request_format(request.query.time_from)
         where_clause.append("time >= ?")
-        bindings += (time,)
+        bindings += (time_from,)
     if request.query.time_to:
-        time = parsetime.from_request_format(request.query.time_to)
+        time_to = parsetime.from_request_format(request.query.time_to)
         where_clause.append("time <= ?")
-        bindings += (time,)
+        bindings += (time_to,)
 
     if where_clause:
-        sql += ' WHERE {}'.format(" AND ".join(where_clause))
+        return ' WHERE {}'.format(" AND ".join(where_clause)), bindings
+    return '', bindings
 
-    # Order by time arrived
-    sql += " ORDER BY time ASC"
 
+def _select_messages(where, bindings):
+    """Returns the e-mails matching the WHERE clause, ordered by the arrival, db_lock held"""
+    sql = 'SELECT {} FROM emails{} ORDER BY time ASC, id ASC'.format(", ".join(ROWS), where)
+    return [dict(zip(ROWS, row)) for row in connection.cursor().execute(sql, bindings)]
+
+
+@route("/messages")
+def all_messages():
+    """Return a JSON with all e-mails (eventually filtered)"""
+    response.content_type = "application/json"
+    where, bindings = _filter_sql()
     with db_lock:
-        global connection
-        db = connection.cursor()
-        # execute query
-        c = db.execute(sql, bindings)
+        return json.dumps(_select_messages(where, bindings))
 
-        rows = c.fetchall()
-        return json.dumps([dict(zip(ROWS, row)) for row in rows])
+
+@route("/messages/wait")
+def wait_for_messages():
+    """Wait until at least ``count`` e-mails match the filters, at most ``timeout`` seconds
+
+    Returns a JSON with the matching e-mails, possibly fewer than ``count`` on timeout.
+    """
+    response.content_type = "application/json"
+    where, bindings = _filter_sql()
+    count = int(request.query.count or 1)
+    deadline = time.time() + min(float(request.query.timeout or MAX_WAIT), MAX_WAIT)
+    with new_email:
+        while True:
+            messages = _select_messages(where, bindings)
+            remaining = deadline - time.time()
+            if len(messages) >= count or remaining <= 0:
+                return json.dumps(messages)
+            new_email.wait(remaining)
 
 
 @route("/messages.html")
@@ -175,7 +232,8 @@ def all_messages_in_html():
     emails = []
     Email = namedtuple("Email", ["source", "destination", "subject", "received", "body"])
     with db_lock:
-        emails = map(Email._make, connection.cursor().execute("SELECT * FROM emails").fetchall())
+        emails = map(Email._make, connection.cursor().execute(
+            "SELECT {} FROM emails ORDER BY time ASC, id ASC".format(", ".join(ROWS))).fetchall())
 
     return template_env.get_template("smtp_result.html").render(emails=emails)
 
@@ -188,10 +246,16 @@ def clear_database():
         global connection
         cursor = connection.cursor()
         cursor.execute("DELETE FROM emails")
+        if fts_enabled:
+            cursor.execute("DELETE FROM emails_fts")
         connection.commit()
     return json.dumps(True)
 
 
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
 def run_email_server(port=1025):
     EmailServer(("0.0.0.0", port), None)
     try:
@@ -202,7 +266,8 @@ def run_email_server(port=1025):
 
 def run_email_query(port=1026):
     try:
-        run(host="0.0.0.0", port=port, quiet=True)
+        # Threaded, so that the long polls do not block the other queries
+        run(host="0.0.0.0", port=port, quiet=True, server_class=ThreadingWSGIServer)
     except KeyboardInterrupt:
         pass
 
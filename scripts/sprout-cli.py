@@ -4,15 +4,11 @@ import json
 import os
 import sys
 from cfme.utils.conf import env
-from cfme.utils.sprout import SproutClient
+from cfme.test_framework.sprout.client import SproutClient
 
 
-def main():
-    host = env.get("sprout", {}).get("hostname", "localhost")
-    port = env.get("sprout", {}).get("port", 8000)
-
-    command_args = sys.argv[1:]
-
+def parse_call(command_args):
+    """Parses ``method arg1 arg2 kwarg1=value1 ...`` into ``(method, args, kwargs)``"""
     try:
         method = command_args.pop(0)
     except IndexError:
@@ -35,15 +31,41 @@ def main():
         except ValueError:
             pass
         kwargs[param] = value
+    return method, args, kwargs
+
+
+def main():
+    host = env.get("sprout", {}).get("hostname", "localhost")
+    port = env.get("sprout", {}).get("port", 8000)
+
+    command_args = sys.argv[1:]
+    auth = None
+    if command_args and ":" in command_args[-1] and "=" not in command_args[-1]:
+        auth = [x.strip() for x in command_args.pop().split(":", 1)]
+
+    # Multiple calls separated by -- are sent in a single batch request
+    calls = []
+    call_args = []
+    for arg in command_args + ["--"]:
+        if arg == "--":
+            calls.append(parse_call(call_args))
+            call_args = []
+        else:
+            call_args.append(arg)
+
     additional_kwargs = {}
-    if command_args and ":" in command_args[0]:
-        additional_kwargs["auth"] = [x.strip() for x in command_args[0].split(":", 1)]
+    if auth is not None:
+        additional_kwargs["auth"] = auth
     elif "SPROUT_USER" in os.environ and "SPROUT_PASSWORD" in os.environ:
         additional_kwargs["auth"] = os.environ["SPROUT_USER"], os.environ["SPROUT_PASSWORD"]
     elif "SPROUT_PASSWORD" in os.environ:
         additional_kwargs["auth"] = os.environ["USER"], os.environ["SPROUT_PASSWORD"]
     client = SproutClient(host=host, port=port, **additional_kwargs)
-    print(json.dumps(client.call_method(method, *args, **kwargs)))
+    if len(calls) == 1:
+        method, args, kwargs = calls[0]
+        print(json.dumps(client.call_method(method, *args, **kwargs)))
+    else:
+        print(json.dumps(client.batch(calls)))
 
 
 if __name__ == "__main__":
@@ -10,7 +10,8 @@ from django_object_actions import DjangoObjectActions
 # Register your models here.
 from appliances.models import (
     Provider, Template, Appliance, Group, AppliancePool, DelayedProvisionTask,
-    MismatchVersionMailer, UserApplianceQuota, User, BugQuery, GroupShepherd)
+    MismatchVersionMailer, UserApplianceQuota, User, BugQuery, GroupShepherd,
+    PoolDemand)
 from appliances import tasks
 from sprout.log import create_logger
 
@@ -54,6 +55,11 @@ class GroupShepherdAdmin(Admin):
     pass
 
 
+@register_for(PoolDemand)
+class PoolDemandAdmin(Admin):
+    list_display = ["group", "version", "preconfigured", "count", "owner", "created_on"]
+
+
 @register_for(Appliance)
 class ApplianceAdmin(Admin):
     objectactions = ["power_off", "power_on", "suspend", "kill"]
@@ -23,30 +23,46 @@ def json_response(data):
     return HttpResponse(json.dumps(data), content_type="application/json")
 
 
-def json_exception(e):
-    return json_response({
+def exception_result(e):
+    return {
         "status": "exception",
         "result": {
             "class": type(e).__name__,
             "message": str(e)
         }
-    })
+    }
 
 
-def json_autherror(message):
-    return json_response({
+def autherror_result(message):
+    return {
         "status": "autherror",
         "result": {
             "message": str(message)
         }
-    })
+    }
 
 
-def json_success(result):
-    return json_response({
+def success_result(result):
+    return {
         "status": "success",
         "result": result
-    })
+    }
+
+
+def json_exception(e):
+    return json_response(exception_result(e))
+
+
+def json_autherror(message):
+    return json_response(autherror_result(message))
+
+
+def json_success(result):
+    return json_response(success_result(result))
+
+
+class AuthError(Exception):
+    pass
 
 
 class JSONMethod(object):
@@ -109,6 +125,39 @@ class JSONApi(object):
             })
         try:
             data = json.loads(request.body)
+        except ValueError as e:
+            return json_exception(e)
+        ipaddr = get_ip(request)
+        # Users authenticated within this request, so a batch checks the password only once
+        users = {}
+        if "batch" in data:
+            # Batch of calls in a single request, each one gets its own status and result
+            results = []
+            for call_data in data["batch"]:
+                if "auth" in data:
+                    call_data.setdefault("auth", data["auth"])
+                results.append(self._call(call_data, ipaddr, users))
+            return json_success(results)
+        return json_response(self._call(data, ipaddr, users))
+
+    def _authenticate(self, auth, users):
+        username, password = auth
+        if username in users:
+            user, checked_password = users[username]
+            if checked_password == password:
+                return user
+        try:
+            user = User.objects.get(username=username)
+        except ObjectDoesNotExist:
+            raise AuthError("User {} does not exist!".format(username))
+        if not user.check_password(password):
+            raise AuthError("Wrong password for user {}!".format(username))
+        users[username] = user, password
+        return user
+
+    def _call(self, data, ipaddr, users):
+        method = None
+        try:
             method_name = data["method"]
             args = data["args"]
             kwargs = data["kwargs"]
@@ -116,31 +165,27 @@ class JSONApi(object):
                 method = self._methods[method_name]
             except KeyError:
                 raise NameError("Method {} not found!".format(method_name))
-            ipaddr = get_ip(request)
             create_logger(method).info(
                 "Calling with parameters {!r}{!r} from {!r}".format(tuple(args), kwargs, ipaddr))
             if method.auth:
                 if "auth" in data:
-                    username, password = data["auth"]
-                    try:
-                        user = User.objects.get(username=username)
-                    except ObjectDoesNotExist:
-                        return json_autherror("User {} does not exist!".format(username))
-                    if not user.check_password(password):
-                        return json_autherror("Wrong password for user {}!".format(username))
+                    user = self._authenticate(data["auth"], users)
                     create_logger(method).info(
                         "Called by user {}/{}".format(user.id, user.username))
-                    return json_success(method(user, *args, **kwargs))
+                    result = success_result(method(user, *args, **kwargs))
                 else:
-                    return json_autherror("Method {} needs authentication!".format(method_name))
+                    return autherror_result("Method {} needs authentication!".format(method_name))
             else:
-                return json_success(method(*args, **kwargs))
+                result = success_result(method(*args, **kwargs))
+        except AuthError as e:
+            return autherror_result(e)
         except Exception as e:
             create_logger(method).error(
                 "Exception raised during call: {}: {}".format(type(e).__name__, str(e)))
-            return json_exception(e)
+            return exception_result(e)
         else:
             create_logger(method).info("Call finished")
+            return result
 
 
 jsonapi = JSONApi()
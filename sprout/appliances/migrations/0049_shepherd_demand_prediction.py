@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('appliances', '0048_openshift_project_made_bigger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PoolDemand',
+            fields=[
+                ('id', models.AutoField(
+                    auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(blank=True, max_length=32, null=True)),
+                ('preconfigured', models.BooleanField(default=True)),
+                ('count', models.IntegerField(help_text=b'How many appliances were requested.')),
+                ('created_on', models.DateTimeField(
+                    db_index=True, default=django.utils.timezone.now, editable=False)),
+                ('group', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE, to='appliances.Group')),
+                ('owner', models.ForeignKey(
+                    blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL,
+                    to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_on', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='groupshepherd',
+            name='predictive',
+            field=models.BooleanField(
+                default=False,
+                help_text=(
+                    b'Whether to grow the pools ahead of the demand predicted from the history.'
+                )),
+        ),
+        migrations.AddField(
+            model_name='groupshepherd',
+            name='max_template_pool_size',
+            field=models.IntegerField(
+                blank=True, null=True, help_text=b'Upper bound of the predictive pool size.'),
+        ),
+        migrations.AddField(
+            model_name='groupshepherd',
+            name='max_unconfigured_template_pool_size',
+            field=models.IntegerField(
+                blank=True, null=True,
+                help_text=b'Upper bound of the predictive pool size - unconfigured ones.'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import base64
+import math
 import re
 import yaml
 import six
@@ -20,7 +21,7 @@ from datetime import timedelta, date
 from django.contrib.auth.models import User, Group as DjangoGroup
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models, transaction
-from django.db.models import Q
+from django.db.models import Q, Sum
 from django.db.models.signals import pre_save
 from django.dispatch import receiver
 from django.utils import timezone
@@ -28,7 +29,7 @@ from json_field import JSONField
 
 from cached_property import threaded_cached_property
 
-from sprout import critical_section, redis
+from sprout import critical_section, redis, settings
 from sprout.log import create_logger
 
 from cfme.utils.appliance import Appliance as CFMEAppliance, IPAppliance
@@ -63,6 +64,24 @@ def apply_if_not_none(o, meth, *args, **kwargs):
     return getattr(o, meth)(*args, **kwargs)
 
 
+def window_average(records, window_starts, window_length):
+    """Average the sum of counts falling into each of the windows.
+
+    Args:
+        records: Iterable of ``(datetime, count)`` tuples.
+        window_starts: Beginnings of the windows to average over.
+        window_length: :py:class:`datetime.timedelta` length of each window.
+    """
+    if not window_starts:
+        return 0.0
+    records = list(records)
+    total = 0
+    for start in window_starts:
+        end = start + window_length
+        total += sum(count for when, count in records if start <= when < end)
+    return float(total) / len(window_starts)
+
+
 class MetadataMixin(models.Model):
     class Meta:
         abstract = True
@@ -499,6 +518,12 @@ class GroupShepherd(MetadataMixin):
         help_text="How many appliances to keep spinned for quick taking.")
     unconfigured_template_pool_size = models.IntegerField(default=0,
         help_text="How many appliances to keep spinned for quick taking - unconfigured ones.")
+    predictive = models.BooleanField(default=False,
+        help_text="Whether to grow the pools ahead of the demand predicted from the history.")
+    max_template_pool_size = models.IntegerField(null=True, blank=True,
+        help_text="Upper bound of the predictive pool size.")
+    max_unconfigured_template_pool_size = models.IntegerField(null=True, blank=True,
+        help_text="Upper bound of the predictive pool size - unconfigured ones.")
 
     class Meta:
         ordering = ['template_group', 'user_group', 'id']
@@ -521,8 +546,9 @@ class GroupShepherd(MetadataMixin):
             self.appliances.filter(
                 template__preconfigured=preconfigured, appliance_pool=None,
                 marked_for_deletion=False))
-        wanted_pool_size = (
-            self.template_pool_size if preconfigured else self.unconfigured_template_pool_size)
+        wanted_pool_size = self.target_pool_size(
+            preconfigured, version=self.kept_version(preconfigured),
+            current=appliances_in_shepherd)
         if wanted_pool_size == 0:
             return 100
         return int(round((float(appliances_in_shepherd) / float(wanted_pool_size)) * 100.0))
@@ -540,6 +566,128 @@ class GroupShepherd(MetadataMixin):
     def unconfigured_shepherd_appliances(self):
         return self.shepherd_appliances(False)
 
+    def pool_size(self, preconfigured):
+        return self.template_pool_size if preconfigured else self.unconfigured_template_pool_size
+
+    def max_pool_size(self, preconfigured):
+        return (
+            self.max_template_pool_size
+            if preconfigured
+            else self.max_unconfigured_template_pool_size)
+
+    def kept_version(self, preconfigured):
+        """The version the shepherd keeps the appliances of, the latest one of the group.
+
+        ``None`` for the groups without versions (upstream), which are kept by date.
+        """
+        versions = Template.get_versions(
+            template_group=self.template_group, ready=True, usable=True,
+            preconfigured=preconfigured, provider__user_groups=self.user_group)
+        return versions[0] if versions else None
+
+    def demand(self, preconfigured, version=None):
+        """Recorded pool requests that could have been served by this shepherd.
+
+        The requests for any version are counted for every version.
+        """
+        demand = PoolDemand.objects.filter(
+            group=self.template_group, preconfigured=preconfigured,
+            owner__groups=self.user_group)
+        if version is not None:
+            demand = demand.filter(Q(version=version) | Q(version=None) | Q(version=''))
+        return demand
+
+    def actual_demand(self, preconfigured, version=None, at=None):
+        """How many appliances were requested within the demand horizon preceding ``at``."""
+        at = at or timezone.now()
+        horizon = timedelta(**settings.SHEPHERD_DEMAND_HORIZON)
+        return self.demand(preconfigured, version).filter(
+            created_on__gte=at - horizon, created_on__lt=at).aggregate(
+            Sum('count'))['count__sum'] or 0
+
+    def predicted_demand(self, preconfigured, version=None, at=None):
+        """Predict how many appliances will be requested within the demand horizon after ``at``.
+
+        The prediction blends the moving average of the same time of day over the last
+        ``SHEPHERD_DEMAND_DAYS`` days with the moving average of the same time of the same day of
+        week over the last ``SHEPHERD_DEMAND_WEEKS`` weeks.
+        """
+        at = at or timezone.now()
+        horizon = timedelta(**settings.SHEPHERD_DEMAND_HORIZON)
+        daily_starts = [
+            at - timedelta(days=days) for days in range(1, settings.SHEPHERD_DEMAND_DAYS + 1)]
+        weekly_starts = [
+            at - timedelta(weeks=weeks) for weeks in range(1, settings.SHEPHERD_DEMAND_WEEKS + 1)]
+        oldest = min(daily_starts + weekly_starts + [at])
+        records = self.demand(preconfigured, version).filter(
+            created_on__gte=oldest, created_on__lt=at).values_list('created_on', 'count')
+        records = list(records)
+        weekday_weight = settings.SHEPHERD_DEMAND_WEEKDAY_WEIGHT
+        return (
+            weekday_weight * window_average(records, weekly_starts, horizon) +
+            (1.0 - weekday_weight) * window_average(records, daily_starts, horizon))
+
+    @property
+    def capacity(self):
+        """How many more appliances the providers of this shepherd can take. None if unlimited."""
+        free_slots = 0
+        for provider in Provider.objects.filter(
+                user_groups=self.user_group, working=True, disabled=False):
+            if provider.appliance_limit is None:
+                return None
+            free_slots += provider.remaining_appliance_slots
+        return free_slots
+
+    def target_pool_size(self, preconfigured, version=None, current=0):
+        """Return how many appliances should the shepherd keep right now.
+
+        Without the predictive mode this is the static pool size. With it, the pool grows ahead of
+        the predicted demand, bounded by the maximum pool size and by the free capacity of the
+        providers.
+
+        Args:
+            preconfigured: Whether to check the pure ones or configured ones.
+            version: Version the shepherd keeps. ``None`` considers the demand for any version.
+            current: How many appliances are currently in the shepherd.
+        """
+        pool_size = self.pool_size(preconfigured)
+        if not self.predictive:
+            return pool_size
+        target = max(
+            pool_size, int(math.ceil(self.predicted_demand(preconfigured, version=version))))
+        max_pool_size = self.max_pool_size(preconfigured)
+        if max_pool_size is not None:
+            target = min(target, max(pool_size, max_pool_size))
+        capacity = self.capacity
+        if capacity is not None:
+            target = min(target, max(pool_size, current + capacity))
+        return target
+
+    def demand_report(self, preconfigured):
+        """Predicted versus actual demand for displaying on the shepherd page."""
+        now = timezone.now()
+        horizon = timedelta(**settings.SHEPHERD_DEMAND_HORIZON)
+        version = self.kept_version(preconfigured)
+        current = len(self.shepherd_appliances(preconfigured))
+        return {
+            'version': version,
+            'pool_size': self.pool_size(preconfigured),
+            'target_pool_size': self.target_pool_size(
+                preconfigured, version=version, current=current),
+            'predicted_next': self.predicted_demand(preconfigured, version=version, at=now),
+            'predicted_last': self.predicted_demand(
+                preconfigured, version=version, at=now - horizon),
+            'actual_last': self.actual_demand(preconfigured, version=version, at=now),
+        }
+
+    @property
+    def configured_demand_report(self):
+        return self.demand_report(True)
+
+    @property
+    def unconfigured_demand_report(self):
+        return self.demand_report(False)
+
     def __unicode__(self):
         return "{} {}/{} (pool size={}/{})".format(
             type(self).__name__, self.template_group.id, self.user_group.name,
@@ -1359,6 +1507,7 @@ class AppliancePool(MetadataMixin):
             raise Exception("No possible templates! (pool params: {})".format(str(req_params)))
         req.save()
         cls.class_logger(req.pk).info("Created")
+        PoolDemand.record(req)
         if num_appliances > 0:
             # Only if we have any appliances to request
             request_appliance_pool.delay(req.id, time_leased)
@@ -1589,6 +1738,31 @@ class AppliancePool(MetadataMixin):
             self.id, self.group.id, self.total_count)
 
 
+class PoolDemand(models.Model):
+    """Historical record of the appliance pool requests. Unlike pools, these are kept after the
+    appliances expire so the shepherd can predict the demand."""
+    group = models.ForeignKey(Group, on_delete=models.CASCADE)
+    version = models.CharField(max_length=32, null=True, blank=True)
+    preconfigured = models.BooleanField(default=True)
+    count = models.IntegerField(help_text="How many appliances were requested.")
+    owner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_on = models.DateTimeField(default=timezone.now, editable=False, db_index=True)
+
+    class Meta:
+        ordering = ['created_on', 'id']
+
+    @classmethod
+    def record(cls, pool):
+        if pool.total_count <= 0:
+            return None
+        return cls.objects.create(
+            group=pool.group, version=pool.version, preconfigured=pool.preconfigured,
+            count=pool.total_count, owner=pool.owner, created_on=pool.created_on)
+
+    def __unicode__(self):
+        return "{} {}/{} ({})".format(type(self).__name__, self.group.id, self.version, self.count)
+
+
 class MismatchVersionMailer(models.Model):
     provider = models.ForeignKey(Provider, on_delete=models.CASCADE)
     template_name = models.CharField(max_length=64)
@@ -29,7 +29,7 @@ import socket
 
 from appliances.models import (
     Provider, Group, Template, Appliance, AppliancePool, DelayedProvisionTask,
-    MismatchVersionMailer, User, GroupShepherd)
+    MismatchVersionMailer, User, GroupShepherd, PoolDemand)
 from sprout import settings, redis
 from sprout.irc_bot import send_message
 from sprout.log import create_logger
@@ -1448,17 +1448,26 @@ def generic_shepherd(self, preconfigured):
         # If we then want to delete some templates, better kill the eldest. status_changed
         # says which one was provisioned when, because nothing else then touches that field.
         appliances.sort(key=lambda appliance: appliance.status_changed)
-        pool_size = gs.template_pool_size if preconfigured else gs.unconfigured_template_pool_size
-        if len(appliances) < pool_size and possible_templates_for_provision:
+        pool_size = gs.target_pool_size(
+            preconfigured, version=filter_keep.get("version"), current=len(appliances))
+        deficit = pool_size - len(appliances)
+        if deficit > 0 and possible_templates_for_provision:
             # There must be some templates in order to run the provisioning
             # Provision ONE appliance at time for each group, that way it is possible to maintain
-            # reasonable balancing
-            with transaction.atomic():
-                # Now look for templates that are on non-busy providers
-                tpl_free = filter(
-                    lambda t: t.provider.free,
-                    possible_templates_for_provision)
-                if tpl_free:
+            # reasonable balancing. Only when the deficit is large (eg. predicted burst), provision
+            # more of them in one pass.
+            if deficit >= settings.SHEPHERD_BURST_DEFICIT:
+                to_provision = min(deficit, settings.SHEPHERD_MAX_PROVISION_PER_PASS)
+            else:
+                to_provision = 1
+            for _ in range(to_provision):
+                with transaction.atomic():
+                    # Now look for templates that are on non-busy providers
+                    tpl_free = filter(
+                        lambda t: t.provider.free,
+                        possible_templates_for_provision)
+                    if not tpl_free:
+                        break
                     chosen_template = sorted(tpl_free, key=lambda t: t.provider.appliance_load)[0]
                     new_appliance_name = gen_appliance_name(chosen_template.id)
                     appliance = Appliance(
@@ -1499,6 +1508,13 @@ def free_appliance_shepherd(self):
     generic_shepherd(self, False)
 
 
+@singleton_task()
+def purge_old_pool_demand(self):
+    """Remove the demand records that are too old to be used for the shepherd predictions."""
+    expiration_time = timezone.now() - timedelta(**settings.SHEPHERD_DEMAND_RETENTION)
+    PoolDemand.objects.filter(created_on__lt=expiration_time).delete()
+
+
 @singleton_task()
 def wait_appliance_ready(self, appliance_id):
     """This task checks for appliance's readiness for use. The checking loop is designed as retrying
@@ -166,6 +166,26 @@ ORPHANED_APPLIANCE_GRACE_TIME = dict(
     minutes=45,
 )
 
+# Predictive shepherd sizing
+# How far ahead the shepherd looks when predicting the demand for appliances
+SHEPHERD_DEMAND_HORIZON = dict(
+    hours=1,
+)
+# How many days back to average the demand for the same time of day
+SHEPHERD_DEMAND_DAYS = 7
+# How many weeks back to average the demand for the same time of the same day of week
+SHEPHERD_DEMAND_WEEKS = 4
+# Weight of the day-of-week average in the prediction, the rest is the time-of-day average
+SHEPHERD_DEMAND_WEEKDAY_WEIGHT = 0.6
+# Demand records older than this are purged
+SHEPHERD_DEMAND_RETENTION = dict(
+    weeks=8,
+)
+# When the shepherd deficit of a group reaches this, provision more than one appliance per pass
+SHEPHERD_BURST_DEFICIT = 3
+# Upper bound of appliances provisioned for one group in one shepherd pass
+SHEPHERD_MAX_PROVISION_PER_PASS = 5
+
 # Celery beat
 CELERYBEAT_SCHEDULE = {
     'check-templates': {
@@ -251,7 +271,12 @@ CELERYBEAT_SCHEDULE = {
     'read-docker-images-from-url': {
         'task': 'appliances.tasks.read_docker_images_from_url',
         'schedule': timedelta(hours=12),
-    }
+    },
+
+    'purge-old-pool-demand': {
+        'task': 'appliances.tasks.purge_old_pool_demand',
+        'schedule': timedelta(days=1),
+    },
 }
 
 try:
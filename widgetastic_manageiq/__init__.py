@@ -16,10 +16,10 @@ from lxml.html import document_fromstring
 from selenium.common.exceptions import WebDriverException
 from wait_for import TimedOutError, wait_for
 from widgetastic.exceptions import NoSuchElementException, WidgetOperationFailed
-from widgetastic.log import logged
+from widgetastic.log import create_item_logger, logged
 from widgetastic.utils import (
     ParametrizedLocator, Parameter, ParametrizedString, attributize_string, VersionPick, Version,
-    partial_match)
+    normalize_space, partial_match)
 from widgetastic.widget import (
     FileInput as BaseFileInput,
     Table as VanillaTable, TableColumn as VanillaTableColumn, TableRow as VanillaTableRow,
@@ -350,6 +350,33 @@ class BootstrapSwitchSelect(View):
 
 # ManageIQ table objects definition
 class TableColumn(VanillaTableColumn):
+    """Column reading from the snapshot of its row if there is one, the interactions with the
+    cell (clicks, widgets) always use the live element."""
+    @property
+    def snapshot(self):
+        """The cell as read by :py:meth:`TableSnapshotMixin.snapshot`, ``None`` if not read so"""
+        cells = (getattr(self.row, 'snapshot', None) or {}).get('cells', [])
+        if isinstance(self.position, int) and 0 <= self.position < len(cells):
+            return cells[self.position]
+        return None
+
+    @property
+    def text(self):
+        cell = self.snapshot
+        if cell is not None:
+            return cell['text']
+        return super(TableColumn, self).text
+
+    @property
+    def links(self):
+        """Returns the targets of the links in the cell."""
+        cell = self.snapshot
+        if cell is not None:
+            return cell['links']
+        return [
+            self.browser.get_attribute('href', link)
+            for link in self.browser.elements('.//a[@href]', parent=self)]
+
     @property
     def checkbox(self):
         try:
@@ -359,6 +386,9 @@ class TableColumn(VanillaTableColumn):
 
     @property
     def checked(self):
+        cell = self.snapshot
+        if cell is not None:
+            return cell['checked']
         checkbox = self.checkbox
         if checkbox is None:
             return None
@@ -367,17 +397,135 @@ class TableColumn(VanillaTableColumn):
     def check(self):
         if not self.checked:
             self.browser.click(self.checkbox)
+            self.row.snapshot = None
 
     def uncheck(self):
         if self.checked:
             self.browser.click(self.checkbox)
+            self.row.snapshot = None
 
 
 class TableRow(VanillaTableRow):
     Column = TableColumn
+    #: The row as read by :py:meth:`TableSnapshotMixin.snapshot`, the columns read from it if set
+    snapshot = None
+
+    @property
+    def row_id(self):
+        """Returns the ``id`` attribute of the row."""
+        if self.snapshot is not None:
+            return self.snapshot['id']
+        return self.browser.get_attribute('id', self)
+
+
+class TableSnapshotMixin(object):
+    """Reads the whole table by a single script instead of a WebDriver call per row and cell.
+
+    The rows of the table are created with the :py:meth:`snapshot` of the table, so reading them
+    takes no further calls, only the interactions use the live elements. A row is read live again
+    once its checkbox is clicked. Set ``BULK_READ`` to ``False`` to read the rows live.
+
+    The tables that cannot be read by the script are read live.
+    """
+    BULK_READ = True
+    SNAPSHOT_SCRIPT = jsmin('''
+        var table = arguments[0];
+        function nodes(xpath) {
+            var result = document.evaluate(
+                xpath, table, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            var list = [];
+            for (var i = 0; i < result.snapshotLength; i++) {
+                list.push(result.snapshotItem(i));
+            }
+            return list;
+        }
+        function text(element) {
+            return element.innerText || element.textContent || "";
+        }
+        function tag(element) {
+            return element.tagName.toLowerCase();
+        }
+        var headerRows = nodes(arguments[3]).map(function(cell) { return cell.parentNode; });
+        var rows = [];
+        nodes(arguments[1]).forEach(function(row) {
+            if (headerRows.indexOf(row) >= 0) {
+                return;
+            }
+            var cells = [];
+            for (var i = 0; i < row.children.length; i++) {
+                var cell = row.children[i];
+                if (tag(cell) !== "td") {
+                    continue;
+                }
+                var links = [];
+                var anchors = cell.querySelectorAll("a[href]");
+                for (var j = 0; j < anchors.length; j++) {
+                    links.push(anchors[j].href);
+                }
+                var checked = null;
+                for (var j = 0; j < cell.children.length; j++) {
+                    var child = cell.children[j];
+                    if (tag(child) === "input" && child.type === "checkbox") {
+                        checked = child.checked;
+                        break;
+                    }
+                }
+                cells.push({
+                    text: text(cell), links: links, checked: checked,
+                    "class": cell.getAttribute("class"), rowspan: cell.getAttribute("rowspan")});
+            }
+            rows.push({
+                id: row.getAttribute("id"), "class": row.getAttribute("class"), cells: cells});
+        });
+        return {
+            headers: nodes(arguments[2]).map(text), header_in_body: headerRows.length > 0,
+            rows: rows};
+    ''')
+
+    def snapshot(self):
+        """Reads the table by one script.
+
+        Returns:
+            A :py:class:`dict` with the ``headers`` (like :py:attr:`headers`) and the ``rows``
+            (like :py:meth:`rows`). A row is a :py:class:`dict` with the ``id``, ``class`` and
+            ``cells``, a cell a :py:class:`dict` with the normalized ``text``, the ``links``, the
+            ``checked`` state of its checkbox (``None`` if it has none), ``class`` and ``rowspan``.
+            ``None`` if the table is not present or the script failed.
+        """
+        try:
+            data = self.browser.execute_script(
+                self.SNAPSHOT_SCRIPT, self, self.ROWS, self.HEADERS, self.HEADER_IN_ROWS,
+                silent=True)
+        except NoSuchElementException:
+            return None
+        except WebDriverException as e:
+            self.logger.warning('Cannot read %r by a script, reading it live: %s', self, e)
+            return None
+        headers = tuple(normalize_space(header) or None for header in data['headers'])
+        for row in data['rows']:
+            for cell in row['cells']:
+                cell['text'] = normalize_space(cell['text'])
+        # The headers and the header position are read by many calls otherwise
+        self.__dict__.setdefault('headers', headers)
+        self.__dict__.setdefault('_is_header_in_body', data['header_in_body'])
+        return {'headers': headers, 'rows': data['rows']}
+
+    def _all_rows(self):
+        snapshot = self.snapshot() if self.BULK_READ else None
+        if snapshot is None:
+            for row in self._live_rows():
+                yield row
+            return
+        for row_pos, data in enumerate(snapshot['rows'], 1):
+            row = self.Row(self, row_pos, logger=create_item_logger(self.logger, row_pos))
+            row.snapshot = data
+            yield row
+
+    def _live_rows(self):
+        return super(TableSnapshotMixin, self)._all_rows()
 
 
-class Table(VanillaTable):
+class Table(TableSnapshotMixin, VanillaTable):
     CHECKBOX_ALL = '|'.join([
         './thead/tr/th[1]/input[contains(@class, "checkall")]',
         './tr/th[1]/input[contains(@class, "checkall")]',
@@ -479,7 +627,7 @@ class Table(VanillaTable):
             self.logger.debug('sort_by(%r, %r): order already selected', column, order)
 
 
-class SummaryTable(VanillaTable):
+class SummaryTable(TableSnapshotMixin, VanillaTable):
     """Table used in Provider, VM, Host, ... summaries.
 
     Todo:
@@ -490,6 +638,7 @@ class SummaryTable(VanillaTable):
     """
     BASELOC = './/table[./thead/tr/th[contains(@align, "left") and normalize-space(.)={}]]'
     Image = namedtuple('Image', ['alt', 'title', 'src'])
+    Row = TableRow
 
     def __init__(self, parent, title, *args, **kwargs):
         VanillaTable.__init__(self, parent, self.BASELOC.format(quote(title)), *args, **kwargs)
@@ -499,7 +648,11 @@ class SummaryTable(VanillaTable):
         """Returns a list of the field names in the table (the left column)."""
         fields_names = []
         for field in self:
-            if self.browser.get_attribute('class', field[0]):
+            cell = field[0].snapshot
+            if cell is not None:
+                if cell['class']:
+                    fields_names.append(cell['text'])
+            elif self.browser.get_attribute('class', field[0]):
                 fields_names.append(field[0].text)
         return fields_names
 
@@ -574,7 +727,21 @@ class SummaryTable(VanillaTable):
         return self.get_field(field_name)[1].click()
 
     def read(self):
-        return {field: self.get_text_of(field) for field in self.fields}
+        snapshot = self.snapshot() if self.BULK_READ else None
+        if snapshot is None:
+            return {field: self.get_text_of(field) for field in self.fields}
+        result = {}
+        for row in snapshot['rows']:
+            cells = row['cells']
+            if not cells or not cells[0]['class'] or cells[0]['text'] in result:
+                continue
+            field = cells[0]['text']
+            if cells[0]['rowspan'] or len(cells) < 2:
+                # The fields spanning more rows are found by their icons
+                result[field] = self.get_text_of(field)
+            else:
+                result[field] = cells[1]['text']
+        return result
 
 
 class NestedSummaryTable(SummaryTable):
@@ -584,7 +751,7 @@ class NestedSummaryTable(SummaryTable):
     def __init__(self, parent, title, *args, **kwargs):
         SummaryTable.__init__(self, parent, title, *args, **kwargs)
 
-    def _all_rows(self):
+    def _live_rows(self):
         for row_pos in range(1, len(self.browser.elements(self.ROWS, parent=self))):
             yield self.Row(self, row_pos)
 